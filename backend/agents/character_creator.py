@@ -2,9 +2,8 @@
 # This module defines the Character Creator agent for the ideaWeaver application.
 
 from crewai import Agent
-from langsmith import traceable
+from backend.utils.runtime_profile import agent_verbose
 
-@traceable(name="Character Creator Agent")
 def character_creator(llm):
     """Defines the Character Creator agent with its role, goal, and backstory."""
     return Agent(
@@ -16,7 +15,7 @@ def character_creator(llm):
             "Your expertise includes carefully analyzing the provided context, specifically the 'world_task' output, "
             "to extract world details and the 'initial_character_names' to ensure characters are perfectly integrated."
         ),
-        verbose=True,
+        verbose=agent_verbose(),
         allow_delegation=False,
         llm=llm
     )
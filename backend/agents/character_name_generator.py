@@ -1,15 +1,25 @@
 # agents/character_name_generator.py
-# This module generates character names using a dedicated CrewAI agent.
+# This module generates character names with the naming agent from the agent registry.
 
-import ast
-from crewai import Agent, Task, Crew, Process
-from backend.prompts.character_name_generator_prompt import CHARACTER_NAME_GENERATOR_PROMPT
-from langsmith import traceable
+import json
 
-@traceable(name="Character Name Generator Agent")
+from crewai import Task, Crew, Process
+from backend.utils.agent_registry import get_agent_registry
+from backend.utils.metrics import record_parse_failure, stage_timer
+from backend.utils.output_recovery import recover_json
+from backend.prompts.registry import render_prompt
+from backend.utils.single_flight import SingleFlight
+from backend.utils.tracing import traced
+from backend.utils.runtime_profile import agent_verbose
+
+_name_flights = SingleFlight("character_names")
+
+@traced(name="Character Name Generator Agent")
 def generate_character_names(llm, premise, age_group, num_characters):
     """Generates a specified number of character names using a dedicated agent.
 
+    Identical calls made while one is already running share its result.
+
     Args:
         llm: The language model to use.
         premise (str): The story premise.
@@ -19,21 +29,18 @@ def generate_character_names(llm, premise, age_group, num_characters):
     Returns:
         list[str]: A list of generated character names.
     """
-    character_namer_agent = Agent(
-        role='Creative Character Namer',
-        goal=f'Generate {num_characters} distinct and fitting character names based on a story premise.',
-        backstory='You are an expert at crafting memorable and evocative names for fictional characters that fit the genre and tone of a story.',
-        verbose=False,
-        allow_delegation=False,
-        llm=llm
-    )
+    key = json.dumps([getattr(llm, "model", ""), premise, age_group, num_characters])
+    # Each caller gets its own copy of the shared list
+    return list(_name_flights.do(key, _generate_character_names, llm, premise, age_group, num_characters))
+
+
+def _generate_character_names(llm, premise, age_group, num_characters):
+    # The shared naming agent; the number of names is part of the task description
+    character_namer_agent = get_agent_registry(llm).acquire("name_generator_agent")
 
     task = Task(
-        description=CHARACTER_NAME_GENERATOR_PROMPT.format(
-            premise=premise,
-            age_group=age_group,
-            num_characters=num_characters
-        ),
+        description=render_prompt("character_name_generator", premise=premise, age_group=age_group,
+                                  num_characters=num_characters),
         agent=character_namer_agent,
         expected_output=f"A Python list of {num_characters} strings, where each string is a unique character name. Example: ['Elara', 'Kaelen']"
     )
@@ -42,30 +49,40 @@ def generate_character_names(llm, premise, age_group, num_characters):
         agents=[character_namer_agent],
         tasks=[task],
         process=Process.sequential,
-        verbose=True
+        verbose=agent_verbose()
     )
 
     # Kick off the crew and get the raw output
-    result = crew.kickoff()
-    if not result or not result.raw:
-        return [f"Character {i+1}" for i in range(num_characters)]
+    with stage_timer("name_generator"):
+        result = crew.kickoff()
+        if not result or not result.raw:
+            record_parse_failure()
+            return [f"Character {i+1}" for i in range(num_characters)]
 
-    raw_result = result.raw
+        return parse_character_names(result.raw, num_characters)
 
-    # Process the result to return a clean list of names
+
+def parse_character_names(raw_result, num_characters):
+    """Parses raw LLM output into a clean list of character names.
+
+    Args:
+        raw_result (str): The raw output of the naming agent.
+        num_characters (int): The number of names expected.
+
+    Returns:
+        list[str]: The parsed names, or generic placeholder names if the output cannot be parsed.
+    """
+    # The output should be a list literal, e.g. "['Elara', 'Kaelen']", possibly wrapped in prose or fences
     try:
-        # The output should be a string representation of a list, e.g., "['Elara', 'Kaelen']"
-        # We can use eval to safely parse it into a Python list.
-        name_list = ast.literal_eval(raw_result)
-        if isinstance(name_list, list) and len(name_list) == num_characters and all(isinstance(n, str) for n in name_list):
-            return name_list
-    except (SyntaxError, ValueError, TypeError):
-        # Fallback in case the output is not a valid list string
-        # We can try to split by common delimiters
-        cleaned_result = raw_result.strip("[]'\n ").replace("'", "").replace('"', '')
-        name_list = [name.strip() for name in cleaned_result.split(',')]
-        if len(name_list) >= num_characters:
-            return name_list[:num_characters]
+        name_list = recover_json(raw_result, opener="[")
+    except json.JSONDecodeError:
+        # Fallback in case the output is not a list at all: split by commas
+        name_list = raw_result.strip("[]\n ").split(',')
+    name_list = [name.strip().strip("'\"").strip() for name in name_list if isinstance(name, str)]
+    name_list = [name for name in name_list if name]
+    if len(name_list) >= num_characters:
+        return name_list[:num_characters]
 
     # If all else fails, return a default list of generic names
+    record_parse_failure()
     return [f"Character {i+1}" for i in range(num_characters)]
@@ -0,0 +1,97 @@
+# agents/compact_story_writer.py
+# This module defines the Compact Story Writer agent, which produces a whole story
+# concept in one schema-constrained LLM call instead of six separate agent runs.
+
+import json
+from typing import Any, Dict, List
+
+from crewai import Agent, Task
+from backend.utils.tracing import traced
+from pydantic import BaseModel, Field
+from backend.prompts.registry import render_prompt
+from backend.utils.metrics import record_parse_failure
+from backend.utils.output_recovery import recover_json
+from backend.utils.runtime_profile import agent_verbose
+
+
+class CompactStory(BaseModel):
+    """The structured output of the compact generation mode."""
+    title: str = Field(..., description="A short, catchy story title.")
+    character_names: List[str] = Field(..., description="The names of the main characters.")
+    world_description: str = Field(..., description="The setting, culture and central conflict.")
+    character_profiles: str = Field(..., description="A Markdown profile for each character.")
+    narrative_twist: str = Field(..., description="An unexpected but fitting twist.")
+    story_summary: str = Field(..., description="A single-paragraph summary under 100 words.")
+
+
+def compact_story_writer(llm):
+    """Defines the Compact Story Writer agent with its role, goal, and backstory."""
+    return Agent(
+        role="Complete Story Concept Designer",
+        goal="Turn a story premise into a complete, internally consistent story concept (title, characters, world, twist and summary) in a single structured answer.",
+        backstory=(
+            "You are a versatile story developer who can do the work of a whole writers' room at once. "
+            "You build the world, the characters, the twist and the blurb together, so every part fits the others, "
+            "and you always answer in the exact structured format requested."
+        ),
+        verbose=agent_verbose(),
+        allow_delegation=False,
+        llm=llm
+    )
+
+
+@traced(name="Compact Story Task")
+def compact_story_task(llm, inputs: Dict[str, Any], agent=None) -> Task:
+    """Defines the single CrewAI Task that generates a whole story concept.
+
+    Args:
+        llm: The language model to use.
+        inputs (dict): The validated story inputs (a StoryGenerationRequest as a dict).
+        agent (Agent, optional): An already built Compact Story Writer agent.
+
+    Returns:
+        Task: A task whose output is validated against CompactStory.
+    """
+    if inputs["title_choice"] == "Generate for me":
+        title_instruction = "Generate one."
+    else:
+        title_instruction = f"Use exactly \"{inputs.get('title_input')}\"."
+    if inputs.get("character_names_input"):
+        names_instruction = f"Use exactly these names: {', '.join(inputs['character_names_input'])}."
+    else:
+        names_instruction = f"Generate {inputs['num_characters']} distinct, fitting names."
+
+    return Task(
+        description=render_prompt(
+            "compact_story",
+            premise=inputs["premise"],
+            age_group=inputs["age_group"],
+            title_instruction=title_instruction,
+            names_instruction=names_instruction,
+            num_characters=inputs["num_characters"],
+        ),
+        agent=agent or compact_story_writer(llm),
+        expected_output="A single JSON object with the keys title, character_names, world_description, "
+                        "character_profiles, narrative_twist and story_summary.",
+        output_pydantic=CompactStory,
+    )
+
+
+def parse_compact_story(result) -> CompactStory:
+    """Validates a crew result into a CompactStory, falling back to the raw JSON text.
+
+    Raises:
+        ValueError: If the output does not match the schema.
+    """
+    if getattr(result, "pydantic", None) is not None:
+        return result.pydantic
+    try:
+        data = recover_json(result.raw or "")
+    except json.JSONDecodeError as e:
+        record_parse_failure()
+        raise ValueError(f"The compact story output did not contain a JSON object: {e}") from e
+    try:
+        return CompactStory.model_validate(data)
+    except Exception as e:
+        record_parse_failure()
+        raise ValueError(f"The compact story output did not match the expected schema: {e}") from e
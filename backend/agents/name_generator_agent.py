@@ -1,29 +1,31 @@
 from crewai import Agent, Task, Crew, Process
-from langsmith import traceable
+from backend.utils.tracing import traced
 from backend.agents.character_name_generator import generate_character_names # Import the original function
+from backend.utils.runtime_profile import agent_verbose
+from backend.prompts.registry import render_prompt
 
-@traceable(name="Character Name Generator Agent (CrewAI)")
 def name_generator_agent(llm):
     """Defines the CrewAI Agent for generating character names."""
     return Agent(
         role='Creative Character Namer',
         goal='Generate distinct and fitting character names based on story premise, age group, and number of characters.',
         backstory='You are an expert at crafting memorable and evocative names for fictional characters that fit the genre and tone of a story.',
-        verbose=True,
+        verbose=agent_verbose(),
         allow_delegation=False,
         llm=llm
     )
 
-@traceable(name="Generate Character Names Task")
-def generate_character_names_task(llm, premise: str, age_group: str, num_characters: int):
-    """Defines the CrewAI Task for generating character names."""
-    agent = name_generator_agent(llm)
+@traced(name="Generate Character Names Task")
+def generate_character_names_task(llm, premise: str, age_group: str, num_characters: int, agent=None):
+    """Defines the CrewAI Task for generating character names.
+
+    An already built agent can be passed in to avoid constructing a new one.
+    """
+    agent = agent or name_generator_agent(llm)
     task = Task(
-        description=(
-            f"Generate {num_characters} distinct and fitting character names for a story with the premise: '{premise}'. "
-            f"Target audience: {age_group}. "
-            "The output should be a Python list of strings, e.g., ['Name1', 'Name2']."
-        ),
+        # The same prompt as the standalone name generator (agents/character_name_generator.py)
+        description=render_prompt("character_name_generator", premise=premise, age_group=age_group,
+                                  num_characters=num_characters),
         agent=agent,
         expected_output=f"A Python list of {num_characters} strings, where each string is a unique character name. Example: ['Elara', 'Kaelen']"
     )
@@ -2,9 +2,8 @@
 # This module defines the Narrative Nudger agent for the ideaWeaver application.
 
 from crewai import Agent
-from langsmith import traceable
+from backend.utils.runtime_profile import agent_verbose
 
-@traceable(name="Narrative Nudger Agent")
 def narrative_nudger(llm):
     """Defines the Narrative Nudger agent with its role, goal, and backstory."""
     return Agent(
@@ -15,7 +14,7 @@ def narrative_nudger(llm):
             "Your talent lies in seeing the narrative threads and weaving in a twist that feels both shocking and inevitable. "
             "You are adept at extracting the world and character details from the provided context to craft a relevant twist."
         ),
-        verbose=True,
+        verbose=agent_verbose(),
         allow_delegation=False,
         llm=llm
     )
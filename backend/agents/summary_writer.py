@@ -2,9 +2,8 @@
 # This module defines the Summary Writer agent for the ideaWeaver application.
 
 from crewai import Agent
-from langsmith import traceable
+from backend.utils.runtime_profile import agent_verbose
 
-@traceable(name="Summary Writer Agent")
 def summary_writer(llm):
     """Defines the Summary Writer agent with its role, goal, and backstory."""
     return Agent(
@@ -15,7 +14,7 @@ def summary_writer(llm):
             "You know how to hook a reader, conveying the core conflict and character dynamics while maintaining the story's intended tone and mystery. "
             "You are skilled at analyzing the full story context provided to craft a concise and compelling summary."
         ),
-        verbose=True,
+        verbose=agent_verbose(),
         allow_delegation=False,
         llm=llm
     )
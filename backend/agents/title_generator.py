@@ -2,10 +2,11 @@
 # This module generates a creative title for a story using a CrewAI agent.
 
 from crewai import Agent, Task, Crew, Process
-from langsmith import traceable
-from backend.prompts.title_generator_prompt import TITLE_GENERATOR_PROMPT
+from backend.utils.tracing import traced
+from backend.prompts.registry import render_prompt
+from backend.utils.runtime_profile import agent_verbose
 
-@traceable(name="Title Generator Agent")
+@traced(name="Title Generator Agent")
 def generate_story_title(llm, story_premise: str, age_group: str) -> str:
     """Generates a creative story title based on the premise and age group.
 
@@ -26,15 +27,12 @@ def generate_story_title(llm, story_premise: str, age_group: str) -> str:
         llm=llm
     )
     task = Task(
-        description=TITLE_GENERATOR_PROMPT.format(
-            story_premise=story_premise,
-            age_group=age_group
-        ),
+        description=render_prompt("title_generator", story_premise=story_premise, age_group=age_group),
         agent=title_agent,
         expected_output="A short, catchy, and relevant story title (max 8 words)."
     )
 
-    crew = Crew(agents=[title_agent], tasks=[task], process=Process.sequential, verbose=True)
+    crew = Crew(agents=[title_agent], tasks=[task], process=Process.sequential, verbose=agent_verbose())
     result = crew.kickoff()
     if result:
         return str(result)
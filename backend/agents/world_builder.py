@@ -2,9 +2,8 @@
 # This module defines the World Builder agent for the ideaWeaver application.
 
 from crewai import Agent
-from langsmith import traceable
+from backend.utils.runtime_profile import agent_verbose
 
-@traceable(name="World Builder Agent")
 def world_builder(llm):
     """Defines the World Builder agent with its role, goal, and backstory."""
     return Agent(
@@ -15,7 +14,7 @@ def world_builder(llm):
             "You excel at establishing a strong sense of place, defining the rules and culture, and seeding the central conflict that will drive the narrative, "
             "ensuring every element is logically connected and engaging for the intended reader."
         ),
-        verbose=True,
+        verbose=agent_verbose(),
         allow_delegation=False,
         llm=llm
     )
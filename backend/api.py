@@ -1,29 +1,41 @@
+import asyncio
 import json
 import logging
-from fastapi import APIRouter
+import os
+import time
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
-
-# your agent and task functions are in this path
-from backend.agents.idea_weaver_master import master_agent_input_task
-from backend.agents.world_builder import world_builder
-from backend.agents.character_creator import character_creator
-from backend.agents.narrative_nudger import narrative_nudger
-from backend.agents.summary_writer import summary_writer
-from backend.agents.title_generator import generate_story_title
-from backend.agents.character_name_generator import generate_character_names
-from backend.agents.name_generator_agent import name_generator_agent, generate_character_names_task
-from backend.agents.title_generator_agent import title_generator_agent, generate_story_title_task
-from backend.utils.llm_loader import load_llm
+from typing import Optional, Dict, Any, List, Literal, Tuple
+
+# Agent and task functions (and with them crewai/langsmith/litellm) are imported on first use,
+# so that importing the API stays cheap and startup checks run before anything heavy loads.
+from backend.utils.llm_loader import get_llm, get_llm_provider
+from backend.utils.llm_cache import get_llm_cache, cache_bypass
+from backend.utils.conversation_router import plan_turn, record_turn, get_routing_stats
+from backend.utils.llm_executor import get_llm_executor, run_llm_call, ExecutorOverloadedError
+from backend.utils.markdown_builder import build_markdown
+from backend.utils.metrics import get_metrics_registry
+from backend.utils.batch_runner import BatchJob, start_job_in_background
+from backend.utils.job_queue import JobQueue, JobQueueFullError, get_job_queue
 from backend.utils.save_to_markdown import save_to_markdown
-from crewai import Crew, Process, Task, Agent
+from backend.utils.artifact_store import get_artifact_store, iter_decompressed, make_request_hash
+from backend.utils.session_store import get_session_store
+from backend.utils.speculation import get_speculator
+from backend.utils.single_flight import Flight, SingleFlight
+from backend.utils.health import get_health_prober
+from backend.utils.ollama_keeper import get_ollama_keeper
+from backend.utils.tracing import get_tracer
+from backend.utils.runtime_profile import redact_payload
 
 # --- Pydantic Models for API Contract ---
 # This defines the structure of the request body
+# With a session_id, only user_input is needed: the history and inputs are kept server-side
 class UserRequest(BaseModel):
-    conversation_history: str
     user_input: str
-    collected_inputs: Dict[str, Any]
+    session_id: Optional[str] = None
+    conversation_history: str = ""
+    collected_inputs: Dict[str, Any] = {}
     last_question: Optional[str] = None
 
 # This defines the structure of the response body
@@ -31,6 +43,9 @@ class AgentResponse(BaseModel):
     status: str
     message: str
     data: Optional[Dict[str, Any]] = None
+    last_question: Optional[str] = None
+    routing: Optional[Dict[str, Any]] = None
+    session_id: Optional[str] = None
 
 class StoryGenerationRequest(BaseModel):
     premise: str
@@ -40,174 +55,490 @@ class StoryGenerationRequest(BaseModel):
     num_characters: int
     name_choice: str
     character_names_input: Optional[list[str]] = None
+    fresh: bool = False # Skip cached LLM responses and generate everything anew
+    generation_mode: Literal["full", "compact"] = "full" # "compact" generates the whole concept in one LLM call
+    session_id: Optional[str] = None # The /converse session, whose speculatively generated stages are reused
+
+class BatchStoryGenerationRequest(BaseModel):
+    requests: List[StoryGenerationRequest]
 
 
 router = APIRouter()
-llm = load_llm() # Load your LLM once on startup
+
+# Identical story requests that arrive while one is being generated share its generation
+_story_flights = SingleFlight("story")
+
+_started_at = time.time()
+
+def warm_up():
+    """Loads the LLM, imports the agent stack, builds every agent and loads the prompt templates ahead of the first request."""
+    from backend.prompts.registry import get_prompt_registry
+    from backend.utils.agent_registry import get_agent_registry
+    import backend.agents.idea_weaver_master
+    import backend.utils.story_pipeline
+
+    start = time.perf_counter()
+    get_agent_registry(get_llm()).warm_up()
+    get_prompt_registry()
+    logging.info(f"Warm-up finished in {time.perf_counter() - start:.2f}s.")
+
+def _overloaded_response(error: Exception) -> JSONResponse:
+    """Builds the 429 response returned when the LLM queue or the job queue is full."""
+    logging.warning(f"Rejecting request: {error}")
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": str(error.retry_after)},
+        content={"status": "error", "message": "The server is busy. Please try again shortly."}
+    )
+
+def _save_story(request: Dict[str, Any], final_output: Dict[str, Any]) -> str:
+    """Renders the story concept to markdown, saves it to the outputs directory and the
+    artifact store, and returns its story id."""
+    # Build markdown content using the new build_markdown function
+    markdown_content = build_markdown(final_output)
+
+    # Save to markdown
+    save_to_markdown(final_output["title"], markdown_content)
+    return get_artifact_store().save(request, final_output, markdown_content)
+
+def _claim_speculation(request: StoryGenerationRequest) -> Dict[str, Any]:
+    """Returns the stages generated for the request's session during the conversation."""
+    speculator = get_speculator()
+    if speculator is None or not request.session_id:
+        return {}
+    if request.fresh or request.generation_mode == "compact":
+        speculator.discard(request.session_id)
+        return {}
+    return speculator.claim(request.session_id, request.model_dump())
+
+def _story_key(request: StoryGenerationRequest) -> str:
+    """Returns the key under which identical story requests are coalesced."""
+    return f"{make_request_hash(request.model_dump())}:{'fresh' if request.fresh else 'cached'}"
+
+def _generate_and_save(request: StoryGenerationRequest, on_event) -> Dict[str, Any]:
+    """Generates and stores a story and returns the /generate_story response."""
+    from backend.utils.story_pipeline import generate_story_concept
+    # Claimed only once the story is running, so a rejected request leaves the session's stages in place
+    precomputed = _claim_speculation(request)
+    with cache_bypass(request.fresh):
+        final_output, timings = generate_story_concept(get_llm(), request.model_dump(), on_event, precomputed)
+    story_id = _save_story(request.model_dump(), final_output)
+    logging.info(f"Generated story {story_id}. Node timings: {timings}")
+    return {"status": "complete", "message": "Story concept generated successfully!", "data": final_output, "timings": timings,
+            "story_id": story_id}
+
+def _join_story(request: StoryGenerationRequest) -> Tuple[Flight, bool]:
+    """Joins the generation of an identical story request in flight, or starts a new one.
+
+    Returns:
+        tuple: The flight and whether the caller must run it.
+    """
+    flight, leader = _story_flights.join(_story_key(request))
+    if not leader and request.session_id:
+        # The story comes from the other request, so this session's speculative stages are not needed
+        speculator = get_speculator()
+        if speculator is not None:
+            speculator.discard(request.session_id)
+    return flight, leader
+
+def _start_story(request: StoryGenerationRequest, on_event=None) -> asyncio.Future:
+    """Starts generating a story on the LLM executor, or attaches to an identical generation in flight.
+
+    Args:
+        request (StoryGenerationRequest): The story request.
+        on_event (Callable, optional): Receives the pipeline events, including the sections
+            finished before the caller attached.
+
+    Returns:
+        asyncio.Future: Resolves to the /generate_story response.
+
+    Raises:
+        ExecutorOverloadedError: If the LLM executor queue is full.
+    """
+    flight, leader = _join_story(request)
+    if on_event is not None:
+        flight.events.subscribe(on_event)
+    if leader:
+        try:
+            get_llm_executor().submit(_story_flights.run, flight, _generate_and_save, request, flight.events.emit)
+        except ExecutorOverloadedError as e:
+            _story_flights.fail(flight, e)
+            raise
+    # Each caller gets its own asyncio future; cancelling it does not cancel the shared one
+    return asyncio.wrap_future(flight.future)
+
+def _run_story_job(request: Dict[str, Any], on_event) -> Dict[str, Any]:
+    """Generates the story of a queued job and returns the same response as /generate_story."""
+    story_request = StoryGenerationRequest(**request)
+    flight, leader = _join_story(story_request)
+    flight.events.subscribe(on_event)
+    if leader:
+        _story_flights.run(flight, _generate_and_save, story_request, flight.events.emit)
+    return flight.future.result()
+
+def start_job_queue() -> JobQueue:
+    """Starts the story job workers, resuming jobs left unfinished by the last run."""
+    return get_job_queue(_run_story_job)
+
+async def _converse_turn(conversation_history: str, user_input: str, collected_inputs: Dict[str, Any],
+                         last_question: Optional[str]) -> Dict[str, Any]:
+    """Runs one conversation turn and returns the agent response as a dict."""
+    # Well-formed answers go straight to the matching validation tool
+    routed_turn = plan_turn(
+        conversation_history=conversation_history,
+        user_input=user_input,
+        collected_inputs=collected_inputs,
+        last_question=last_question
+    )
+    if routed_turn is not None:
+        if routed_turn.uses_llm:
+            agent_response_dict = await run_llm_call(routed_turn.run)
+        else:
+            agent_response_dict = routed_turn.run()
+        agent_response_dict["routing"] = record_turn(fast_path=True)
+        logging.info("Successfully processed /converse request via fast path.")
+        return agent_response_dict
+
+    # Call your existing agent task function
+    from backend.agents.idea_weaver_master import master_agent_input_task
+    agent_json_string = await run_llm_call(
+        master_agent_input_task,
+        llm=get_llm(),
+        current_conversation_history=conversation_history,
+        current_user_input=user_input,
+        collected_inputs=collected_inputs,
+        last_question=last_question
+    )
+
+    # The function already returns a JSON string, so we parse it back to a dict
+    # FastAPI will then re-serialize it into a proper HTTP response.
+    agent_response_dict = json.loads(agent_json_string)
+
+    # Validate that the response from the agent contains the required fields
+    if "status" not in agent_response_dict or "message" not in agent_response_dict:
+        return {"status": "error", "message": "Internal agent returned invalid format."}
+
+    agent_response_dict["routing"] = record_turn(fast_path=False)
+    logging.info("Successfully processed /converse request.")
+    return agent_response_dict
 
 @router.post("/converse", response_model=AgentResponse)
 async def converse(request: UserRequest):
-    logging.info(f"Received request for /converse endpoint with input: {request.user_input}")
-    logging.info(f"Collected inputs received by backend: type={type(request.collected_inputs)}, content={request.collected_inputs}")
+    logging.info(f"Received request for /converse endpoint with input: {redact_payload(request.user_input)}")
+    session_store = get_session_store()
+    session = None
+    if request.session_id:
+        session = session_store.get(request.session_id)
+        if session is None:
+            # The client still has the conversation, and can continue by sending all of it
+            return AgentResponse(status="expired", message="This conversation has expired on the server. Send the full conversation to continue.")
+    elif not request.conversation_history and not request.collected_inputs:
+        # A new conversation gets a session, so the client only has to send its next input
+        session = session_store.create()
+
+    if session is not None:
+        conversation_history = session.prompt_history()
+        collected_inputs = dict(session.collected_inputs)
+        last_question = session.last_question
+    else:
+        # Clients that keep the conversation themselves still send all of it
+        conversation_history = request.conversation_history
+        collected_inputs = request.collected_inputs
+        last_question = request.last_question
+    logging.info(f"Collected inputs for this turn: {redact_payload(collected_inputs)}")
+
+    session_id = session.session_id if session is not None else None
     try:
-        # Call your existing agent task function
-        agent_json_string = master_agent_input_task(
-            llm=llm,
-            current_conversation_history=request.conversation_history,
-            current_user_input=request.user_input,
-            collected_inputs=request.collected_inputs,
-            last_question=request.last_question
-        )
-        
-        # The function already returns a JSON string, so we parse it back to a dict
-        # FastAPI will then re-serialize it into a proper HTTP response.
-        agent_response_dict = json.loads(agent_json_string)
-
-        # Validate that the response from the agent contains the required fields
-        if "status" not in agent_response_dict or "message" not in agent_response_dict:
-            return AgentResponse(status="error", message="Internal agent returned invalid format.")
-
-        logging.info("Successfully processed /converse request.")
+        agent_response_dict = await _converse_turn(conversation_history, request.user_input, collected_inputs, last_question)
+        if session is not None:
+            session.record_turn(request.user_input, agent_response_dict, session_store.max_history_lines)
+            session_store.save(session)
+            # Stages whose inputs are all known start now, while the user answers the next question
+            speculator = get_speculator()
+            if speculator is not None:
+                speculator.update(session.session_id, session.collected_inputs)
+        agent_response_dict["session_id"] = session_id
         return agent_response_dict
 
+    except ExecutorOverloadedError as e:
+        return _overloaded_response(e)
     except json.JSONDecodeError:
         # This catches errors if the agent returns a non-JSON string
-        return AgentResponse(status="error", message="Internal agent response was not valid JSON.")
+        return AgentResponse(status="error", message="Internal agent response was not valid JSON.", session_id=session_id)
     except Exception as e:
         # This catches any other unexpected errors
         logging.error(f"An unexpected error occurred: {e}", exc_info=True)
-        return AgentResponse(status="error", message="An unexpected error occurred on the server.")
+        return AgentResponse(status="error", message="An unexpected error occurred on the server.", session_id=session_id)
 
 @router.post("/generate_story")
 async def generate_story(request: StoryGenerationRequest):
     logging.info(f"Received request for /generate_story endpoint with premise: {request.premise}")
     try:
-        # Initialize agents
-        wb_agent = world_builder(llm)
-        cc_agent = character_creator(llm)
-        nn_agent = narrative_nudger(llm)
-        sw_agent = summary_writer(llm)
-        # Initialize new agents
-        ng_agent = name_generator_agent(llm)
-        tg_agent = title_generator_agent(llm)
-
-        tasks = []
-        agents_in_crew = [wb_agent, cc_agent, nn_agent, sw_agent]
-
-        # Add title generation task if chosen
-        generated_title = None
-        if request.title_choice == "Generate for me":
-            title_task = generate_story_title_task(llm, request.premise, request.age_group)
-            tasks.append(title_task)
-            agents_in_crew.append(tg_agent)
-        else:
-            generated_title = request.title_input # Use provided title
-
-        # Add character name generation task if chosen
-        actual_character_names = request.character_names_input
-        if request.name_choice == "Generate for me":
-            names_task = generate_character_names_task(llm, request.premise, request.age_group, request.num_characters)
-            tasks.append(names_task)
-            agents_in_crew.append(ng_agent)
-        # else: actual_character_names is already set from request.character_names_input
-
-        # World Building Task
-        world_task = Task(
-            description=f"Develop a detailed world description for a story with the premise: '{request.premise}'. "
-                        f"Target audience: {request.age_group}. Focus on unique elements, settings, and atmosphere.",
-            agent=wb_agent,
-            expected_output="A detailed, engaging world description for the story."
-        )
-        tasks.append(world_task)
-
-        # Character Creation Task
-        # This task now depends on names being generated or provided.
-        # We'll need to ensure the names are available from the crew_result if generated.
-        character_task = Task(
-            description=f"Create {request.num_characters} character profiles based on the premise: '{request.premise}' "
-                        f"and the world description. Use these names: {{crew_result_names}}. " # Placeholder for names
-                        f"Include archetypes, key traits, and motivations for each.",
-            agent=cc_agent,
-            expected_output="A list of detailed character profiles, including names, for the story."
-        )
-        tasks.append(character_task)
-
-        # Narrative Nudger Task
-        narrative_task = Task(
-            description=f"Develop a compelling narrative twist or plot point for the story based on the premise: '{request.premise}', "
-                        f"world description: {{crew_result_world_description}}, and character profiles: {{crew_result_character_profiles}}.",
-            agent=nn_agent,
-            expected_output="A concise and engaging narrative twist or plot point."
-        )
-        tasks.append(narrative_task)
-
-        # Summary Writer Task
-        summary_task = Task(
-            description=f"Write a concise and engaging summary of the story, incorporating the premise: '{request.premise}', "
-                        f"world description: {{crew_result_world_description}}, character profiles: {{crew_result_character_profiles}}, "
-                        f"and narrative twist: {{crew_result_narrative_twist}}.",
-            agent=sw_agent,
-            expected_output="A short, engaging story summary."
-        )
-        tasks.append(summary_task)
-
-
-        # --- Create Crew and Kickoff ---
-        # Ensure unique agents in the crew
-        story_crew = Crew(
-            agents=list(set(agents_in_crew)), # Use set to ensure unique agents
-            tasks=tasks,
-            process=Process.sequential, # Keep sequential for now, can be changed to hierarchical later
-            verbose=False
-        )
-
-        # Execute the crew
-        story_crew.kickoff()
-
-        # Extract results from crew_result
-        # CrewAI returns results as a dictionary where keys are task outputs
-        # We need to map these back to our final_output structure
-        task_outputs = {}
-        for task_output in story_crew.tasks_outputs:
-            task_outputs[task_output.description] = task_output.result
-        
-        # If title was generated by crew, get it from task_outputs
-        if request.title_choice == "Generate for me":
-            generated_title = task_outputs.get(title_task.description, generated_title) # Use task description as key
-
-        # If names were generated by crew, get them from task_outputs
-        if request.name_choice == "Generate for me":
-            actual_character_names = task_outputs.get(names_task.description, actual_character_names) # Use task description as key
-
-        # Prepare the final output
-        final_output = {
-            "premise": request.premise,
-            "age_group": request.age_group,
-            "title_choice": request.title_choice,
-            "title": generated_title, # Now directly from generated_title or request.title_input
-            "num_characters": request.num_characters,
-            "name_choice": request.name_choice,
-            "character_names": actual_character_names, # Now directly from actual_character_names or request.character_names_input
-            "world_description": task_outputs.get(world_task.description, "N/A"),
-            "character_profiles": task_outputs.get(character_task.description, "N/A"),
-            "narrative_twist": task_outputs.get(narrative_task.description, "N/A"),
-            "story_summary": task_outputs.get(summary_task.description, "N/A")
-        }
-        
-        # Build markdown content using the new build_markdown function
-        from backend.utils.markdown_builder import build_markdown
-        markdown_content = build_markdown(final_output)
-
-        # Save to markdown
-        save_to_markdown(final_output["title"], markdown_content)
-
-        logging.info("Successfully processed /generate_story request.")
-        return {"status": "complete", "message": "Story concept generated successfully!", "data": final_output}
+        # Independent tasks (title, names, world) run in parallel; the rest wait on their inputs
+        response = await _start_story(request)
+        logging.info(f"Successfully processed /generate_story request. Node timings: {response['timings']}")
+        return response
 
+    except ExecutorOverloadedError as e:
+        return _overloaded_response(e)
     except Exception as e:
         logging.error(f"Error during story generation: {e}", exc_info=True)
         return {"status": "error", "message": f"An error occurred during story generation: {str(e)}"}
 
+@router.post("/generate_story/stream")
+async def generate_story_stream(request: StoryGenerationRequest):
+    """Streams the story as newline-delimited JSON events.
+
+    A `section` event is sent as soon as each part of the story is ready (title, character_names,
+    world_description, character_profiles, narrative_twist, story_summary), interleaved with `token`
+    events when the LLM streams. The stream ends with a `complete` or `error` event.
+    """
+    logging.info(f"Received request for /generate_story/stream endpoint with premise: {request.premise}")
+    loop = asyncio.get_running_loop()
+    events: asyncio.Queue = asyncio.Queue()
+
+    def emit(event: Dict[str, Any]):
+        # Called from pipeline worker threads
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    try:
+        generation = _start_story(request, emit)
+    except ExecutorOverloadedError as e:
+        return _overloaded_response(e)
+
+    async def finish():
+        try:
+            response = await generation
+            logging.info(f"Successfully processed /generate_story/stream request. Node timings: {response['timings']}")
+            events.put_nowait({"event": "complete", **response})
+        except Exception as e:
+            logging.error(f"Error during streamed story generation: {e}", exc_info=True)
+            events.put_nowait({"event": "error", "status": "error", "message": f"An error occurred during story generation: {str(e)}"})
+        finally:
+            events.put_nowait(None)
+
+    async def event_lines():
+        finisher = asyncio.ensure_future(finish())
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            yield json.dumps(event) + "\n"
+        await finisher
+
+    return StreamingResponse(event_lines(), media_type="application/x-ndjson")
+
+@router.post("/jobs/generate_story", status_code=202)
+def submit_story_job(request: StoryGenerationRequest):
+    """Queues a story generation and returns its job id straight away.
+
+    The story is generated whether or not the client stays connected. Poll
+    `GET /jobs/{job_id}` for progress and fetch the story from `GET /jobs/{job_id}/result`.
+    """
+    logging.info(f"Received request for /jobs/generate_story endpoint with premise: {request.premise}")
+    job_queue = start_job_queue()
+    try:
+        job = job_queue.submit(request.model_dump(), dedupe_key=_story_key(request))
+    except JobQueueFullError as e:
+        return _overloaded_response(e)
+    return {"status": "accepted", "job_id": job.job_id, "position": job_queue.position(job)}
+
+@router.get("/jobs/stats")
+def story_job_stats():
+    return start_job_queue().stats()
+
+@router.get("/jobs/{job_id}")
+def get_story_job(job_id: str):
+    """Returns the status of a job and the story sections finished so far."""
+    job_queue = start_job_queue()
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Story job not found.")
+    progress = job.progress()
+    if job.status == "queued":
+        progress["position"] = job_queue.position(job)
+    return progress
+
+@router.get("/jobs/{job_id}/result")
+def get_story_job_result(job_id: str):
+    """Returns the finished story, in the same shape as the /generate_story response.
+
+    Answers 202 with the job status while the job is still queued or running.
+    """
+    job = start_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Story job not found.")
+    if job.status == "error":
+        return {"status": "error", "message": f"An error occurred during story generation: {job.error}"}
+    if job.status != "complete":
+        return JSONResponse(status_code=202, content=job.progress())
+    return job.result
+
+@router.post("/generate_story/batch")
+def generate_story_batch(request: BatchStoryGenerationRequest):
+    """Starts (or resumes) a batch job and returns its id straight away.
+
+    Submitting the same rows again returns the same job id and only generates the rows
+    that have not completed yet.
+    """
+    logging.info(f"Received request for /generate_story/batch endpoint with {len(request.requests)} rows.")
+    job = BatchJob.create([row.model_dump() for row in request.requests])
+    started = start_job_in_background(job)
+    return {"status": "accepted", "job_id": job.job_id, "started": started, "progress": job.status()}
+
+@router.get("/generate_story/batch/{job_id}")
+def get_story_batch(job_id: str):
+    job = BatchJob(job_id)
+    if not job_id.isalnum() or not job.exists():
+        raise HTTPException(status_code=404, detail="Batch job not found.")
+    return job.status()
+
+@router.get("/generate_story/batch/{job_id}/results")
+def get_story_batch_results(job_id: str):
+    """Returns the results written so far, one JSON object per line."""
+    job = BatchJob(job_id)
+    if not job_id.isalnum() or not job.exists():
+        raise HTTPException(status_code=404, detail="Batch job not found.")
+    if not os.path.exists(job.results_path):
+        return StreamingResponse(iter(()), media_type="application/x-ndjson")
+    return FileResponse(job.results_path, media_type="application/x-ndjson")
+
+@router.get("/stories")
+def list_stories(limit: int = 50, offset: int = 0, title: Optional[str] = None, request_hash: Optional[str] = None):
+    """Lists stored stories, newest first, optionally filtered by title text or request hash."""
+    return {"stories": get_artifact_store().list(min(limit, 500), offset, title, request_hash)}
+
+def _story_file_response(story_id: str, kind: str, media_type: str, http_request: Request):
+    """Streams a stored story file from disk, passing gzipped files through to clients that accept gzip."""
+    located = get_artifact_store().locate(story_id, kind)
+    if located is None:
+        raise HTTPException(status_code=404, detail="Story not found.")
+    path, gzipped = located
+    if not gzipped:
+        return FileResponse(path, media_type=media_type)
+    # The body depends on Accept-Encoding, so caches must not serve one answer for both
+    if "gzip" in http_request.headers.get("accept-encoding", ""):
+        return FileResponse(path, media_type=media_type, headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"})
+    return StreamingResponse(iter_decompressed(path), media_type=media_type, headers={"Vary": "Accept-Encoding"})
+
+@router.get("/stories/{story_id}")
+def get_story(story_id: str, http_request: Request):
+    """Returns the final output JSON of a stored story."""
+    return _story_file_response(story_id, "output", "application/json", http_request)
+
+@router.get("/stories/{story_id}/markdown")
+def get_story_markdown(story_id: str, http_request: Request):
+    """Returns the rendered markdown of a stored story."""
+    return _story_file_response(story_id, "markdown", "text/markdown; charset=utf-8", http_request)
+
+@router.get("/llm_cache/stats")
+def llm_cache_stats():
+    cache = get_llm_cache()
+    return {"enabled": cache is not None, "stats": cache.stats() if cache else {}}
+
+@router.get("/llm_router/stats")
+def llm_router_stats():
+    """Returns the EWMA latency, error rate and availability of each routed LLM backend."""
+    if get_llm_provider() != "ROUTER":
+        return {"enabled": False, "backends": {}}
+    from backend.utils.llm_router import get_backend_stats
+    return {"enabled": True, "backends": get_backend_stats()}
+
+@router.get("/sessions/stats")
+def session_stats():
+    return get_session_store().stats()
+
+@router.delete("/sessions/{session_id}")
+def end_session(session_id: str):
+    get_session_store().delete(session_id)
+    speculator = get_speculator()
+    if speculator is not None:
+        speculator.discard(session_id)
+    return {"status": "deleted", "session_id": session_id}
+
+def _component_samples():
+    """Reads the routing, cache, executor and session counters as Prometheus samples."""
+    routing = get_routing_stats()
+    yield ("ideaweaver_converse_turns_total", "counter", "/converse turns by route.", {"route": "fast_path"}, routing["fast_path_hits"])
+    yield ("ideaweaver_converse_turns_total", "counter", "/converse turns by route.", {"route": "llm"}, routing["llm_fallbacks"])
+
+    cache = get_llm_cache()
+    if cache is not None:
+        cache_stats = cache.stats()
+        for result in ("memory_hits", "disk_hits", "misses", "bypassed"):
+            yield ("ideaweaver_llm_cache_lookups_total", "counter", "LLM response cache lookups by result.", {"result": result}, cache_stats[result])
+        yield ("ideaweaver_llm_cache_entries", "gauge", "Responses held by each cache tier.", {"tier": "memory"}, cache_stats["memory_entries"])
+        if "disk_entries" in cache_stats:
+            yield ("ideaweaver_llm_cache_entries", "gauge", "Responses held by each cache tier.", {"tier": "disk"}, cache_stats["disk_entries"])
+
+    if get_llm_provider() == "ROUTER":
+        from backend.utils.llm_router import get_backend_stats
+        for backend, backend_stats in get_backend_stats().items():
+            labels = {"backend": backend}
+            if backend_stats["ewma_latency_s"] is not None:
+                yield ("ideaweaver_llm_backend_latency_ewma_seconds", "gauge", "EWMA latency of each routed LLM backend.", labels, backend_stats["ewma_latency_s"])
+            yield ("ideaweaver_llm_backend_error_rate", "gauge", "EWMA error rate of each routed LLM backend.", labels, backend_stats["error_rate"])
+            yield ("ideaweaver_llm_backend_available", "gauge", "1 unless the backend is cooling down after failures.", labels, int(backend_stats["available"]))
+
+    executor_stats = get_llm_executor().stats()
+    labels = {"provider": executor_stats["provider"]}
+    yield ("ideaweaver_llm_requests_in_flight", "gauge", "LLM-backed requests running.", labels, executor_stats["in_flight"])
+    yield ("ideaweaver_llm_requests_queued", "gauge", "LLM-backed requests waiting for a worker.", labels, executor_stats["queued"])
+    yield ("ideaweaver_llm_requests_rejected_total", "counter", "LLM-backed requests rejected with 429.", labels, executor_stats["rejected"])
+    yield ("ideaweaver_llm_calls_in_flight", "gauge", "LLM provider calls running.", labels, executor_stats["calls_running"])
+    yield ("ideaweaver_llm_calls_waiting", "gauge", "LLM provider calls waiting for a call slot.", labels, executor_stats["calls_waiting"])
+
+    job_stats = start_job_queue().stats()
+    yield ("ideaweaver_story_jobs", "gauge", "Story jobs by state.", {"state": "queued"}, job_stats["queued"])
+    yield ("ideaweaver_story_jobs", "gauge", "Story jobs by state.", {"state": "running"}, job_stats["running"])
+    yield ("ideaweaver_story_jobs_rejected_total", "counter", "Story jobs rejected with 429.", {}, job_stats["rejected"])
+
+    yield ("ideaweaver_sessions", "gauge", "Conversation sessions held in memory.", {}, get_session_store().stats()["memory_sessions"])
+
+    speculator = get_speculator()
+    if speculator is not None:
+        yield ("ideaweaver_speculative_nodes_pending", "gauge", "Speculative story stages waiting to be reused.", {}, speculator.stats()["nodes"])
+
+    tracer = get_tracer()
+    if tracer is not None:
+        trace_stats = tracer.stats()
+        for outcome in ("exported", "dropped"):
+            yield ("ideaweaver_trace_spans_total", "counter", "Trace spans by export outcome.", {"outcome": outcome}, trace_stats[outcome])
+        for sampled in ("sampled", "unsampled"):
+            yield ("ideaweaver_traces_total", "counter", "Traces started, by sampling decision.", {"decision": sampled}, trace_stats[f"{sampled}_traces"])
+        yield ("ideaweaver_trace_spans_queued", "gauge", "Trace spans waiting for export.", {}, trace_stats["queued"])
+
+    health = get_health_prober().status()
+    yield ("ideaweaver_ready", "gauge", "1 if the last health probe found a working LLM backend.", {}, int(health["ready"]))
+    for backend, probe in health["backends"].items():
+        yield ("ideaweaver_llm_backend_up", "gauge", "1 if the last health probe of the LLM backend succeeded.", {"backend": backend}, int(probe["ok"]))
+        if "model_loaded" in probe:
+            yield ("ideaweaver_ollama_model_loaded", "gauge", "1 if the Ollama model was loaded at the last health probe.", {"backend": backend}, int(probe["model_loaded"]))
+        if probe.get("size_bytes") is not None:
+            yield ("ideaweaver_ollama_model_memory_bytes", "gauge", "Memory held by the loaded Ollama model.", {"backend": backend}, probe["size_bytes"])
+
+@router.get("/metrics")
+def metrics():
+    return PlainTextResponse(get_metrics_registry().render(_component_samples()), media_type="text/plain; version=0.0.4")
+
+@router.get("/healthz")
+def healthz():
+    """Liveness: answers as long as the API process is serving requests."""
+    return {"status": "ok", "uptime_s": round(time.time() - _started_at, 1)}
+
+@router.get("/readyz")
+def readyz():
+    """Readiness: the cached result of the last LLM backend probe (reachability, model load
+    state and memory), plus the Ollama warm-keeper's history when it runs.
+
+    Returns 503 while no LLM backend can serve requests or the last probe is stale.
+    """
+    health = get_health_prober().status()
+    keeper = get_ollama_keeper()
+    if keeper is not None:
+        health["ollama_keeper"] = keeper.stats()
+    return JSONResponse(status_code=200 if health["ready"] else 503, content=health)
+
 @router.get("/")
 def read_root():
     logging.info("Received request for / endpoint.")
@@ -0,0 +1,62 @@
+# batch_cli.py
+# Command-line entry point for batch story generation from a CSV or JSONL file of premises.
+#
+# Usage: python -m backend.batch_cli premises.jsonl [--workers 2] [--output-dir outputs/batches]
+#
+# Each row needs the StoryGenerationRequest fields (premise, age_group, title_choice,
+# num_characters, name_choice, ...). In CSV files, character_names_input is a comma- or
+# semicolon-separated list. Running the same file again resumes the job.
+
+import argparse
+import csv
+import json
+import logging
+import re
+import sys
+
+from pydantic import ValidationError
+from backend.api import StoryGenerationRequest
+from backend.utils.batch_runner import BATCH_ROOT, BatchJob
+from backend.utils.startup_checker import check_env_vars
+
+
+def read_rows(path: str) -> list:
+    """Reads request rows from a .csv or .jsonl file."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = []
+            for row in csv.DictReader(f):
+                row = {key: value for key, value in row.items() if value not in (None, "")}
+                if "character_names_input" in row:
+                    row["character_names_input"] = [name.strip() for name in re.split(r"[,;]", row["character_names_input"]) if name.strip()]
+                rows.append(row)
+            return rows
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate story concepts for every row of a CSV or JSONL file.")
+    parser.add_argument("path", help="The .csv or .jsonl file of story requests.")
+    parser.add_argument("--workers", type=int, default=None, help="Rows generated at once (default: BATCH_MAX_WORKERS or 2).")
+    parser.add_argument("--output-dir", default=BATCH_ROOT, help="Directory that holds batch jobs.")
+    args = parser.parse_args()
+
+    if not check_env_vars():
+        sys.exit(1)
+
+    requests = []
+    for line_number, row in enumerate(read_rows(args.path), start=1):
+        try:
+            requests.append(StoryGenerationRequest(**row).model_dump())
+        except ValidationError as e:
+            logging.error(f"Row {line_number} is not a valid story request: {e}")
+            sys.exit(1)
+
+    job = BatchJob.create(requests, root=args.output_dir)
+    logging.info(f"Batch job {job.job_id}: writing results to {job.results_path}")
+    job.run(max_workers=args.workers)
+    print(json.dumps(job.status(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
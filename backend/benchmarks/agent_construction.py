@@ -0,0 +1,61 @@
+# benchmarks/agent_construction.py
+# Micro-benchmark of the per-request cost of building agents: the old path (every
+# factory called on every request) against per-request copies from the agent registry.
+#
+# Usage: python -m backend.benchmarks.agent_construction [--requests 200]
+
+import argparse
+import importlib
+import json
+import time
+
+from crewai import LLM
+from backend.utils.agent_registry import AGENT_FACTORIES, AgentRegistry
+
+# The agents one /converse turn and one /generate_story request used to build
+CONVERSE_AGENTS = ["idea_weaver_master"]
+STORY_AGENTS = ["world_builder", "character_creator", "narrative_nudger", "summary_writer",
+                "name_generator_agent", "title_generator_agent"]
+
+
+def _per_request_us(build_request, requests: int) -> float:
+    build_request()  # Exclude first-use imports from the measurement
+    start = time.perf_counter()
+    for _ in range(requests):
+        build_request()
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def run_benchmark(requests: int) -> dict:
+    """Measures the average agent construction overhead per request, in microseconds."""
+    # Building agents never calls the model, so no server needs to be running
+    llm = LLM(model="ollama/benchmark", base_url="http://localhost:11434")
+    registry = AgentRegistry(llm)
+
+    factories = {
+        name: getattr(importlib.import_module(module_name), factory_name)
+        for name, (module_name, factory_name) in AGENT_FACTORIES.items()
+    }
+
+    results = {}
+    for label, names in (("converse", CONVERSE_AGENTS), ("generate_story", STORY_AGENTS)):
+        before = _per_request_us(lambda: [factories[name](llm) for name in names], requests)
+        after = _per_request_us(lambda: [registry.acquire(name) for name in names], requests)
+        results[label] = {
+            "agents_per_request": len(names),
+            "rebuild_us": round(before, 1),
+            "registry_us": round(after, 1),
+            "speedup": round(before / after, 1) if after else None,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request agent construction overhead.")
+    parser.add_argument("--requests", type=int, default=200, help="Number of simulated requests per measurement.")
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.requests), indent=2))
+
+
+if __name__ == "__main__":
+    main()
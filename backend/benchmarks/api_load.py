@@ -0,0 +1,269 @@
+# benchmarks/api_load.py
+# End-to-end benchmark of the API against the local fake LLM (LLM_PROVIDER=FAKE). It
+# drives complete /converse conversations and /generate_story requests in-process at
+# several concurrency levels and reports throughput, latency percentiles, the per-stage
+# breakdown and memory as JSON, so two releases can be diffed.
+#
+# Usage: python -m backend.benchmarks.api_load [--concurrency 1,4,8] [--requests 16]
+#            [--latency-ms 50] [--tokens-per-second 0] [--failure-rate 0] [--profile dev|prod]
+#            [--output result.json]
+# Needs httpx: pip install -e ".[bench]"
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# A complete conversation: the greeting, one unclear answer that needs the master LLM,
+# then a well-formed answer for every step
+CONVERSATION = [
+    "",
+    "I don't know",
+    "A lighthouse keeper who can hear the thoughts of ships",
+    "Teens",
+    "Generate for me",
+    "2",
+    "Provide my own",
+    "Mara, Tobin",
+]
+
+# Each story request gets its own premise (see run_story), so concurrent iterations are not
+# coalesced into one generation
+STORY_REQUEST = {
+    "premise": "A lighthouse keeper who can hear the thoughts of ships",
+    "age_group": "Teens",
+    "title_choice": "Generate for me",
+    "title_input": "",
+    "num_characters": 2,
+    "name_choice": "Generate for me",
+    "character_names_input": None,
+}
+
+
+_story_numbers = itertools.count(1)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Returns the nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Returns the mean and p50/p95/p99 of a list of durations, in milliseconds."""
+    return {
+        "mean_ms": round(sum(values) / len(values) * 1000, 2) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+    }
+
+
+def configure_environment(args) -> str:
+    """Points the backend at the fake LLM before any backend module is imported.
+
+    Returns:
+        str: The temporary directory that holds everything the run stores.
+    """
+    state_dir = tempfile.mkdtemp(prefix="ideaweaver-bench-")
+    # Generated stories and stored state stay out of the working tree and are not shared between runs
+    os.environ["MARKDOWN_OUTPUT_DIR"] = os.path.join(state_dir, "outputs")
+    os.environ["ARTIFACT_STORE_PATH"] = os.path.join(state_dir, "stories")
+    os.environ["SESSION_STORE_PATH"] = os.path.join(state_dir, "sessions.sqlite3")
+    os.environ["JOB_STORE_PATH"] = os.path.join(state_dir, "jobs.sqlite3")
+    os.environ["LLM_CACHE_PATH"] = os.path.join(state_dir, "llm_cache.sqlite3")
+    os.environ["LLM_PROVIDER"] = "FAKE"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["FAKE_LLM_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    os.environ["FAKE_LLM_FAILURE_RATE"] = str(args.failure_rate)
+    os.environ["FAKE_LLM_SEED"] = str(args.seed)
+    os.environ["IDEA_WEAVER_PROFILE"] = args.profile
+    # Measure the orchestration, not cache hits, unless asked otherwise
+    os.environ.setdefault("LLM_CACHE_ENABLED", "true" if args.cache else "false")
+    # Admit every benchmark request so latency includes queueing instead of 429s
+    os.environ.setdefault("LLM_MAX_QUEUE_DEPTH", str(max(args.concurrency) * 2))
+    return state_dir
+
+
+def build_app():
+    """Builds the FastAPI app without the .env startup checks."""
+    from fastapi import FastAPI
+    from backend.api import router
+    from backend.utils.runtime_profile import configure_logging
+
+    configure_logging()
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+async def run_conversation(client) -> Dict[str, Any]:
+    """Plays CONVERSATION against /converse and returns the per-turn latencies and routes."""
+    session_id = None
+    turns, routes, statuses = [], Counter(), Counter()
+    for user_input in CONVERSATION:
+        start = time.perf_counter()
+        response = await client.post("/converse", json={"session_id": session_id, "user_input": user_input})
+        turns.append(time.perf_counter() - start)
+        body = response.json() if response.status_code == 200 else {}
+        statuses[str(response.status_code) if response.status_code != 200 else body.get("status", "unknown")] += 1
+        routes[(body.get("routing") or {}).get("route", "none")] += 1
+        session_id = body.get("session_id") or session_id
+    return {"turns": turns, "routes": routes, "statuses": statuses}
+
+
+async def run_story(client, generation_mode: str) -> Dict[str, Any]:
+    """Sends one /generate_story request and returns its latency, status and node timings."""
+    premise = f"{STORY_REQUEST['premise']} (story {next(_story_numbers)})"
+    start = time.perf_counter()
+    response = await client.post("/generate_story", json={**STORY_REQUEST, "premise": premise, "generation_mode": generation_mode})
+    elapsed = time.perf_counter() - start
+    body = response.json() if response.status_code == 200 else {}
+    status = str(response.status_code) if response.status_code != 200 else body.get("status", "unknown")
+    return {"elapsed": elapsed, "status": status, "timings": body.get("timings") or {}}
+
+
+async def run_level(client, scenario: str, concurrency: int, requests: int) -> Dict[str, Any]:
+    """Runs `requests` iterations of a scenario with at most `concurrency` in flight."""
+    from backend.utils.metrics import get_metrics_registry
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            if scenario == "converse":
+                return await run_conversation(client)
+            return await run_story(client, generation_mode=scenario.split(":", 1)[1])
+
+    coalesced_before = get_metrics_registry().counter_values("ideaweaver_coalesced_requests_total")
+    tracemalloc.start()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(requests)))
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    coalesced_after = get_metrics_registry().counter_values("ideaweaver_coalesced_requests_total")
+
+    report: Dict[str, Any] = {"scenario": scenario, "concurrency": concurrency, "iterations": requests,
+                              "wall_s": round(wall, 3), "peak_traced_mb": round(peak / 2**20, 2)}
+    # Requests that attached to an identical one in flight (ideaweaver_coalesced_requests_total) did no work
+    # of their own; non-zero counts mean the throughput figures overstate what the backend did
+    report["coalesced_requests"] = {dict(labels)["scope"]: int(value - coalesced_before.get(labels, 0))
+                                    for labels, value in coalesced_after.items() if value > coalesced_before.get(labels, 0)}
+    if scenario == "converse":
+        turns = [t for result in results for t in result["turns"]]
+        report["conversations_per_s"] = round(requests / wall, 2)
+        report["turns_per_s"] = round(len(turns) / wall, 2)
+        report["conversation_latency"] = summarize([sum(result["turns"]) for result in results])
+        report["turn_latency"] = summarize(turns)
+        report["routes"] = dict(sum((result["routes"] for result in results), Counter()))
+        report["statuses"] = dict(sum((result["statuses"] for result in results), Counter()))
+    else:
+        stages = defaultdict(list)
+        for result in results:
+            for stage, seconds in result["timings"].items():
+                stages[stage].append(seconds)
+        report["requests_per_s"] = round(requests / wall, 2)
+        report["latency"] = summarize([result["elapsed"] for result in results])
+        report["stages"] = {stage: summarize(values) for stage, values in sorted(stages.items())}
+        report["statuses"] = dict(Counter(result["status"] for result in results))
+    return report
+
+
+def max_rss_mb() -> Optional[float]:
+    """Returns the peak resident memory of the process in MB, or None where it cannot be read."""
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor, 1)
+
+
+async def run_benchmark(args) -> Dict[str, Any]:
+    import httpx
+    from backend.api import warm_up
+    from backend.prompts.registry import get_prompt_registry
+    from backend.utils.llm_cache import get_llm_cache
+    from backend.utils.llm_executor import get_llm_executor
+
+    app = build_app()
+    warm_up()  # Exclude the one-off LLM, crewai and agent loading from the measurements
+    scenarios = ["converse"] + [f"generate_story:{mode}" for mode in args.modes]
+    runs = []
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=None) as client:
+        for scenario in scenarios:
+            await run_level(client, scenario, concurrency=1, requests=1)  # Untimed first-use pass
+            for concurrency in args.concurrency:
+                runs.append(await run_level(client, scenario, concurrency, args.requests))
+                print(f"{scenario} @ {concurrency}: done in {runs[-1]['wall_s']}s", file=sys.stderr)
+
+    cache = get_llm_cache()
+    return {
+        "config": {
+            "latency_ms": args.latency_ms,
+            "tokens_per_second": args.tokens_per_second,
+            "failure_rate": args.failure_rate,
+            "seed": args.seed,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "cache": args.cache,
+            "profile": args.profile,
+            "python": platform.python_version(),
+            # Results are only comparable between runs with the same prompt templates
+            "prompts": {name: info["key"] for name, info in get_prompt_registry().manifest().items()},
+        },
+        "runs": runs,
+        "executor": get_llm_executor().stats(),
+        "llm_cache": cache.stats() if cache else None,
+        "max_rss_mb": max_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API end to end against the fake LLM.")
+    parser.add_argument("--concurrency", type=lambda s: [int(n) for n in s.split(",")], default=[1, 4, 8],
+                        help="Comma-separated concurrency levels.")
+    parser.add_argument("--requests", type=int, default=16, help="Conversations or stories per concurrency level.")
+    parser.add_argument("--modes", type=lambda s: s.split(","), default=["full", "compact"],
+                        help="Comma-separated story generation modes to benchmark.")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Fixed latency of each fake LLM call.")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Fake LLM token rate (0 = instant).")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of fake LLM calls that fail.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cache", action="store_true", help="Keep the LLM response cache enabled.")
+    parser.add_argument("--profile", choices=["dev", "prod"], default="dev",
+                        help="Runtime profile (IDEA_WEAVER_PROFILE): agent verbosity and log payload sizes.")
+    parser.add_argument("--output", help="Also write the JSON report to this file.")
+    args = parser.parse_args()
+
+    state_dir = configure_environment(args)
+    try:
+        report = asyncio.run(run_benchmark(args))
+    finally:
+        shutil.rmtree(state_dir, ignore_errors=True)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+# benchmarks/output_recovery.py
+# Compares the single-pass output recovery (utils/output_recovery.py) with the cleanup
+# chains it replaced, on a corpus of malformed outputs seen from the master agent and the
+# name generator. Reports, for each parser, how many outputs were recovered correctly and
+# the average time per output.
+#
+# Usage: python -m backend.benchmarks.output_recovery [--repeat 2000] [--scale 1]
+
+import argparse
+import ast
+import json
+import re
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from backend.utils.output_recovery import recover_json
+
+_MESSAGE = ("Great! Now, who is the target audience for this story? Please choose one:\n"
+            "- Kids (ages 5–12)\n- Teens (ages 13–18)\n- Adults (ages 19–59)\n- Seniors (60+)")
+_RESPONSE = {"status": "continue", "message": _MESSAGE, "data": {"premise": "A wizard living in a modern city"},
+             "last_question": "age_group"}
+_NAMES = ["Elara Vance", "Kaelen O'Neil", "Mira"]
+
+
+def _raw_newlines(response: Dict[str, Any]) -> str:
+    return json.dumps(response, ensure_ascii=False).replace("\\n", "\n")
+
+
+# (label, raw output, expected value)
+MASTER_CORPUS: List[Tuple[str, str, Any]] = [
+    ("clean", json.dumps(_RESPONSE), _RESPONSE),
+    ("fenced", f"```json\n{json.dumps(_RESPONSE, indent=2)}\n```", _RESPONSE),
+    ("raw newlines in strings", _raw_newlines(_RESPONSE), _RESPONSE),
+    ("fenced with raw newlines", f"```json\n{_raw_newlines(_RESPONSE)}\n```", _RESPONSE),
+    ("doubled braces", "{" + json.dumps(_RESPONSE) + "}", _RESPONSE),
+    ("python dict", repr(_RESPONSE), _RESPONSE),
+    ("prose before and after", f"Here is the tool output:\n{json.dumps(_RESPONSE)}\nLet me know if you need more.", _RESPONSE),
+    ("thought prefix", f"Thought: I used the tool and got {{the result}}.\n{json.dumps(_RESPONSE)}", _RESPONSE),
+    ("trailing comma", json.dumps(_RESPONSE)[:-1] + ",}", _RESPONSE),
+    ("unescaped inner quotes", '{"status": "continue", "message": "Try "A wizard in a city" as a premise.", "data": {}}',
+     {"status": "continue", "message": 'Try "A wizard in a city" as a premise.', "data": {}}),
+    ("python literals", '{"status": "complete", "message": "Done.", "data": {"title_input": None, "ok": True}}',
+     {"status": "complete", "message": "Done.", "data": {"title_input": None, "ok": True}}),
+]
+
+NAMES_CORPUS: List[Tuple[str, str, Any]] = [
+    ("python list", repr(_NAMES), _NAMES),
+    ("json list", json.dumps(_NAMES), _NAMES),
+    ("fenced", f"```python\n{json.dumps(_NAMES)}\n```", _NAMES),
+    ("prose before", f"Here are the names: {json.dumps(_NAMES)}", _NAMES),
+    ("apostrophe in single quotes", "['Elara Vance', 'Kaelen O'Neil', 'Mira']", _NAMES),
+    ("trailing comma", "['Elara Vance', 'Kaelen O\\'Neil', 'Mira',]", _NAMES),
+    ("plain comma separated", "Elara Vance, Kaelen O'Neil, Mira", _NAMES),
+]
+
+
+def legacy_master_parse(raw: str):
+    """The cleanup chain master_agent_input_task used before utils/output_recovery."""
+    def escape_unescaped_newlines(s: str) -> str:
+        fixed = []
+        in_string = False
+        prev_char = ''
+        for c in s:
+            if c == '"' and prev_char != '\\':
+                in_string = not in_string
+            if c == '\n' and in_string:
+                fixed.append('\\n')
+            else:
+                fixed.append(c)
+            prev_char = c
+        return ''.join(fixed)
+
+    processed_raw = raw.strip()
+    try:
+        return json.loads(processed_raw)
+    except json.JSONDecodeError:
+        json_match = re.search(r'```json\s*(.*?)\s*```', processed_raw, re.DOTALL)
+        if json_match:
+            processed_raw = json_match.group(1).strip()
+        processed_raw = escape_unescaped_newlines(processed_raw)
+        if processed_raw.startswith("{{") and processed_raw.endswith("}}"):
+            processed_raw = processed_raw[1:-1].strip()
+        try:
+            return json.loads(processed_raw)
+        except json.JSONDecodeError:
+            try:
+                return ast.literal_eval(processed_raw)
+            except (ValueError, SyntaxError):
+                return None
+
+
+def legacy_names_parse(raw: str, num_characters: int):
+    """The parsing parse_character_names used before utils/output_recovery."""
+    try:
+        name_list = ast.literal_eval(raw)
+        if isinstance(name_list, list) and len(name_list) == num_characters and all(isinstance(n, str) for n in name_list):
+            return name_list
+    except (SyntaxError, ValueError, TypeError):
+        cleaned_result = raw.strip("[]'\n ").replace("'", "").replace('"', '')
+        name_list = [name.strip() for name in cleaned_result.split(',')]
+        if len(name_list) >= num_characters:
+            return name_list[:num_characters]
+    return [f"Character {i+1}" for i in range(num_characters)]
+
+
+def _measure(parse: Callable[[str], Any], corpus: List[Tuple[str, str, Any]], repeat: int) -> Dict[str, Any]:
+    recovered = []
+    for label, raw, expected in corpus:
+        try:
+            ok = parse(raw) == expected
+        except Exception:
+            ok = False
+        if ok:
+            recovered.append(label)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, raw, _ in corpus:
+            try:
+                parse(raw)
+            except Exception:
+                pass
+    elapsed = time.perf_counter() - start
+    return {
+        "recovered": len(recovered),
+        "total": len(corpus),
+        "failed": [label for label, _, _ in corpus if label not in recovered],
+        "us_per_output": round(elapsed / (repeat * len(corpus)) * 1e6, 2),
+    }
+
+
+def _scale_corpus(corpus, scale: int):
+    """Repeats the message text so longer responses can be compared."""
+    if scale <= 1:
+        return corpus
+    return [(label, raw.replace("Great!", "Great! " * scale), expected if not isinstance(expected, dict) or "message" not in expected
+             else {**expected, "message": expected["message"].replace("Great!", "Great! " * scale)})
+            for label, raw, expected in corpus]
+
+
+def run_benchmark(repeat: int, scale: int = 1) -> Dict[str, Any]:
+    from backend.agents.character_name_generator import parse_character_names
+
+    master_corpus = _scale_corpus(MASTER_CORPUS, scale)
+    return {
+        "master_agent": {
+            "legacy_chain": _measure(legacy_master_parse, master_corpus, repeat),
+            "recover_json": _measure(recover_json, master_corpus, repeat),
+        },
+        "character_names": {
+            "legacy_chain": _measure(lambda raw: legacy_names_parse(raw, len(_NAMES)), NAMES_CORPUS, repeat),
+            "parse_character_names": _measure(lambda raw: parse_character_names(raw, len(_NAMES)), NAMES_CORPUS, repeat),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM output recovery against the old cleanup chains.")
+    parser.add_argument("--repeat", type=int, default=2000, help="Passes over the corpus for the timing.")
+    parser.add_argument("--scale", type=int, default=1, help="Repeat factor for the message text, to test long outputs.")
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.repeat, args.scale), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,60 @@
+import argparse
+import os
 from fastapi import FastAPI
-from backend.api import router
+from backend.api import router, start_job_queue, warm_up
+from backend.utils.health import get_health_prober
+from backend.utils.ollama_keeper import get_ollama_keeper
+from backend.utils.runtime_profile import configure_logging
 from backend.utils.startup_checker import run_backend_startup_checks
 
-# Run backend startup checks
-run_backend_startup_checks()
 
-app = FastAPI()
+def create_app() -> FastAPI:
+    """Runs the backend startup checks and builds the FastAPI app.
 
-app.include_router(router)
+    Set IDEA_WEAVER_WARMUP=true to load the LLM and build the agents at startup
+    instead of on the first request.
+    """
+    # Run backend startup checks
+    run_backend_startup_checks()
+    # After the checks, so IDEA_WEAVER_PROFILE and LOG_LEVEL can come from .env
+    configure_logging()
+
+    app = FastAPI()
+    app.include_router(router)
+    # Starts the job workers now, so jobs left unfinished by the last run resume without waiting for a request
+    app.router.add_event_handler("startup", start_job_queue)
+    # Starts probing the LLM backends, so /readyz answers from a cached result
+    app.router.add_event_handler("startup", get_health_prober)
+    # Preloads the Ollama models, so the first request does not wait for them to load
+    app.router.add_event_handler("startup", get_ollama_keeper)
+    if os.getenv("IDEA_WEAVER_WARMUP", "false").lower() == "true":
+        app.router.add_event_handler("startup", warm_up)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IdeaWeaver backend.")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print an import-time and startup-phase breakdown instead of serving.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        from backend.utils.startup_profiler import print_startup_profile
+        from backend.utils.llm_loader import get_llm
+        print_startup_profile([
+            ("startup checks", run_backend_startup_checks),
+            ("load LLM", get_llm),
+            ("warm-up (agents + tools)", warm_up),
+        ])
+        return
+
+    import uvicorn
+    uvicorn.run("backend.main:app", host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
+else:
+    app = create_app()
@@ -0,0 +1,17 @@
+COMPACT_STORY_PROMPT = """Develop a complete story concept for the following premise in a single response.
+
+**Premise**: "{premise}"
+**Target Audience**: {age_group}
+**Title**: {title_instruction}
+**Characters**: {names_instruction}
+
+Produce all of the following, keeping every part consistent with the others and appropriate for the target audience:
+1. **title**: A short, catchy title (max 8 words).
+2. **character_names**: A list of exactly {num_characters} character names.
+3. **world_description**: A vivid description of the setting, culture and central conflict, in Markdown starting with a `## ` heading.
+4. **character_profiles**: For each character, a `## [Character Name]` section with their role in the story, personality traits, motivation and character arc.
+5. **narrative_twist**: A single unexpected but fitting twist that adds tension or surprise.
+6. **story_summary**: A single engaging paragraph under 100 words.
+
+**Output Format**: Your output MUST be a single JSON object with exactly these keys: "title", "character_names", "world_description", "character_profiles", "narrative_twist", "story_summary". Do not include any other text or markdown fences.
+"""
@@ -0,0 +1,179 @@
+# prompts/registry.py
+# This module loads every prompt template once, checks it, and renders it without
+# re-parsing. Each template carries a version and a hash of its text, which response
+# caches and benchmarks use as a stable key, and exposes its static prefix (the text
+# before the first placeholder), which providers with prompt prefix caching can reuse
+# across requests.
+
+import hashlib
+import importlib
+import string
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Template name -> (module, constant, version). Bump the version when a change to a
+# template (or to how its answer is parsed) should invalidate its cached responses.
+PROMPT_TEMPLATES: Dict[str, Tuple[str, str, str]] = {
+    "title_generator": ("backend.prompts.title_generator_prompt", "TITLE_GENERATOR_PROMPT", "1"),
+    "character_name_generator": ("backend.prompts.character_name_generator_prompt", "CHARACTER_NAME_GENERATOR_PROMPT", "1"),
+    "compact_story": ("backend.prompts.compact_story_prompt", "COMPACT_STORY_PROMPT", "1"),
+    "world_builder": ("backend.prompts.world_builder_prompt", "WORLD_BUILDER_PROMPT", "1"),
+    "character_creator": ("backend.prompts.character_creator_prompt", "CHARACTER_CREATOR_PROMPT", "1"),
+    "narrative_nudger": ("backend.prompts.narrative_nudger_prompt", "NARRATIVE_NUDGER_PROMPT", "1"),
+    "story_summary": ("backend.prompts.story_summary_prompt", "STORY_SUMMARY_PROMPT", "1"),
+    "master_agent_initial": ("backend.prompts.master_agent_initial_prompt", "MASTER_AGENT_INITIAL_PROMPT", "1"),
+    "master_agent_follow_up": ("backend.prompts.master_agent_follow_up_prompt", "MASTER_AGENT_FOLLOW_UP_PROMPT", "1"),
+    "master_agent_first_task": ("backend.prompts.master_agent_task_prompts", "MASTER_AGENT_FIRST_TASK_PROMPT", "1"),
+    "master_agent_routing_task": ("backend.prompts.master_agent_task_prompts", "MASTER_AGENT_ROUTING_TASK_PROMPT", "1"),
+    "world_description_task": ("backend.prompts.story_task_prompts", "WORLD_DESCRIPTION_TASK_PROMPT", "1"),
+    "character_profiles_task": ("backend.prompts.story_task_prompts", "CHARACTER_PROFILES_TASK_PROMPT", "2"),
+    "narrative_twist_task": ("backend.prompts.story_task_prompts", "NARRATIVE_TWIST_TASK_PROMPT", "1"),
+    "story_summary_task": ("backend.prompts.story_task_prompts", "STORY_SUMMARY_TASK_PROMPT", "1"),
+}
+
+
+class PromptTemplate:
+    """A prompt template parsed once into literal text and placeholders.
+
+    Placeholders are plain names, as in "{premise}"; `{{` and `}}` are literal braces.
+
+    Args:
+        name (str): The template name.
+        text (str): The template text.
+        version (str): The template version, part of its key.
+
+    Raises:
+        ValueError: If a placeholder is positional or uses attribute or index access.
+    """
+
+    def __init__(self, name: str, text: str, version: str = "1"):
+        self.name = name
+        self.text = text
+        self.version = version
+        self.hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self.key = f"{name}@{version}:{self.hash[:12]}"
+
+        # (literal text, placeholder name or None, format spec or None) for each piece of the template
+        self._parts: List[Tuple[str, Optional[str], Optional[str]]] = []
+        for literal, field, spec, conversion in string.Formatter().parse(text):
+            if field is not None:
+                if not field.isidentifier():
+                    raise ValueError(f"Prompt '{name}' has an unsupported placeholder '{{{field}}}'; use a plain name.")
+                if conversion or (spec and "{" in spec):
+                    raise ValueError(f"Prompt '{name}' has an unsupported conversion or nested spec in '{{{field}}}'.")
+            self._parts.append((literal, field, spec or None))
+        self.fields = frozenset(field for _, field, _ in self._parts if field is not None)
+        # The text every rendering starts with, whatever the values
+        self.static_prefix = self._parts[0][0] if self._parts else ""
+        # The other literal pieces, which every rendering holds in this order, and the one it ends with
+        self._literals = [literal for literal, _, _ in self._parts[1:] if literal]
+        self._suffix = self._parts[-1][0] if self._parts and self._parts[-1][1] is None else ""
+        self.literal_chars = len(self.static_prefix) + sum(map(len, self._literals))
+
+    def render(self, **values: Any) -> str:
+        """Fills in the placeholders.
+
+        Args:
+            **values: A value for every placeholder; extra values are ignored.
+
+        Returns:
+            str: The rendered prompt, the same text `str.format` would produce.
+
+        Raises:
+            KeyError: If a placeholder has no value.
+        """
+        pieces = []
+        append = pieces.append
+        try:
+            for literal, field, spec in self._parts:
+                append(literal)
+                if field is not None:
+                    value = values[field]
+                    append(value if spec is None and type(value) is str else format(value, spec or ""))
+        except KeyError:
+            missing = sorted(self.fields - values.keys())
+            raise KeyError(f"Prompt '{self.name}' is missing values for: {', '.join(missing)}") from None
+        return "".join(pieces)
+
+    def matches(self, text: str) -> bool:
+        """Returns whether `text` can be a rendering of this template: it starts with the
+        static prefix and holds every other literal piece, in order."""
+        if not text.startswith(self.static_prefix) or not text.endswith(self._suffix):
+            return False
+        position = len(self.static_prefix)
+        for literal in self._literals:
+            position = text.find(literal, position)
+            if position == -1:
+                return False
+            position += len(literal)
+        return True
+
+    def describe(self) -> Dict[str, Any]:
+        """Returns the template's version, hash, placeholders and static prefix size."""
+        return {
+            "version": self.version,
+            "hash": self.hash,
+            "key": self.key,
+            "fields": sorted(self.fields),
+            "chars": len(self.text),
+            "static_prefix_chars": len(self.static_prefix),
+        }
+
+
+class PromptRegistry:
+    """Holds the prompt templates of PROMPT_TEMPLATES, loaded and checked together on first use."""
+
+    def __init__(self, templates: Dict[str, Tuple[str, str, str]] = PROMPT_TEMPLATES):
+        self._templates: Dict[str, PromptTemplate] = {}
+        for name, (module_name, constant, version) in templates.items():
+            text = getattr(importlib.import_module(module_name), constant)
+            self._templates[name] = PromptTemplate(name, text, version)
+        # Most literal text first, so `identify` finds the most specific template
+        self._by_literals = sorted((template for template in self._templates.values() if template.literal_chars),
+                                   key=lambda template: template.literal_chars, reverse=True)
+
+    def get(self, name: str) -> PromptTemplate:
+        """Returns the named template.
+
+        Raises:
+            KeyError: If the template name is unknown.
+        """
+        template = self._templates.get(name)
+        if template is None:
+            raise KeyError(f"Unknown prompt '{name}'. Known prompts: {', '.join(self._templates)}")
+        return template
+
+    def identify(self, text: str) -> Optional[PromptTemplate]:
+        """Returns the template a rendered prompt came from, recognized by all of its literal text, or None."""
+        for template in self._by_literals:
+            if template.matches(text):
+                return template
+        return None
+
+    def manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Returns `describe()` for every template, e.g. to record which prompts a benchmark ran with."""
+        return {name: template.describe() for name, template in self._templates.items()}
+
+
+_registry: Optional[PromptRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Returns the shared prompt registry, loading the templates on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = PromptRegistry()
+    return _registry
+
+
+def get_prompt(name: str) -> PromptTemplate:
+    """Returns the named template from the shared registry."""
+    return get_prompt_registry().get(name)
+
+
+def render_prompt(name: str, **values: Any) -> str:
+    """Renders the named template from the shared registry."""
+    return get_prompt_registry().get(name).render(**values)
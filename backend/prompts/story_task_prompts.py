@@ -0,0 +1,23 @@
+WORLD_DESCRIPTION_TASK_PROMPT = (
+    "Develop a detailed world description for a story with the premise: '{premise}'. "
+    "Target audience: {age_group}. Focus on unique elements, settings, and atmosphere."
+)
+
+CHARACTER_PROFILES_TASK_PROMPT = (
+    "Create character profiles for the story below, including archetypes, key traits, "
+    "and motivations for each. "
+    "Number of characters: {num_characters}. Premise: '{premise}'. "
+    "World description: {world_description}. "
+    "Use these names: {character_names}."
+)
+
+NARRATIVE_TWIST_TASK_PROMPT = (
+    "Develop a compelling narrative twist or plot point for the story based on the premise: '{premise}', "
+    "world description: {world_description}, and characters: {character_profiles}."
+)
+
+STORY_SUMMARY_TASK_PROMPT = (
+    "Write a concise and engaging summary of the story, incorporating the premise: '{premise}', "
+    "world description: {world_description}, characters: {character_profiles}, "
+    "and narrative twist: {narrative_twist}."
+)
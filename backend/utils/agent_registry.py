@@ -0,0 +1,94 @@
+# utils/agent_registry.py
+# This module builds each CrewAI agent (and its tools) once per LLM and hands out
+# cheap per-request copies, instead of rebuilding agents on every request.
+
+import importlib
+import logging
+import threading
+from typing import Dict, Tuple
+
+# Agent name -> (module, factory function). Factories are imported on first use so that
+# agent modules can themselves use the registry without circular imports.
+AGENT_FACTORIES: Dict[str, Tuple[str, str]] = {
+    "idea_weaver_master": ("backend.agents.idea_weaver_master", "idea_weaver_master"),
+    "world_builder": ("backend.agents.world_builder", "world_builder"),
+    "character_creator": ("backend.agents.character_creator", "character_creator"),
+    "narrative_nudger": ("backend.agents.narrative_nudger", "narrative_nudger"),
+    "summary_writer": ("backend.agents.summary_writer", "summary_writer"),
+    "name_generator_agent": ("backend.agents.name_generator_agent", "name_generator_agent"),
+    "title_generator_agent": ("backend.agents.title_generator_agent", "title_generator_agent"),
+    "compact_story_writer": ("backend.agents.compact_story_writer", "compact_story_writer"),
+}
+
+
+class AgentRegistry:
+    """Holds one fully built agent per name for a single LLM.
+
+    Agents are built on first use. `acquire` returns a shallow copy, so per-request state
+    that CrewAI sets on an agent during a run (crew, executor, counters) never leaks
+    between requests, while the configuration and tool instances are shared.
+
+    Args:
+        llm: The language model the agents use.
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+        self._agents = {}
+        self._lock = threading.Lock()
+
+    def _build(self, name: str):
+        if name not in AGENT_FACTORIES:
+            raise KeyError(f"Unknown agent '{name}'. Known agents: {', '.join(AGENT_FACTORIES)}")
+        module_name, factory_name = AGENT_FACTORIES[name]
+        factory = getattr(importlib.import_module(module_name), factory_name)
+        logging.info(f"Building agent '{name}' for the agent registry.")
+        return factory(self.llm)
+
+    def acquire(self, name: str):
+        """Returns a per-request copy of the named agent.
+
+        Args:
+            name (str): The agent name, a key of AGENT_FACTORIES.
+
+        Returns:
+            Agent: A copy of the shared agent that is safe to use in one crew run.
+
+        Raises:
+            KeyError: If the agent name is unknown.
+        """
+        agent = self._agents.get(name)
+        if agent is None:
+            with self._lock:
+                agent = self._agents.get(name)
+                if agent is None:
+                    agent = self._agents[name] = self._build(name)
+        return agent.model_copy()
+
+    def warm_up(self):
+        """Builds every known agent ahead of the first request."""
+        for name in AGENT_FACTORIES:
+            self.acquire(name)
+
+
+_registries: Dict[int, AgentRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_agent_registry(llm) -> AgentRegistry:
+    """Returns the agent registry for an LLM instance, creating it on first use.
+
+    Args:
+        llm: The language model the agents use.
+
+    Returns:
+        AgentRegistry: The registry shared by every request that uses this LLM.
+    """
+    key = id(llm)
+    registry = _registries.get(key)
+    if registry is None or registry.llm is not llm:
+        with _registries_lock:
+            registry = _registries.get(key)
+            if registry is None or registry.llm is not llm:
+                registry = _registries[key] = AgentRegistry(llm)
+    return registry
@@ -0,0 +1,163 @@
+# utils/artifact_store.py
+# This module keeps every generated story on disk so it can be listed and opened again
+# without another crew run. The rendered markdown and the final output JSON are stored
+# as content-addressed files (objects/<aa>/<sha256>.md|.json, optionally gzipped) and a
+# SQLite index maps each story to its files, request hash, title and creation time.
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Request fields that do not change what a story is generated from
+_NON_CONTENT_FIELDS = ("fresh", "session_id")
+
+
+def make_request_hash(request: Dict[str, Any]) -> str:
+    """Hashes the story request fields that determine its content, to find stories generated from the same request."""
+    payload = {key: value for key, value in request.items() if key not in _NON_CONTENT_FIELDS}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+class ArtifactStore:
+    """Stored stories: content-addressed files under `root` plus a SQLite index.
+
+    Args:
+        root (str): The directory that holds the files and the index.
+        compress (bool): Gzip new files at rest. Existing files are read either way.
+    """
+
+    def __init__(self, root: str, compress: bool = False):
+        self.root = root
+        self.compress = compress
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, "index.sqlite3"), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS stories ("
+            "story_id TEXT PRIMARY KEY, request_hash TEXT NOT NULL, title TEXT NOT NULL, created_at REAL NOT NULL, "
+            "markdown_path TEXT NOT NULL, output_path TEXT NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS stories_request_hash ON stories (request_hash)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS stories_title ON stories (title)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS stories_created_at ON stories (created_at)")
+        self._db.commit()
+
+    def _write_object(self, content: bytes, extension: str) -> Tuple[str, int]:
+        """Writes content under its hash (once) and returns its path relative to the root and its size on disk."""
+        digest = hashlib.sha256(content).hexdigest()
+        relative_path = os.path.join("objects", digest[:2], f"{digest}.{extension}" + (".gz" if self.compress else ""))
+        path = os.path.join(self.root, relative_path)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = gzip.compress(content) if self.compress else content
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return relative_path, os.path.getsize(path)
+
+    def save(self, request: Dict[str, Any], final_output: Dict[str, Any], markdown: str) -> str:
+        """Stores a generated story and returns its id.
+
+        The id is derived from the final output, so storing the same story again adds nothing.
+
+        Args:
+            request (dict): The story request it was generated from.
+            final_output (dict): The final story output.
+            markdown (str): The rendered markdown.
+
+        Returns:
+            str: The story id.
+        """
+        output = json.dumps(final_output, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        story_id = hashlib.sha256(output).hexdigest()[:16]
+        markdown_path, markdown_size = self._write_object(markdown.encode("utf-8"), "md")
+        output_path, output_size = self._write_object(output, "json")
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO stories (story_id, request_hash, title, created_at, markdown_path, output_path, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (story_id, make_request_hash(request), final_output.get("title") or "Untitled", time.time(),
+                 markdown_path, output_path, markdown_size + output_size),
+            )
+            self._db.commit()
+        logging.info(f"Stored story {story_id} ({markdown_size + output_size} bytes).")
+        return story_id
+
+    def list(self, limit: int = 50, offset: int = 0, title: Optional[str] = None,
+             request_hash: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Lists stored stories, newest first.
+
+        Args:
+            limit (int, optional): The maximum number of stories returned.
+            offset (int, optional): The number of stories skipped.
+            title (str, optional): Only stories whose title contains this text.
+            request_hash (str, optional): Only stories generated from this request (see make_request_hash).
+        """
+        query = "SELECT story_id, request_hash, title, created_at, size FROM stories"
+        conditions, params = [], []
+        if title:
+            conditions.append("title LIKE ?")
+            params.append(f"%{title}%")
+        if request_hash:
+            conditions.append("request_hash = ?")
+            params.append(request_hash)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
+        with self._lock:
+            rows = self._db.execute(query, (*params, limit, offset)).fetchall()
+        return [dict(row) for row in rows]
+
+    def locate(self, story_id: str, kind: str) -> Optional[Tuple[str, bool]]:
+        """Returns the absolute path of a story's "markdown" or "output" file and whether it is gzipped.
+
+        Returns:
+            tuple | None: (path, gzipped), or None if the story or its file does not exist.
+        """
+        if kind not in ("markdown", "output"):
+            raise ValueError(f"Unknown story file kind: {kind}")
+        with self._lock:
+            row = self._db.execute(f"SELECT {kind}_path FROM stories WHERE story_id = ?", (story_id,)).fetchone()
+        if row is None:
+            return None
+        path = os.path.join(self.root, row[0])
+        if not os.path.exists(path):
+            logging.warning(f"Stored story {story_id} is missing its {kind} file: {path}")
+            return None
+        return path, path.endswith(".gz")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM stories").fetchone()
+        return {"stories": count, "bytes": size, "compress": self.compress}
+
+
+def iter_decompressed(path: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Reads a gzipped file in chunks, for clients that do not accept gzip."""
+    with gzip.open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Returns the shared artifact store configured from the environment."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore(
+                root=os.getenv("ARTIFACT_STORE_PATH", os.path.join("outputs", "stories")),
+                compress=os.getenv("ARTIFACT_GZIP", "false").lower() == "true",
+            )
+        return _store
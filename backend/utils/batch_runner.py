@@ -0,0 +1,216 @@
+# utils/batch_runner.py
+# This module generates story concepts for many premises at once. Each batch job lives
+# in its own directory, results are appended to a JSONL file as rows finish, and a job
+# that is started again only runs the rows that have not completed yet.
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+
+from backend.utils.artifact_store import get_artifact_store
+from backend.utils.llm_cache import cache_bypass, install_llm_cache
+from backend.utils.llm_executor import install_call_limit
+from backend.utils.llm_loader import load_llm, get_llm_provider
+from backend.utils.markdown_builder import build_markdown
+from backend.utils.metrics import install_llm_metrics
+from backend.utils.rate_limiter import get_rate_limiter, install_rate_limit
+from backend.utils.save_to_markdown import save_to_markdown
+
+BATCH_ROOT = os.path.join("outputs", "batches")
+
+_batch_llm = None
+_batch_llm_lock = threading.Lock()
+
+
+def get_batch_llm():
+    """Returns the LLM shared by all batch jobs, loading it on first use.
+
+    It is separate from the interactive LLM so the provider rate limit
+    (`<PROVIDER>_REQUESTS_PER_MINUTE`) only slows down batch work. Cache hits are served
+    before the limiter, so they do not use up the provider's budget. Its calls share the
+    provider's call slots with the interactive LLM, and only take one once the limiter
+    lets them through.
+    """
+    global _batch_llm
+    if _batch_llm is None:
+        with _batch_llm_lock:
+            if _batch_llm is None:
+                limited = install_call_limit(install_llm_metrics(load_llm()))
+                _batch_llm = install_llm_cache(install_rate_limit(limited, get_rate_limiter(get_llm_provider())))
+    return _batch_llm
+
+
+def make_job_id(rows: List[Dict[str, Any]]) -> str:
+    """Derives a job id from the rows, so submitting the same rows again resumes the same job."""
+    payload = json.dumps(rows, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class BatchJob:
+    """A batch of story generation requests stored under `<root>/<job_id>/`.
+
+    The directory holds `requests.jsonl` (the input rows), `results.jsonl` (one line per
+    finished row, appended as rows complete) and `markdown/` (the rendered stories).
+
+    Args:
+        job_id (str): The job id.
+        root (str, optional): The directory that holds all batch jobs.
+    """
+
+    def __init__(self, job_id: str, root: str = BATCH_ROOT):
+        self.job_id = job_id
+        self.job_dir = os.path.join(root, job_id)
+        self.requests_path = os.path.join(self.job_dir, "requests.jsonl")
+        self.results_path = os.path.join(self.job_dir, "results.jsonl")
+        self.markdown_dir = os.path.join(self.job_dir, "markdown")
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def create(cls, rows: List[Dict[str, Any]], root: str = BATCH_ROOT) -> "BatchJob":
+        """Creates the job for a list of validated request dicts, or returns the existing one."""
+        job = cls(make_job_id(rows), root)
+        if not os.path.exists(job.requests_path):
+            os.makedirs(job.job_dir, exist_ok=True)
+            tmp_path = job.requests_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row) + "\n")
+            os.replace(tmp_path, job.requests_path)
+        return job
+
+    def exists(self) -> bool:
+        return os.path.exists(self.requests_path)
+
+    def load_rows(self) -> List[Dict[str, Any]]:
+        with open(self.requests_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def load_results(self) -> Dict[int, Dict[str, Any]]:
+        """Returns the latest result per row index. A line cut short by a crash is ignored."""
+        results = {}
+        if not os.path.exists(self.results_path):
+            return results
+        with open(self.results_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                results[result["index"]] = result
+        return results
+
+    def completed_indexes(self) -> Set[int]:
+        return {index for index, result in self.load_results().items() if result.get("status") == "complete"}
+
+    def _drop_partial_line(self):
+        """Cuts off a result line left half-written by a crash, so new lines start cleanly."""
+        if not os.path.exists(self.results_path):
+            return
+        with open(self.results_path, "rb+") as f:
+            content = f.read()
+            if content and not content.endswith(b"\n"):
+                f.truncate(content.rfind(b"\n") + 1)
+
+    def _append_result(self, result: Dict[str, Any]):
+        with self._write_lock:
+            with open(self.results_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(result) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def status(self) -> Dict[str, Any]:
+        """Returns the progress of the job."""
+        total = len(self.load_rows())
+        results = self.load_results()
+        completed = sum(1 for result in results.values() if result.get("status") == "complete")
+        failed = len(results) - completed
+        return {
+            "job_id": self.job_id,
+            "total": total,
+            "completed": completed,
+            "failed": failed,
+            "pending": total - completed - failed,
+            "running": is_job_running(self.job_id),
+            "results_path": self.results_path,
+        }
+
+    def _run_row(self, llm, index: int, row: Dict[str, Any]):
+        from backend.utils.story_pipeline import generate_story_concept
+
+        start = time.perf_counter()
+        try:
+            # A row with "fresh": true skips cached responses, as it does on /generate_story
+            with cache_bypass(bool(row.get("fresh"))):
+                final_output, timings = generate_story_concept(llm, row)
+            markdown = build_markdown(final_output)
+            # Prefix the row index so rows that get the same title do not overwrite each other
+            save_to_markdown(f"{index:05d} {final_output['title'] or 'Untitled'}", markdown, output_dir=self.markdown_dir)
+            # Stored like the stories of /generate_story, so GET /stories/<story_id> serves it too
+            story_id = get_artifact_store().save(row, final_output, markdown)
+            result = {"index": index, "status": "complete", "data": final_output, "timings": timings, "story_id": story_id}
+        except Exception as e:
+            logging.error(f"Batch {self.job_id}: row {index} failed: {e}", exc_info=True)
+            result = {"index": index, "status": "error", "message": str(e)}
+        result["elapsed"] = round(time.perf_counter() - start, 3)
+        self._append_result(result)
+        logging.info(f"Batch {self.job_id}: row {index} finished with status '{result['status']}'.")
+
+    def run(self, max_workers: Optional[int] = None):
+        """Generates every row that has not completed yet, blocking until all of them finish.
+
+        Failed rows are retried on the next run; completed rows are never generated again.
+
+        Args:
+            max_workers (int, optional): The number of rows generated at once.
+                Defaults to BATCH_MAX_WORKERS (2).
+        """
+        max_workers = max_workers or int(os.getenv("BATCH_MAX_WORKERS", "2"))
+        self._drop_partial_line()
+        completed = self.completed_indexes()
+        pending = [(index, row) for index, row in enumerate(self.load_rows()) if index not in completed]
+        logging.info(f"Batch {self.job_id}: {len(completed)} rows already complete, {len(pending)} to generate.")
+        if not pending:
+            return
+
+        llm = get_batch_llm()
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"batch-{self.job_id}") as pool:
+            for index, row in pending:
+                pool.submit(self._run_row, llm, index, row)
+
+
+_running_jobs: Set[str] = set()
+_running_jobs_lock = threading.Lock()
+
+
+def is_job_running(job_id: str) -> bool:
+    with _running_jobs_lock:
+        return job_id in _running_jobs
+
+
+def start_job_in_background(job: BatchJob) -> bool:
+    """Runs a batch job on a background thread unless it is already running in this process.
+
+    Returns:
+        bool: True if the job was started, False if it was already running.
+    """
+    with _running_jobs_lock:
+        if job.job_id in _running_jobs:
+            return False
+        _running_jobs.add(job.job_id)
+
+    def run():
+        try:
+            job.run()
+        except Exception as e:
+            logging.error(f"Batch {job.job_id} stopped: {e}", exc_info=True)
+        finally:
+            with _running_jobs_lock:
+                _running_jobs.discard(job.job_id)
+
+    threading.Thread(target=run, name=f"batch-{job.job_id}", daemon=True).start()
+    return True
@@ -0,0 +1,108 @@
+# utils/context_budget.py
+# This module keeps the prompts of the later story stages small. Each stage gets a token
+# budget for the earlier outputs it is given, and those outputs are passed as compact
+# digests (e.g. character names and roles instead of full profiles) that fit the budget.
+
+import logging
+import os
+import re
+from typing import Dict, Tuple
+
+from backend.utils.metrics import get_metrics_registry
+
+# Stage -> upstream output -> (digest, token budget). Outputs a stage does not list are passed unchanged.
+STAGE_BUDGETS: Dict[str, Dict[str, Tuple[str, int]]] = {
+    "character_creator": {
+        "world_description": ("text", 400),
+    },
+    "narrative_nudger": {
+        "world_description": ("text", 300),
+        "character_profiles": ("characters", 150),
+    },
+    "summary_writer": {
+        "world_description": ("text", 150),
+        "character_profiles": ("characters", 120),
+        "narrative_twist": ("text", 200),
+    },
+}
+
+_HEADING = re.compile(r"^#+\s*(.+?)\s*$", re.MULTILINE)
+_MARKUP = re.compile(r"\*\*|__|^\s*[-*]\s+", re.MULTILINE)
+_WHITESPACE = re.compile(r"\s+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_ROLE = re.compile(r"Role in Story\**\s*:\s*(.+)", re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the token count of a text (about four characters per token for English)."""
+    return (len(text) + 3) // 4
+
+
+def _plain(text: str) -> str:
+    """Drops Markdown markup and collapses whitespace."""
+    return _WHITESPACE.sub(" ", _MARKUP.sub("", _HEADING.sub(r"\1.", text))).strip()
+
+
+def truncate_to_budget(text: str, max_tokens: int) -> str:
+    """Keeps whole sentences from the start of a text until the token budget is used up."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    kept, used = [], 0
+    for sentence in _SENTENCE_END.split(text):
+        cost = estimate_tokens(sentence) + 1
+        if used + cost > max_tokens:
+            break
+        kept.append(sentence)
+        used += cost
+    if kept:
+        return " ".join(kept)
+    # A single sentence over budget: cut at a word boundary
+    return text[:max_tokens * 4].rsplit(" ", 1)[0] + "…"
+
+
+def digest_characters(profiles: str) -> str:
+    """Reduces character profiles to one "Name (role)" entry per `## Name` section."""
+    entries = []
+    for section in re.split(r"^##\s+", profiles, flags=re.MULTILINE)[1:]:
+        name, _, body = section.partition("\n")
+        role = _ROLE.search(body)
+        name = name.strip().strip("*[]")
+        entries.append(f"{name} ({_plain(role.group(1))})" if role else name)
+    # Profiles that do not follow the expected format are summarized as text instead
+    return "; ".join(entries) if entries else _plain(profiles)
+
+
+def fit_context(stage: str, upstream: Dict[str, str]) -> Dict[str, str]:
+    """Returns the upstream outputs a stage is given, digested to fit its budget.
+
+    Set CONTEXT_BUDGET_ENABLED=false to pass full outputs, or CONTEXT_BUDGET_SCALE to
+    grow or shrink every budget (e.g. 2 for models with a large, fast context).
+
+    Args:
+        stage (str): The stage name, e.g. "narrative_nudger".
+        upstream (dict): The earlier outputs keyed by node name.
+
+    Returns:
+        dict: The same keys, with budgeted outputs replaced by their digests.
+    """
+    budgets = STAGE_BUDGETS.get(stage)
+    if not budgets or os.getenv("CONTEXT_BUDGET_ENABLED", "true").lower() != "true":
+        return dict(upstream)
+
+    scale = float(os.getenv("CONTEXT_BUDGET_SCALE", "1"))
+    fitted, before, after = {}, 0, 0
+    for name, value in upstream.items():
+        if name not in budgets or not isinstance(value, str):
+            fitted[name] = value
+            continue
+        digest, max_tokens = budgets[name]
+        condensed = digest_characters(value) if digest == "characters" else _plain(value)
+        fitted[name] = truncate_to_budget(condensed, int(max_tokens * scale))
+        before += estimate_tokens(value)
+        after += estimate_tokens(fitted[name])
+
+    saved = max(0, before - after)
+    if saved:
+        get_metrics_registry().inc("ideaweaver_context_tokens_saved_total", {"stage": stage}, saved)
+    logging.info(f"Context for '{stage}': ~{before} -> ~{after} tokens (~{saved} saved).")
+    return fitted
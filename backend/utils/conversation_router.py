@@ -0,0 +1,163 @@
+# utils/conversation_router.py
+# This module routes /converse turns straight to the master agent tools when the
+# next step is already known, so the master LLM only runs for ambiguous input.
+
+import logging
+import re
+import threading
+from typing import Dict, Any, Optional
+
+# Inputs that ask for guidance rather than answer the question. These always go to the LLM.
+_HELP_PATTERN = re.compile(
+    r"^\s*(help|\?+|generate ideas?|give me (some )?ideas|i don'?t know|not sure|idk|what do you mean)\b",
+    re.IGNORECASE,
+)
+
+_steps = None
+_steps_lock = threading.Lock()
+
+
+def _get_steps() -> Dict[str, tuple]:
+    """Maps each conversation step to the tool that handles it and the check the input must
+    pass for the tool to be called directly. Built on first use, as the tools import crewai."""
+    global _steps
+    if _steps is None:
+        with _steps_lock:
+            if _steps is None:
+                from backend.utils.master_agent_tools import (
+                    AskForPremiseTool,
+                    ValidateAndUpdatePremiseTool,
+                    ValidateAndUpdateAgeGroupTool,
+                    ValidateAndUpdateTitleChoiceTool,
+                    ValidateAndUpdateTitleInputTool,
+                    ValidateAndUpdateNumCharactersTool,
+                    ValidateAndUpdateNameChoiceTool,
+                    ValidateAndUpdateCharacterNamesInputTool,
+                    _is_valid_premise,
+                    _is_valid_age_group,
+                    _is_valid_title_choice,
+                    _is_valid_num_characters,
+                    _is_valid_name_choice,
+                    _parse_character_names_input,
+                )
+                _steps = {
+                    "start": (AskForPremiseTool(), None),
+                    "premise": (ValidateAndUpdatePremiseTool(), lambda value, inputs: _is_valid_premise(value)),
+                    "age_group": (ValidateAndUpdateAgeGroupTool(), lambda value, inputs: _is_valid_age_group(value)),
+                    "title_choice": (ValidateAndUpdateTitleChoiceTool(), lambda value, inputs: _is_valid_title_choice(value)),
+                    "title_input": (ValidateAndUpdateTitleInputTool(), lambda value, inputs: bool(value)),
+                    "num_characters": (ValidateAndUpdateNumCharactersTool(), lambda value, inputs: _is_valid_num_characters(value)),
+                    "name_choice": (ValidateAndUpdateNameChoiceTool(), lambda value, inputs: _is_valid_name_choice(value)),
+                    "character_names_input": (
+                        ValidateAndUpdateCharacterNamesInputTool(),
+                        lambda value, inputs: _parse_character_names_input(value, inputs.get("num_characters", 0)) is not None,
+                    ),
+                }
+    return _steps
+
+_stats_lock = threading.Lock()
+_stats = {"fast_path_hits": 0, "llm_fallbacks": 0}
+
+
+def next_expected_step(collected_inputs: Dict[str, Any]) -> Optional[str]:
+    """Derives the next question to ask from the inputs collected so far.
+
+    Args:
+        collected_inputs (dict): The inputs collected so far.
+
+    Returns:
+        str | None: The name of the next step, or None if every input has been collected.
+    """
+    if "premise" not in collected_inputs:
+        return "premise"
+    if "age_group" not in collected_inputs:
+        return "age_group"
+    if "title_choice" not in collected_inputs:
+        return "title_choice"
+    if collected_inputs["title_choice"] == "Provide my own" and not collected_inputs.get("title_input"):
+        return "title_input"
+    if "num_characters" not in collected_inputs:
+        return "num_characters"
+    if "name_choice" not in collected_inputs:
+        return "name_choice"
+    if "character_names_input" not in collected_inputs:
+        return "character_names_input"
+    return None
+
+
+class RoutedTurn:
+    """A conversation turn resolved to a single tool call.
+
+    Args:
+        step (str): The conversation step being answered.
+        tool: The tool that handles the step.
+        kwargs (dict): The arguments to pass to the tool's `_run`.
+        uses_llm (bool, optional): Whether the tool itself calls the LLM (e.g. to generate names).
+    """
+
+    def __init__(self, step: str, tool, kwargs: Dict[str, Any], uses_llm: bool = False):
+        self.step = step
+        self.tool = tool
+        self.kwargs = kwargs
+        self.uses_llm = uses_llm
+
+    def run(self) -> Dict[str, Any]:
+        """Calls the tool and returns its response."""
+        logging.info(f"Fast path: routing '{self.step}' answer directly to '{self.tool.name}'.")
+        return self.tool._run(**self.kwargs)
+
+
+def plan_turn(conversation_history: str, user_input: str, collected_inputs: Dict[str, Any], last_question: Optional[str] = None) -> Optional[RoutedTurn]:
+    """Resolves a conversation turn to a tool call when the answer is well-formed.
+
+    Args:
+        conversation_history (str): The conversation so far.
+        user_input (str): The user's latest input.
+        collected_inputs (dict): The inputs collected so far.
+        last_question (str, optional): The question the user is answering.
+
+    Returns:
+        RoutedTurn | None: The resolved tool call, or None if the turn needs the master LLM.
+    """
+    steps = _get_steps()
+    if not conversation_history and not user_input:
+        return RoutedTurn("start", steps["start"][0], {})
+
+    if _HELP_PATTERN.match(user_input):
+        return None
+
+    step = last_question or next_expected_step(collected_inputs)
+    if step not in steps or step == "start":
+        return None
+
+    tool, is_valid = steps[step]
+    value = user_input.strip()
+    if not is_valid(value, collected_inputs):
+        return None
+
+    return RoutedTurn(
+        step,
+        tool,
+        {"user_input": user_input, "collected_inputs": collected_inputs},
+        uses_llm=step == "name_choice" and value == "Generate for me",
+    )
+
+
+def record_turn(fast_path: bool) -> Dict[str, Any]:
+    """Updates the routing counters for a turn and returns a snapshot of them.
+
+    Args:
+        fast_path (bool): Whether the turn was served without the master LLM.
+
+    Returns:
+        dict: The route taken by this turn and the running counters.
+    """
+    with _stats_lock:
+        _stats["fast_path_hits" if fast_path else "llm_fallbacks"] += 1
+        return {"route": "fast_path" if fast_path else "llm", **_stats}
+
+
+def get_routing_stats() -> Dict[str, int]:
+    """Returns the current fast-path and LLM-fallback counters."""
+    with _stats_lock:
+        return dict(_stats)
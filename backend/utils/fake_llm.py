@@ -0,0 +1,132 @@
+# utils/fake_llm.py
+# This module provides a deterministic local stand-in for the LLM, selected with
+# LLM_PROVIDER=FAKE. It answers every prompt in the format the agents expect, with a
+# configurable latency, token rate and failure rate, so the service's own overhead can
+# be measured without a running Ollama server or a Gemini key.
+
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+from crewai.llms.base_llm import BaseLLM
+
+_FILLER_WORDS = ("amber", "lantern", "river", "whisper", "clockwork", "meadow", "storm", "echo",
+                 "harbor", "ember", "glass", "orchard", "signal", "tide", "thistle", "compass")
+
+
+class FakeLLMError(RuntimeError):
+    """Raised by FakeLLM for an injected failure."""
+
+
+class FakeLLM(BaseLLM):
+    """A CrewAI LLM that answers locally after a simulated delay.
+
+    The delay of a call is `latency_ms` plus the length of the answer divided by
+    `tokens_per_second` (0 means no per-token delay). A `failure_rate` share of calls
+    raise FakeLLMError. Answers and failures come from a seeded generator, so the same
+    sequence of calls gives the same results.
+    """
+
+    latency_ms: float = 50.0
+    tokens_per_second: float = 0.0
+    failure_rate: float = 0.0
+    answer_tokens: int = 80
+    seed: int = 0
+
+    def model_post_init(self, __context: Any):
+        super().model_post_init(__context)
+        object.__setattr__(self, "_random", random.Random(self.seed))
+        object.__setattr__(self, "_random_lock", threading.Lock())
+
+    @classmethod
+    def from_env(cls, **overrides: str) -> "FakeLLM":
+        """Builds a FakeLLM from the FAKE_LLM_* environment variables.
+
+        Args:
+            **overrides: Settings that take precedence over the environment, e.g.
+                `latency_ms="800"` for one of several stand-in router backends.
+        """
+        settings = {
+            "latency_ms": float(os.getenv("FAKE_LLM_LATENCY_MS", "50")),
+            "tokens_per_second": float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "0")),
+            "failure_rate": float(os.getenv("FAKE_LLM_FAILURE_RATE", "0")),
+            "answer_tokens": int(os.getenv("FAKE_LLM_ANSWER_TOKENS", "80")),
+            "seed": int(os.getenv("FAKE_LLM_SEED", "0")),
+        }
+        for name, value in overrides.items():
+            if name not in settings:
+                raise ValueError(f"Unknown fake LLM setting: {name}")
+            settings[name] = type(settings[name])(value)
+        return cls(model="fake/idea-weaver", **settings)
+
+    def call(self, messages: Union[str, List[Dict[str, str]]], tools: Optional[List[dict]] = None,
+             callbacks: Optional[List[Any]] = None, available_functions: Optional[Dict[str, Any]] = None,
+             from_task: Optional[Any] = None, from_agent: Optional[Any] = None,
+             response_model: Optional[Any] = None) -> str:
+        prompt = messages if isinstance(messages, str) else "\n".join(str(m.get("content", "")) for m in messages)
+        with self._random_lock:
+            fail = self._random.random() < self.failure_rate
+            filler = [self._random.choice(_FILLER_WORDS) for _ in range(self.answer_tokens)]
+
+        answer = self._answer_for(prompt, filler)
+        delay = self.latency_ms / 1000
+        if self.tokens_per_second > 0:
+            delay += len(answer.split()) / self.tokens_per_second
+        time.sleep(delay)
+
+        if fail:
+            raise FakeLLMError("Injected fake LLM failure.")
+        # Report usage like a provider would, counting words as tokens
+        self._track_token_usage_internal({
+            "prompt_tokens": len(prompt.split()),
+            "completion_tokens": len(answer.split()),
+            "total_tokens": len(prompt.split()) + len(answer.split()),
+        })
+        return f"Thought: I now can give a great answer\nFinal Answer: {answer}"
+
+    def _answer_for(self, prompt: str, filler: List[str]) -> str:
+        """Picks an answer in the format the prompt asks for."""
+        text = " ".join(filler)
+        if '"story_summary"' in prompt:
+            count = _first_int(r"list of exactly (\d+) character names", prompt, 2)
+            return json.dumps({
+                "title": f"The {filler[0].title()} {filler[1].title()}",
+                "character_names": _names(count),
+                "world_description": f"## The World\n{text}",
+                "character_profiles": "\n\n".join(f"## {name}\n- **Role in Story**: {text}" for name in _names(count)),
+                "narrative_twist": text,
+                "story_summary": text,
+            })
+        if "Python list" in prompt:
+            return repr(_names(_first_int(r"(?:Generate|A Python list of) (?:exactly )?(\d+)", prompt, 2)))
+        if "Tool Selection Guide" in prompt or "`Ask for Premise` tool" in prompt:
+            return json.dumps({
+                "status": "continue",
+                "message": "Could you tell me a little more about your story idea?",
+                "data": {},
+            })
+        if "title" in prompt.lower() and "8 words" in prompt:
+            return f"The {filler[0].title()} {filler[1].title()}"
+        return text
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 8192
+
+
+def _first_int(pattern: str, text: str, default: int) -> int:
+    match = re.search(pattern, text)
+    return int(match.group(1)) if match else default
+
+
+def _names(count: int) -> List[str]:
+    return [f"Fake Character {i + 1}" for i in range(count)]
@@ -0,0 +1,172 @@
+# utils/health.py
+# This module keeps track of whether the LLM backends can serve requests. A background
+# thread probes them at a fixed interval and caches the result, so /readyz (and the
+# frontend, which reads it) never waits on a network probe of its own.
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from backend.utils.llm_loader import get_llm_provider
+
+
+def ollama_model_name(model: str) -> str:
+    """Returns the name Ollama lists a model under, e.g. "ollama/gemma3n" -> "gemma3n:latest"."""
+    name = model.split("/", 1)[1] if model.startswith("ollama/") else model
+    return name if ":" in name else f"{name}:latest"
+
+
+def probe_ollama(base_url: str, model: str, timeout: float) -> Dict[str, Any]:
+    """Checks that an Ollama server answers, has the model pulled and whether (and in how much memory) it is loaded.
+
+    Args:
+        base_url (str): The Ollama server URL.
+        model (str): The model as configured, e.g. "ollama/gemma3n:latest".
+        timeout (float): Seconds each request may take.
+
+    Returns:
+        dict: The probe result; "ok" is True if the server answers and has the model.
+    """
+    name = ollama_model_name(model)
+    result = {"provider": "OLLAMA", "model": name, "base_url": base_url}
+    start = time.perf_counter()
+    try:
+        tags = requests.get(f"{base_url}/api/tags", timeout=timeout)
+        tags.raise_for_status()
+        running = requests.get(f"{base_url}/api/ps", timeout=timeout)
+        running.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        logging.debug(f"Ollama probe of {base_url} failed: {e}")
+        return {**result, "ok": False, "reachable": False, "error": f"Ollama is not reachable at {base_url} ({type(e).__name__})."}
+    available = any(name in (entry.get("name"), entry.get("model")) for entry in tags.json().get("models", []))
+    loaded = next((entry for entry in running.json().get("models", []) if name in (entry.get("name"), entry.get("model"))), None)
+    return {
+        **result,
+        "ok": available,
+        "reachable": True,
+        "model_available": available,
+        "model_loaded": loaded is not None,
+        # Memory held by the loaded model, and when Ollama will unload it unless it is used again
+        **({"size_bytes": loaded.get("size"), "vram_bytes": loaded.get("size_vram"), "expires_at": loaded.get("expires_at")}
+           if loaded is not None else {}),
+        "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        **({} if available else {"error": f"Model '{name}' is not pulled. Run `ollama pull {name}`."}),
+    }
+
+
+def _probe_backend(provider: str, model: Optional[str], timeout: float) -> Dict[str, Any]:
+    if provider == "OLLAMA":
+        return probe_ollama(os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+                            model or os.getenv("OLLAMA_MODEL", "ollama/gemma3n:latest"), timeout)
+    if provider == "GEMINI":
+        # Not probed over the network: every probe would count against the API quota
+        configured = bool(os.getenv("GEMINI_API_KEY"))
+        return {"provider": provider, "model": model or os.getenv("GEMINI_MODEL"), "ok": configured,
+                **({} if configured else {"error": "GEMINI_API_KEY is not set."})}
+    if provider == "FAKE":
+        return {"provider": provider, "ok": True}
+    return {"provider": provider, "ok": False, "error": f"Unsupported provider: {provider}"}
+
+
+def configured_backends() -> List[Tuple[str, str, Optional[str]]]:
+    """Returns (name, provider, model) for every LLM backend the backend is configured with."""
+    provider = get_llm_provider()
+    if provider == "ROUTER":
+        from backend.utils.llm_router import parse_backends
+        return [(name, backend_provider, model) for name, backend_provider, model, _ in parse_backends(os.getenv("LLM_BACKENDS", ""))]
+    return [(provider.lower() or "llm", provider, None)]
+
+
+class HealthProber:
+    """Probes the LLM backends in a background thread and caches the last result.
+
+    Args:
+        interval (float): Seconds between probes.
+        timeout (float): Seconds each probe request may take.
+        stale_after (float): Age in seconds after which a cached result no longer counts as ready.
+        backends (Callable, optional): Returns the backends to probe. Defaults to `configured_backends`.
+    """
+
+    def __init__(self, interval: float = 15, timeout: float = 2, stale_after: float = 60,
+                 backends: Callable[[], List[Tuple[str, str, Optional[str]]]] = configured_backends):
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.backends = backends
+        self._lock = threading.Lock()
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Starts the background probes (once)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="health-prober", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            try:
+                self.probe()
+            except Exception as e:
+                logging.error(f"Health probe failed: {e}", exc_info=True)
+            time.sleep(self.interval)
+
+    def probe(self) -> Dict[str, Any]:
+        """Probes every backend now and caches the result."""
+        backends = {name: _probe_backend(provider, model, self.timeout) for name, provider, model in self.backends()}
+        with self._lock:
+            was_ready = self._result is not None and self._result["ok"]
+            # With several backends, the router fails over, so one working backend is enough
+            self._result = {"ok": any(backend["ok"] for backend in backends.values()), "backends": backends}
+            self._checked_at = time.time()
+            if self._result["ok"] != was_ready:
+                logging.log(logging.INFO if self._result["ok"] else logging.WARNING,
+                            f"LLM backends are {'ready' if self._result['ok'] else 'not ready'}: {backends}")
+            return self._result
+
+    def status(self) -> Dict[str, Any]:
+        """Returns the cached probe result, probing first if there is none yet.
+
+        Returns:
+            dict: "ready", "checked_at", "age_s", "stale" and the result of each backend.
+        """
+        with self._lock:
+            result, checked_at = self._result, self._checked_at
+        if result is None:
+            result, checked_at = self.probe(), time.time()
+        age = time.time() - checked_at
+        stale = age > self.stale_after
+        return {
+            "ready": result["ok"] and not stale,
+            "llm_provider": get_llm_provider(),
+            "checked_at": checked_at,
+            "age_s": round(age, 1),
+            "stale": stale,
+            "backends": result["backends"],
+        }
+
+
+_prober: Optional[HealthProber] = None
+_prober_lock = threading.Lock()
+
+
+def get_health_prober() -> HealthProber:
+    """Returns the shared health prober configured from the environment, starting it on first use."""
+    global _prober
+    with _prober_lock:
+        if _prober is None:
+            interval = float(os.getenv("HEALTH_PROBE_INTERVAL", "15"))
+            _prober = HealthProber(
+                interval=interval,
+                timeout=float(os.getenv("HEALTH_PROBE_TIMEOUT", "2")),
+                stale_after=float(os.getenv("HEALTH_STALE_AFTER", str(4 * interval))),
+            )
+            _prober.start()
+            logging.info(f"Health prober started; LLM backends are probed every {interval:g}s.")
+        return _prober
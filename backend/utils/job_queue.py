@@ -0,0 +1,319 @@
+# utils/job_queue.py
+# This module runs story generations as jobs, independent of the HTTP request that
+# submitted them. Jobs wait in a bounded queue for one of a fixed number of worker
+# threads, report progress per story section as it completes (with the text streamed so
+# far for the sections still being written), and are stored in a SQLite file so their
+# results (and unfinished jobs) survive a restart.
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+# The story sections a job reports progress for, in pipeline order
+SECTIONS = ("title", "character_names", "world_description", "character_profiles", "narrative_twist", "story_summary")
+
+FINISHED = ("complete", "error")
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue already holds as many jobs as it is allowed to."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Too many story generation jobs are waiting.")
+        self.retry_after = retry_after
+
+
+class StoryJob:
+    """One story generation job.
+
+    Args:
+        job_id (str): The job id.
+        request (dict): The story request (a StoryGenerationRequest as a dict).
+        status (str, optional): "queued", "running", "complete" or "error".
+        sections (dict, optional): The story sections finished so far, keyed by section name.
+        timings (dict, optional): The wall time of each finished section.
+        result (dict, optional): The final response once the job is complete.
+        error (str, optional): The error message if the job failed.
+        dedupe_key (str, optional): Identifies identical requests; see JobQueue.submit.
+    """
+
+    def __init__(self, job_id: str, request: Dict[str, Any], status: str = "queued",
+                 sections: Optional[Dict[str, Any]] = None, timings: Optional[Dict[str, float]] = None,
+                 result: Optional[Dict[str, Any]] = None, error: Optional[str] = None,
+                 created_at: Optional[float] = None, started_at: Optional[float] = None,
+                 finished_at: Optional[float] = None, dedupe_key: Optional[str] = None):
+        self.job_id = job_id
+        self.request = request
+        self.status = status
+        self.sections = sections or {}
+        self.timings = timings or {}
+        self.result = result
+        self.error = error
+        self.created_at = created_at or time.time()
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.dedupe_key = dedupe_key
+        # Text streamed so far for each section still being written; kept in memory only
+        self.partial: Dict[str, str] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "request": self.request,
+            "status": self.status,
+            "sections": self.sections,
+            "timings": self.timings,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "dedupe_key": self.dedupe_key,
+        }
+
+    def progress(self) -> Dict[str, Any]:
+        """Returns the job status with the sections finished so far, without the final result."""
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "completed_sections": [section for section in SECTIONS if section in self.sections],
+            "total_sections": len(SECTIONS),
+            "sections": self.sections,
+            "partial_sections": dict(self.partial),
+            "timings": self.timings,
+            "error": self.error,
+            "queued_s": round((self.started_at or time.time()) - self.created_at, 3),
+            "elapsed_s": round((self.finished_at or time.time()) - self.started_at, 3) if self.started_at else None,
+        }
+
+
+class JobQueue:
+    """A bounded queue of story jobs served by a fixed pool of worker threads.
+
+    At most `max_workers` jobs run at once and at most `max_queued` more wait. Submitting
+    beyond that raises JobQueueFullError. Finished jobs are kept for `ttl_seconds`.
+    Jobs do not take LLM executor workers: their LLM calls take the executor's call slots
+    like any other (see utils/llm_executor.py), which is where the provider's limit applies.
+
+    Args:
+        runner (Callable): Called with a job's request and a progress callback; returns the final response.
+            The callback takes the pipeline's `section` and `token` events.
+        max_workers (int): The number of jobs that run at once.
+        max_queued (int): The number of jobs that may wait for a worker.
+        retry_after (int): Seconds a rejected client should wait before retrying.
+        db_path (str, optional): The SQLite file jobs are stored in. None keeps them in memory only.
+        ttl_seconds (float): How long finished jobs are kept.
+        max_jobs_in_memory (int): The number of jobs kept in memory; older ones are read from the file.
+    """
+
+    def __init__(self, runner: Callable[[Dict[str, Any], Callable[[Dict[str, Any]], None]], Dict[str, Any]],
+                 max_workers: int = 2, max_queued: int = 32, retry_after: int = 5, db_path: Optional[str] = None,
+                 ttl_seconds: float = 7 * 86400, max_jobs_in_memory: int = 1000):
+        self.runner = runner
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.retry_after = retry_after
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs_in_memory = max_jobs_in_memory
+        self._jobs: "OrderedDict[str, StoryJob]" = OrderedDict()
+        self._pending: "queue.Queue[StoryJob]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0, "resumed": 0, "coalesced": 0}
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+            self._db.commit()
+            self._resume_unfinished()
+
+        for index in range(max_workers):
+            threading.Thread(target=self._work, name=f"story-job-{index}", daemon=True).start()
+
+    def _resume_unfinished(self):
+        """Queues the jobs that were waiting or running when the process stopped, oldest first.
+
+        Only as many jobs as the workers and the queue hold are resumed; the others fail,
+        as they would have been rejected if submitted now.
+        """
+        rows = self._db.execute(
+            "SELECT job_id, state FROM jobs WHERE status IN ('queued', 'running') ORDER BY updated_at"
+        ).fetchall()
+        capacity = self.max_workers + self.max_queued
+        for job_id, state in rows:
+            job = StoryJob(job_id, **json.loads(state))
+            if self._stats["resumed"] >= capacity:
+                job.status, job.finished_at = "error", time.time()
+                job.error = "The server restarted with more unfinished jobs than its queue holds. Please submit the story again."
+                self._remember(job)
+                self._save(job)
+                self._stats["failed"] += 1
+                continue
+            # Sections from the interrupted run are generated again
+            job.status, job.sections, job.timings, job.started_at = "queued", {}, {}, None
+            self._remember(job)
+            self._pending.put(job)
+            self._stats["resumed"] += 1
+        if rows:
+            logging.info(f"Resumed {self._stats['resumed']} of {len(rows)} unfinished story jobs.")
+
+    def submit(self, request: Dict[str, Any], dedupe_key: Optional[str] = None) -> StoryJob:
+        """Queues a story job.
+
+        Args:
+            request (dict): The story request.
+            dedupe_key (str, optional): If an unfinished job was submitted with the same key,
+                that job is returned instead of queuing another one.
+
+        Raises:
+            JobQueueFullError: If the queue is full.
+        """
+        with self._lock:
+            if dedupe_key is not None:
+                existing = next((job for job in self._jobs.values()
+                                 if job.dedupe_key == dedupe_key and job.status not in FINISHED), None)
+                if existing is not None:
+                    self._stats["coalesced"] += 1
+                    logging.info(f"Attached to identical story job {existing.job_id}.")
+                    return existing
+            if self._pending.qsize() >= self.max_queued:
+                self._stats["rejected"] += 1
+                raise JobQueueFullError(self.retry_after)
+            job = StoryJob(uuid.uuid4().hex, request, dedupe_key=dedupe_key)
+            self._remember(job)
+            self._save(job)
+            self._stats["submitted"] += 1
+            self._pending.put(job)
+        logging.info(f"Queued story job {job.job_id} ({self._pending.qsize()} waiting).")
+        return job
+
+    def get(self, job_id: str) -> Optional[StoryJob]:
+        """Returns a job, or None if it does not exist or has expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None and self._db is not None:
+                row = self._db.execute("SELECT state FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+                if row is not None:
+                    job = StoryJob(job_id, **json.loads(row[0]))
+        if job is not None and job.status in FINISHED and time.time() - job.finished_at > self.ttl_seconds:
+            return None
+        return job
+
+    def position(self, job: StoryJob) -> int:
+        """Returns the number of queued jobs ahead of a queued job."""
+        with self._lock:
+            return sum(1 for other in self._jobs.values() if other.status == "queued" and other.created_at < job.created_at)
+
+    def _work(self):
+        while True:
+            job = self._pending.get()
+            try:
+                self._run(job)
+            except Exception as e:
+                # Never let a failed save end the worker
+                logging.error(f"Story job {job.job_id} could not be recorded: {e}", exc_info=True)
+
+    def _run(self, job: StoryJob):
+        with self._lock:
+            job.status, job.started_at = "running", time.time()
+            self._save(job)
+
+        def on_event(event: Dict[str, Any]):
+            kind = event.get("event")
+            if kind == "token":
+                # Only read by progress polls, so tokens are not written to the job store
+                with self._lock:
+                    job.partial[event["section"]] = job.partial.get(event["section"], "") + event.get("delta", "")
+                return
+            if kind != "section":
+                return
+            with self._lock:
+                job.partial.pop(event["section"], None)
+                job.sections[event["section"]] = event["content"]
+                job.timings[event["section"]] = event.get("elapsed", 0.0)
+                self._save(job)
+
+        try:
+            result = self.runner(job.request, on_event)
+            status, error = "complete", None
+        except Exception as e:
+            logging.error(f"Story job {job.job_id} failed: {e}", exc_info=True)
+            result, status, error = None, "error", str(e)
+
+        with self._lock:
+            job.result, job.status, job.error, job.finished_at = result, status, error, time.time()
+            job.partial = {}
+            self._stats["completed" if status == "complete" else "failed"] += 1
+            self._save(job)
+        logging.info(f"Story job {job.job_id} finished with status '{status}' in {job.finished_at - job.started_at:.2f}s.")
+
+    def _remember(self, job: StoryJob):
+        self._jobs[job.job_id] = job
+        self._jobs.move_to_end(job.job_id)
+        while len(self._jobs) > self.max_jobs_in_memory:
+            oldest_id = next(iter(self._jobs))
+            if self._jobs[oldest_id].status not in FINISHED:
+                break  # Unfinished jobs are never dropped
+            del self._jobs[oldest_id]
+
+    def _save(self, job: StoryJob):
+        """Stores a job, dropping expired finished jobs. Called with the lock held."""
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO jobs (job_id, status, state, updated_at) VALUES (?, ?, ?, ?)",
+            (job.job_id, job.status, json.dumps(job.to_dict()), time.time()),
+        )
+        if job.status in FINISHED:
+            self._db.execute("DELETE FROM jobs WHERE status IN ('complete', 'error') AND updated_at < ?",
+                             (time.time() - self.ttl_seconds,))
+        self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns job counters and the current load of the queue."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["queued"] = self._pending.qsize()
+            stats["running"] = sum(1 for job in self._jobs.values() if job.status == "running")
+            stats["max_workers"] = self.max_workers
+            stats["max_queued"] = self.max_queued
+        return stats
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue(runner: Callable[[Dict[str, Any], Callable[[Dict[str, Any]], None]], Dict[str, Any]]) -> JobQueue:
+    """Returns the shared job queue configured from the environment, starting it on first use.
+
+    Args:
+        runner (Callable): Runs one job; used when the queue is created.
+    """
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            from backend.utils.llm_loader import get_llm_provider, get_provider_concurrency
+
+            db_path = os.getenv("JOB_STORE_PATH", os.path.join(".cache", "jobs.sqlite3")) or None
+            _job_queue = JobQueue(
+                runner,
+                max_workers=int(os.getenv("JOB_MAX_WORKERS", get_provider_concurrency(get_llm_provider()))),
+                max_queued=int(os.getenv("JOB_MAX_QUEUED", "32")),
+                retry_after=int(os.getenv("LLM_RETRY_AFTER_SECONDS", "5")),
+                db_path=db_path,
+                ttl_seconds=float(os.getenv("JOB_TTL_SECONDS", str(7 * 86400))),
+            )
+            logging.info(f"Story job queue started with {_job_queue.max_workers} workers; jobs are kept "
+                         f"{f'in {db_path}' if db_path else 'in memory only'}.")
+        return _job_queue
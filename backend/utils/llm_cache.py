@@ -0,0 +1,248 @@
+# utils/llm_cache.py
+# This module caches LLM responses, keyed on a hash of the model, temperature, prompt,
+# task and prompt template version, in an in-memory LRU tier backed by a persistent
+# SQLite tier.
+
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from backend.prompts.registry import get_prompt_registry
+from backend.utils.single_flight import SingleFlight
+
+# Set per request to skip cached responses, e.g. when a story must be generated fresh
+_bypass_cache = contextvars.ContextVar("bypass_llm_cache", default=False)
+
+_llm_flights = SingleFlight("llm_call")
+
+
+@contextmanager
+def cache_bypass(enabled: bool = True):
+    """Skips cache lookups for LLM calls made inside the block (fresh responses are still stored)."""
+    token = _bypass_cache.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass_cache.reset(token)
+
+
+def make_cache_key(model: str, temperature: Any, messages: Any, task: str = "", prompt: str = "") -> str:
+    """Builds the content-addressed key for an LLM call.
+
+    Args:
+        model (str): The model name.
+        temperature (Any): The sampling temperature.
+        messages (Any): The prompt, as a string or a list of chat messages.
+        task (str, optional): The description of the task the call belongs to.
+        prompt (str, optional): The key (name, version and hash) of the prompt template the
+            task was rendered from, so bumping a template's version retires its responses.
+
+    Returns:
+        str: A SHA-256 hex digest.
+    """
+    fields = {"model": model, "temperature": temperature, "messages": messages, "task": task}
+    if prompt:
+        fields["prompt"] = prompt
+    payload = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """A two-tier response cache: an in-memory LRU in front of a SQLite file.
+
+    Args:
+        max_entries (int): The maximum number of responses kept in memory.
+        ttl_seconds (float): How long a response stays valid in either tier.
+        db_path (str, optional): The SQLite file for the persistent tier. None disables it.
+        max_disk_bytes (int): The maximum total size of responses kept on disk.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 86400, db_path: Optional[str] = None,
+                 max_disk_bytes: int = 100 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0,
+            "bytes_served": 0, "bytes_stored": 0, "evictions": 0, "expired": 0,
+        }
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached response for a key, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    self._stats["bytes_served"] += len(value)
+                    return value
+                del self._memory[key]
+                self._stats["expired"] += 1
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if now - created_at <= self.ttl_seconds:
+                        self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, value, created_at)
+                        self._stats["disk_hits"] += 1
+                        self._stats["bytes_served"] += len(value)
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._stats["expired"] += 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: str):
+        """Stores a response in both tiers, evicting old entries to stay within limits."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            self._stats["bytes_stored"] += len(value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), now, now),
+                )
+                self._evict_disk(now)
+                self._db.commit()
+
+    def _remember(self, key: str, value: str, created_at: float):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _evict_disk(self, now: float):
+        self._db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        # Drop the least recently used responses until the tier fits again
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            if total <= self.max_disk_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self._stats["evictions"] += 1
+
+    def record_bypass(self):
+        with self._lock:
+            self._stats["bypassed"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss/byte counters and the current size of each tier."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            if self._db is not None:
+                stats["disk_entries"], stats["disk_bytes"] = self._db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                ).fetchone()
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Returns the shared response cache configured from the environment, or None if disabled."""
+    global _cache
+    if os.getenv("LLM_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMResponseCache(
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256")),
+                ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400")),
+                db_path=os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite3")) or None,
+                max_disk_bytes=int(float(os.getenv("LLM_CACHE_MAX_DISK_MB", "100")) * 1024 * 1024),
+            )
+        return _cache
+
+
+def install_llm_cache(llm, cache: Optional[LLMResponseCache] = None):
+    """Wraps `llm.call` so plain text completions are served from and stored in the cache.
+
+    Calls that pass tools or functions, ask for a structured response model, or run inside
+    `cache_bypass()` always reach the provider. Concurrent misses for the same key share
+    a single provider call.
+
+    Args:
+        llm: The CrewAI LLM instance returned by `load_llm`.
+        cache (LLMResponseCache, optional): The cache to use. Defaults to the shared cache.
+
+    Returns:
+        The same LLM instance.
+    """
+    cache = cache or get_llm_cache()
+    if cache is None:
+        return llm
+
+    call = llm.call
+
+    def cached_call(messages, *args, **kwargs):
+        if args or kwargs.get("tools") or kwargs.get("available_functions") or kwargs.get("response_model"):
+            return call(messages, *args, **kwargs)
+
+        from_task = kwargs.get("from_task")
+        description = getattr(from_task, "description", "") or ""
+        template = get_prompt_registry().identify(description)
+        key = make_cache_key(
+            model=getattr(llm, "model", ""),
+            temperature=getattr(llm, "temperature", None),
+            messages=messages,
+            task=description,
+            prompt=template.key if template else "",
+        )
+        if _bypass_cache.get():
+            cache.record_bypass()
+            return call_and_store(key, messages, *args, **kwargs)
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+        # A miss whose prompt is already on its way to the provider waits for that response
+        return _llm_flights.do(key, call_and_store, key, messages, *args, **kwargs)
+
+    def call_and_store(key, messages, *args, **kwargs):
+        response = call(messages, *args, **kwargs)
+        if isinstance(response, str) and response:
+            cache.set(key, response)
+        return response
+
+    # Set on the instance so the wrapper survives CrewAI's pydantic field handling
+    object.__setattr__(llm, "call", cached_call)
+    logging.info("LLM response cache enabled.")
+    return llm
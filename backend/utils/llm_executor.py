@@ -0,0 +1,224 @@
+# utils/llm_executor.py
+# This module runs blocking LLM work (crew kickoffs) off the FastAPI event loop on
+# bounded per-provider thread pools, rejecting work once the queue is full. It also
+# limits the provider calls themselves: one story runs several stages in parallel, so
+# every call, whichever request, job or background stage makes it, takes one of the
+# provider's call slots. Background calls (speculative stages) only take a slot that no
+# request's call is waiting for.
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+from backend.utils.llm_loader import get_llm_provider, get_provider_concurrency
+
+
+# Set while the calls of this context are background work that must give way to requests
+_background = contextvars.ContextVar("llm_background_calls", default=False)
+
+
+@contextmanager
+def background_calls():
+    """Marks the LLM calls made in the block as background work (see `LLMExecutor.call_slot`)."""
+    token = _background.set(True)
+    try:
+        yield
+    finally:
+        _background.reset(token)
+
+
+class ExecutorOverloadedError(Exception):
+    """Raised when a provider already has as much work queued as it is allowed to."""
+
+    def __init__(self, provider: str, retry_after: int):
+        super().__init__(f"Too many pending LLM requests for provider '{provider}'.")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+class LLMExecutor:
+    """A bounded thread pool for one LLM provider.
+
+    At most `max_concurrency` jobs run at once and at most `max_queue_depth` more wait
+    for a free worker. Anything beyond that is rejected with ExecutorOverloadedError.
+    A job keeps its place until its worker has finished, even if the caller stopped
+    waiting for it. Separately, at most `max_concurrency` LLM calls run at once (see
+    `call_slot`).
+
+    Args:
+        provider (str): The provider this executor serves.
+        max_concurrency (int): The number of jobs, and of LLM calls, that may run at once.
+        max_queue_depth (int): The number of jobs that may wait for a worker.
+        retry_after (int): Seconds a rejected client should wait before retrying.
+    """
+
+    def __init__(self, provider: str, max_concurrency: int, max_queue_depth: int, retry_after: int):
+        self.provider = provider
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.retry_after = retry_after
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=f"llm-{provider.lower()}")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+        self._calls = threading.Condition()
+        self._calls_running = 0
+        self._calls_waiting = 0
+        self._foreground_waiting = 0
+
+    def _admit(self):
+        with self._lock:
+            if self._in_flight >= self.max_concurrency + self.max_queue_depth:
+                self._rejected += 1
+                raise ExecutorOverloadedError(self.provider, self.retry_after)
+            self._in_flight += 1
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> "asyncio.Future":
+        """Schedules a blocking callable on the pool and returns an awaitable future.
+
+        Admission is decided immediately, so callers can reject a request before they
+        start responding to it.
+
+        Raises:
+            ExecutorOverloadedError: If the queue for this provider is full.
+        """
+        self._admit()
+        try:
+            loop = asyncio.get_running_loop()
+            # Copy the caller's context so request-scoped context variables reach the worker
+            call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+            job = self._pool.submit(call)
+        except Exception:
+            self._release()
+            raise
+        # Released when the worker is done (or the job is cancelled before it starts), not
+        # when the caller stops waiting: a cancelled request's worker still runs its LLM calls
+        job.add_done_callback(lambda _: self._release())
+        return asyncio.wrap_future(job, loop=loop)
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Runs a blocking callable on the pool without blocking the event loop.
+
+        Raises:
+            ExecutorOverloadedError: If the queue for this provider is full.
+        """
+        return await self.submit(fn, *args, **kwargs)
+
+    @contextmanager
+    def call_slot(self, background: bool = False):
+        """Holds one of the provider's `max_concurrency` LLM call slots for the block,
+        waiting until one is free.
+
+        Args:
+            background (bool, optional): Whether the call is background work. A background
+                call only takes a free slot while no other call is waiting for one. A request
+                can still wait for a background call that had already started.
+        """
+        with self._calls:
+            self._calls_waiting += 1
+            if not background:
+                self._foreground_waiting += 1
+            try:
+                if background:
+                    self._calls.wait_for(lambda: self._calls_running < self.max_concurrency and not self._foreground_waiting)
+                else:
+                    self._calls.wait_for(lambda: self._calls_running < self.max_concurrency)
+            finally:
+                self._calls_waiting -= 1
+                if not background:
+                    self._foreground_waiting -= 1
+                    if not self._foreground_waiting:
+                        # Background calls may take any slot this call has left free
+                        self._calls.notify_all()
+            self._calls_running += 1
+        try:
+            yield
+        finally:
+            with self._calls:
+                self._calls_running -= 1
+                # Background and request calls wait for different conditions, so all are woken
+                self._calls.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the current load of this executor."""
+        with self._calls:
+            calls_running, calls_waiting = self._calls_running, self._calls_waiting
+        with self._lock:
+            return {
+                "provider": self.provider,
+                "max_concurrency": self.max_concurrency,
+                "max_queue_depth": self.max_queue_depth,
+                "in_flight": self._in_flight,
+                "queued": max(0, self._in_flight - self.max_concurrency),
+                "rejected": self._rejected,
+                "calls_running": calls_running,
+                "calls_waiting": calls_waiting,
+            }
+
+
+_executors: Dict[str, LLMExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_llm_executor(provider: str = None) -> LLMExecutor:
+    """Returns the shared executor for a provider, creating it on first use.
+
+    Args:
+        provider (str, optional): The provider name. Defaults to the configured LLM_PROVIDER.
+
+    Returns:
+        LLMExecutor: The executor for the provider.
+    """
+    provider = provider or get_llm_provider()
+    with _executors_lock:
+        if provider not in _executors:
+            _executors[provider] = LLMExecutor(
+                provider=provider,
+                max_concurrency=get_provider_concurrency(provider),
+                max_queue_depth=int(os.getenv("LLM_MAX_QUEUE_DEPTH", "16")),
+                retry_after=int(os.getenv("LLM_RETRY_AFTER_SECONDS", "5")),
+            )
+            logging.info(f"Created LLM executor for '{provider}' with {_executors[provider].max_concurrency} workers.")
+        return _executors[provider]
+
+
+async def run_llm_call(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Runs blocking LLM work on the executor of the configured provider."""
+    return await get_llm_executor().run(fn, *args, **kwargs)
+
+
+def install_call_limit(llm, executor: LLMExecutor = None):
+    """Wraps `llm.call` so each provider call holds one of the executor's call slots.
+
+    Install it inside the response cache, so cache hits do not take a slot, and outside
+    the metrics wrapper, so time spent waiting for a slot is not counted as LLM time.
+    Calls made inside `background_calls()` are background calls.
+
+    Args:
+        llm: The CrewAI LLM instance returned by `load_llm`.
+        executor (LLMExecutor, optional): The executor whose slots are used. Defaults to
+            the executor of the configured provider.
+
+    Returns:
+        The same LLM instance.
+    """
+    executor = executor or get_llm_executor()
+    call = llm.call
+
+    def limited_call(*args, **kwargs):
+        with executor.call_slot(background=_background.get()):
+            return call(*args, **kwargs)
+
+    # Set on the instance so the wrapper survives CrewAI's pydantic field handling
+    object.__setattr__(llm, "call", limited_call)
+    return llm
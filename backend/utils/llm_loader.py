@@ -2,26 +2,56 @@
 # This module loads the LLM based on the LLM_PROVIDER environment variable.
 
 import os
-from crewai import LLM
+import threading
+from typing import Dict
+from backend.utils.llm_cache import install_llm_cache
+from backend.utils.metrics import install_llm_metrics
+
+_shared_llm = None
+_shared_llm_lock = threading.Lock()
 
 def load_llm():
     """Loads the LLM (Large Language Model) based on the LLM_PROVIDER environment variable.
 
-    Supports 'OLLAMA' for local Ollama models and 'GEMINI' for Google Gemini API.
+    Supports 'OLLAMA' for local Ollama models, 'GEMINI' for Google Gemini API, 'FAKE'
+    for the local stand-in used by the benchmarks (configured with FAKE_LLM_* variables)
+    and 'ROUTER', which routes each call to one of the backends in LLM_BACKENDS
+    (see utils/llm_router.py).
 
     Returns:
         LLM: An instance of the CrewAI LLM or Langchain ChatGoogleGenerativeAI.
     """
     llm_provider = os.getenv("LLM_PROVIDER")
+    if llm_provider == "ROUTER":
+        from backend.utils.llm_router import load_router
+        return load_router()
+    return load_provider_llm(llm_provider)
+
+def load_provider_llm(llm_provider: str, model: str = None, options: Dict[str, str] = None):
+    """Loads the LLM of a single provider.
+
+    Args:
+        llm_provider (str): 'OLLAMA', 'GEMINI' or 'FAKE'.
+        model (str, optional): The model name. Defaults to OLLAMA_MODEL or GEMINI_MODEL.
+        options (dict, optional): Settings for the FAKE provider, e.g. {"latency_ms": "800"}.
+
+    Returns:
+        LLM: An instance of the CrewAI LLM.
+    """
+    # Imported here so that importing the backend does not pull in crewai/litellm
+    from crewai import LLM
+
+    # Stream responses so the streaming endpoint can pass tokens through as they arrive
+    stream = os.getenv("LLM_STREAM", "false").lower() == "true"
 
     if llm_provider == "OLLAMA":
         base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-        model_name = os.getenv("OLLAMA_MODEL", "ollama/gemma3n:latest")
-        return LLM(model=model_name, base_url=base_url)
+        model_name = model or os.getenv("OLLAMA_MODEL", "ollama/gemma3n:latest")
+        return LLM(model=model_name, base_url=base_url, stream=stream)
     elif llm_provider == "GEMINI":
         gemini_api_key = os.getenv("GEMINI_API_KEY")
         # Get the model name without the "models/" prefix
-        raw_gemini_model = os.getenv("GEMINI_MODEL", "gemini-1.5-flash-latest")
+        raw_gemini_model = model or os.getenv("GEMINI_MODEL", "gemini-1.5-flash-latest")
         if raw_gemini_model.startswith("models/"):
             raw_gemini_model = raw_gemini_model.replace("models/", "")
 
@@ -35,7 +65,53 @@ def load_llm():
         return LLM(
             api_key=gemini_api_key,
             model=formatted_gemini_model,
-            temperature=0.7 # Keep temperature if it's a common setting
+            temperature=0.7, # Keep temperature if it's a common setting
+            stream=stream
         )
+    elif llm_provider == "FAKE":
+        from backend.utils.fake_llm import FakeLLM
+        return FakeLLM.from_env(**(options or {}))
     else:
-        raise ValueError("LLM_PROVIDER environment variable not set or has an unsupported value. Set to 'OLLAMA' or 'GEMINI'.")
+        raise ValueError("LLM_PROVIDER environment variable not set or has an unsupported value. Set to 'OLLAMA', 'GEMINI', 'FAKE' or 'ROUTER'.")
+
+def get_llm():
+    """Returns the LLM shared by the whole backend, loading it on first use.
+
+    The instance is created once per process, with metrics, the provider's call limit
+    (see utils/llm_executor.py) and the response cache installed.
+
+    Returns:
+        LLM: The shared CrewAI LLM instance.
+    """
+    global _shared_llm
+    if _shared_llm is None:
+        with _shared_llm_lock:
+            if _shared_llm is None:
+                from backend.utils.llm_executor import install_call_limit
+                _shared_llm = install_llm_cache(install_call_limit(install_llm_metrics(load_llm())))
+    return _shared_llm
+
+
+# Default number of LLM-backed requests each provider may run at once.
+# A local Ollama server serializes generations, while hosted APIs handle more in parallel.
+# Other providers default to 4. With LLM_PROVIDER=ROUTER, ROUTER_MAX_CONCURRENCY covers all its backends.
+PROVIDER_DEFAULT_CONCURRENCY = {"OLLAMA": 2, "GEMINI": 8, "ROUTER": 4}
+
+def get_llm_provider() -> str:
+    """Returns the configured LLM provider name (e.g. 'OLLAMA' or 'GEMINI')."""
+    return os.getenv("LLM_PROVIDER", "")
+
+def get_provider_concurrency(llm_provider: str) -> int:
+    """Returns the maximum number of concurrent LLM-backed requests for a provider.
+
+    The limit can be overridden with the `<PROVIDER>_MAX_CONCURRENCY` environment variable,
+    e.g. `OLLAMA_MAX_CONCURRENCY=1`.
+
+    Args:
+        llm_provider (str): The provider name as set in LLM_PROVIDER.
+
+    Returns:
+        int: The concurrency limit for the provider.
+    """
+    default = PROVIDER_DEFAULT_CONCURRENCY.get(llm_provider, 4)
+    return max(1, int(os.getenv(f"{llm_provider}_MAX_CONCURRENCY", default)))
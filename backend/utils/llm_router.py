@@ -0,0 +1,324 @@
+# utils/llm_router.py
+# This module routes each LLM call to one of several configured backends (LLM_PROVIDER=ROUTER).
+# The backend is chosen per call from the agent stage making it, e.g. a small fast model for
+# the master agent, title and names and a larger one for world building and characters.
+# Each backend's latency and error rate are tracked as EWMAs. A backend that keeps failing
+# is skipped for a cool-down period and its calls fail over to the next backend, and a call
+# that runs much longer than its backend usually takes can be hedged on a second backend.
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl
+
+from crewai.llms.base_llm import BaseLLM
+
+from backend.utils.metrics import current_stage, get_metrics_registry
+
+try:
+    from crewai.llms.base_llm import call_stop_override
+except ImportError:  # Older CrewAI versions set stop words on the LLM itself; RoutedLLM.create refuses them
+    call_stop_override = None
+
+# Stage -> backend name. Applied for the backends that exist, so naming backends "fast" and
+# "large" is enough to get this policy; LLM_ROUTES overrides single stages.
+DEFAULT_ROUTES = {
+    "master_agent": "fast",
+    "title_generator": "fast",
+    "name_generator": "fast",
+    "world_builder": "large",
+    "character_creator": "large",
+    "narrative_nudger": "large",
+    "summary_writer": "large",
+    "compact_story_writer": "large",
+}
+
+# Weight of the newest sample in the latency and error rate EWMAs
+EWMA_ALPHA = 0.3
+
+# Runs the primary call of a hedged request, so the caller can stop waiting for it
+_hedge_pool = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+
+
+class BackendHealth:
+    """The latency and error rate of one backend, shared by every router that uses it.
+
+    Once the error rate EWMA reaches `max_error_rate` (two failures in a row with the
+    defaults), the backend is skipped for `cooldown_seconds`. The first call after that
+    is a probe: a success closes the circuit again, another failure reopens it.
+
+    Args:
+        name (str): The backend name.
+        max_error_rate (float): The error rate at which the backend is skipped.
+        cooldown_seconds (float): How long a failing backend is skipped.
+    """
+
+    def __init__(self, name: str, max_error_rate: float = 0.5, cooldown_seconds: float = 30):
+        self.name = name
+        self.max_error_rate = max_error_rate
+        self.cooldown_seconds = cooldown_seconds
+        self.ewma_latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.calls = 0
+        self.failures = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self.calls += 1
+            self.error_rate = EWMA_ALPHA * (0.0 if ok else 1.0) + (1 - EWMA_ALPHA) * self.error_rate
+            if ok:
+                self.ewma_latency = latency if self.ewma_latency is None else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma_latency
+                self._open_until = 0.0
+            else:
+                self.failures += 1
+                if self.error_rate >= self.max_error_rate:
+                    self._open_until = time.monotonic() + self.cooldown_seconds
+
+    def available(self) -> bool:
+        return time.monotonic() >= self._open_until
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ewma_latency_s": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+                "error_rate": round(self.error_rate, 3),
+                "calls": self.calls,
+                "failures": self.failures,
+                "available": time.monotonic() >= self._open_until,
+            }
+
+
+_health: Dict[str, BackendHealth] = {}
+_health_lock = threading.Lock()
+
+
+def get_backend_health(name: str) -> BackendHealth:
+    """Returns the shared health record of a backend, creating it on first use."""
+    with _health_lock:
+        if name not in _health:
+            _health[name] = BackendHealth(
+                name,
+                max_error_rate=float(os.getenv("LLM_BACKEND_MAX_ERROR_RATE", "0.5")),
+                cooldown_seconds=float(os.getenv("LLM_BACKEND_COOLDOWN_SECONDS", "30")),
+            )
+        return _health[name]
+
+
+def get_backend_stats() -> Dict[str, Dict[str, Any]]:
+    """Returns the health of every backend used so far, keyed by backend name."""
+    with _health_lock:
+        health = dict(_health)
+    return {name: record.stats() for name, record in health.items()}
+
+
+class RoutedLLM(BaseLLM):
+    """A CrewAI LLM that sends each call to the backend routed for the current stage.
+
+    Build it with `RoutedLLM.create`. Calls fail over to the other backends (fastest
+    first) when the routed backend fails or is cooling down. With `hedge_after` set, a
+    call that has run `hedge_after` times the backend's EWMA latency is also sent to the
+    next backend, and whichever answers first wins. Calls with tools are never hedged,
+    as a tool would run twice.
+
+    The agent executor sets its stop words on the router for the duration of a call
+    (with CrewAI's `call_stop_override`); the router applies them to the backend that
+    serves the call in the same way.
+    """
+
+    hedge_after: float = 0.0
+
+    @classmethod
+    def create(cls, backends: Dict[str, BaseLLM], routes: Dict[str, str], hedge_after: float = 0.0) -> "RoutedLLM":
+        """Builds a router over the given backends.
+
+        Args:
+            backends (dict): The backend LLMs keyed by name, in fallback order.
+            routes (dict): The backend name for each stage; "default" covers the others.
+            hedge_after (float, optional): Multiple of the EWMA latency after which a call is hedged (0 disables hedging).
+
+        Returns:
+            RoutedLLM: The router.
+
+        Raises:
+            RuntimeError: If the installed CrewAI cannot set stop words per call, which
+                the router needs to pass the agents' stop words on to its backends.
+        """
+        if call_stop_override is None:
+            raise RuntimeError("LLM_PROVIDER=ROUTER needs a CrewAI version that provides "
+                               "crewai.llms.base_llm.call_stop_override; please upgrade crewai.")
+        model = "router/" + ",".join(f"{name}={getattr(llm, 'model', '')}" for name, llm in backends.items())
+        router = cls(model=model, hedge_after=hedge_after)
+        object.__setattr__(router, "_backends", dict(backends))
+        object.__setattr__(router, "_routes", dict(routes))
+        for backend in backends.values():
+            router._forward_token_usage(backend)
+        return router
+
+    def _forward_token_usage(self, backend: BaseLLM):
+        """Reports a backend's token usage on the router too, where the crew and the metrics read it."""
+        track = getattr(backend, "_track_token_usage_internal", None)
+        if track is None:
+            return
+
+        def forward(usage_data: Dict[str, Any]):
+            track(usage_data)
+            # Looked up on each call, so wrappers installed on the router later are included
+            return self._track_token_usage_internal(usage_data)
+
+        object.__setattr__(backend, "_track_token_usage_internal", forward)
+
+    def candidates(self, stage: str) -> List[str]:
+        """Returns the backends to try for a stage: the routed one, then the others by EWMA latency."""
+        names = list(self._backends)
+        preferred = self._routes.get(stage) or self._routes.get("default") or names[0]
+
+        def latency(name: str) -> float:
+            ewma = get_backend_health(name).ewma_latency
+            return ewma if ewma is not None else 0.0
+
+        order = [preferred] + sorted((name for name in names if name != preferred), key=latency)
+        available = [name for name in order if get_backend_health(name).available()]
+        # If every backend is cooling down, try them anyway rather than failing outright
+        return available or order
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        kwargs = {
+            "tools": tools, "callbacks": callbacks, "available_functions": available_functions,
+            "from_task": from_task, "from_agent": from_agent, "response_model": response_model,
+        }
+        stage = current_stage()
+        order = self.candidates(stage)
+        last_error = None
+        for index, name in enumerate(order):
+            if index:
+                get_metrics_registry().inc("ideaweaver_llm_failovers_total", {"stage": stage, "backend": name})
+                logging.warning(f"Failing over stage '{stage}' to LLM backend '{name}'.")
+            try:
+                return self._call_hedged(name, order[index + 1:], messages, kwargs)
+            except Exception as e:
+                last_error = e
+                logging.warning(f"LLM backend '{name}' failed for stage '{stage}': {e}")
+        raise last_error
+
+    def _hedge_delay(self, name: str, alternatives: List[str], kwargs: Dict[str, Any]) -> Optional[float]:
+        if self.hedge_after <= 0 or not alternatives or kwargs["tools"] or kwargs["available_functions"]:
+            return None
+        # Two streams for the same task would interleave their chunks
+        if getattr(self._backends[name], "stream", False) or getattr(self._backends[alternatives[0]], "stream", False):
+            return None
+        ewma = get_backend_health(name).ewma_latency
+        return self.hedge_after * ewma if ewma is not None else None
+
+    def _call_hedged(self, name: str, alternatives: List[str], messages, kwargs: Dict[str, Any]):
+        delay = self._hedge_delay(name, alternatives, kwargs)
+        if delay is None:
+            return self._call_backend(name, messages, kwargs)
+
+        # Each call gets a copy of the caller's context (stage, stop words, cache bypass)
+        primary = _hedge_pool.submit(contextvars.copy_context().run, self._call_backend, name, messages, kwargs)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        hedge_name = alternatives[0]
+        logging.info(f"LLM backend '{name}' is slow ({delay:.2f}s); hedging on '{hedge_name}'.")
+        hedge = _hedge_pool.submit(contextvars.copy_context().run, self._call_backend, hedge_name, messages, kwargs)
+        running = {primary: name, hedge: hedge_name}
+        error = None
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                winner = running.pop(future)
+                if future.exception() is None:
+                    get_metrics_registry().inc("ideaweaver_llm_hedges_total", {"backend": hedge_name, "winner": winner})
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _call_backend(self, name: str, messages, kwargs: Dict[str, Any]):
+        backend = self._backends[name]
+        health = get_backend_health(name)
+        # Stop words the agent executor set for this call apply to the backend that serves it
+        stop = self.stop_sequences
+        override = call_stop_override(backend, list(stop)) if stop else nullcontext()
+        start = time.perf_counter()
+        try:
+            with override:
+                response = backend.call(messages, **kwargs)
+        except Exception:
+            health.record(time.perf_counter() - start, ok=False)
+            get_metrics_registry().inc("ideaweaver_llm_backend_calls_total", {"backend": name, "outcome": "error"})
+            raise
+        health.record(time.perf_counter() - start, ok=True)
+        get_metrics_registry().inc("ideaweaver_llm_backend_calls_total", {"backend": name, "outcome": "ok"})
+        return response
+
+    def supports_function_calling(self) -> bool:
+        return all(backend.supports_function_calling() for backend in self._backends.values())
+
+    def supports_stop_words(self) -> bool:
+        # Otherwise the agent executor trims the answers at its stop words itself
+        return all(backend.supports_stop_words() for backend in self._backends.values())
+
+    def get_context_window_size(self) -> int:
+        return min(backend.get_context_window_size() for backend in self._backends.values())
+
+
+def parse_backends(spec: str) -> List[Tuple[str, str, Optional[str], Dict[str, str]]]:
+    """Parses LLM_BACKENDS, e.g. "fast=OLLAMA:ollama/gemma3n:e2b,large=GEMINI:gemini-1.5-pro".
+
+    FAKE backends take their settings as a query string, e.g. "slow=FAKE?latency_ms=2000&failure_rate=0.3".
+
+    Returns:
+        list[tuple]: (name, provider, model, options) for each backend, in order.
+    """
+    backends = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, target = entry.partition("=")
+        target, _, query = target.partition("?")
+        provider, _, model = target.partition(":")
+        if not name or not provider:
+            raise ValueError(f"Invalid LLM_BACKENDS entry '{entry}'. Expected name=PROVIDER[:model].")
+        backends.append((name.strip(), provider.strip().upper(), model.strip() or None, dict(parse_qsl(query))))
+    return backends
+
+
+def parse_routes(spec: str) -> Dict[str, str]:
+    """Parses LLM_ROUTES, e.g. "master_agent=fast,world_builder=large,default=large"."""
+    routes = {}
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        stage, _, backend = entry.partition("=")
+        routes[stage.strip()] = backend.strip()
+    return routes
+
+
+def load_router() -> RoutedLLM:
+    """Builds a router from LLM_BACKENDS, LLM_ROUTES and LLM_HEDGE_AFTER.
+
+    Raises:
+        ValueError: If no backend is configured or a route names an unknown backend.
+    """
+    from backend.utils.llm_loader import load_provider_llm
+
+    specs = parse_backends(os.getenv("LLM_BACKENDS", ""))
+    if not specs:
+        raise ValueError("LLM_BACKENDS must name at least one backend when LLM_PROVIDER is ROUTER.")
+    backends = {name: load_provider_llm(provider, model, options) for name, provider, model, options in specs}
+
+    configured = parse_routes(os.getenv("LLM_ROUTES", ""))
+    unknown = sorted({backend for backend in configured.values() if backend not in backends})
+    if unknown:
+        raise ValueError(f"LLM_ROUTES names unknown backends: {', '.join(unknown)}")
+    routes = {stage: backend for stage, backend in DEFAULT_ROUTES.items() if backend in backends}
+    routes.update(configured)
+
+    logging.info(f"Routing LLM calls over backends {', '.join(backends)} with routes {routes}.")
+    return RoutedLLM.create(backends, routes, hedge_after=float(os.getenv("LLM_HEDGE_AFTER", "0")))
@@ -20,7 +20,7 @@ def build_markdown(final_output: Dict[str, Any]) -> str:
     age_group = final_output.get("age_group", "N/A")
     character_names = final_output.get("character_names", [])
     world_description = _clean_llm_output(final_output.get("world_description", "N/A"))
-    character_profiles = _clean_llm_output(final_output.get("character_profiles", "N/A")),
+    character_profiles = _clean_llm_output(final_output.get("character_profiles", "N/A"))
     narrative_twist_content = _clean_llm_output(final_output.get("narrative_twist", "N/A"))
     summary = final_output.get("story_summary", "N/A")
 
@@ -3,15 +3,12 @@ import re
 from typing import Dict, Any, List, Optional, Type
 from backend.agents.character_name_generator import generate_character_names
 from backend.agents.title_generator import generate_story_title
-from backend.utils.llm_loader import load_llm
+from backend.utils.llm_loader import get_llm
 
 from crewai.tools import BaseTool # Import BaseTool
 from pydantic import BaseModel, Field # Import BaseModel and Field for args_schema
 
 
-# Load LLM once for tools that need it
-_llm_for_tools = load_llm()
-
 class UserInputAndCollectedInputsInput(BaseModel):
     user_input: str = Field(..., description="The user's last input.")
     collected_inputs: Dict[str, Any] = Field(..., description="Current collected inputs dictionary.")
@@ -216,7 +213,7 @@ class ValidateAndUpdateNameChoiceTool(BaseTool):
                 num_characters = collected_inputs.get("num_characters", 0)
                 
                 if premise and age_group and num_characters > 0:
-                    generated_names = generate_character_names(_llm_for_tools, premise, age_group, num_characters)
+                    generated_names = generate_character_names(get_llm(), premise, age_group, num_characters)
                     collected_inputs["character_names_input"] = generated_names
                     return {
                         "status": "complete",
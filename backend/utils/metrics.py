@@ -0,0 +1,251 @@
+# utils/metrics.py
+# This module records in-process metrics for every agent stage (wall time, LLM time,
+# tokens, retries and parse failures) and renders them in the Prometheus text format for
+# the /metrics endpoint. It needs no tracing backend, so it also works with LangSmith off.
+
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from backend.utils.tracing import span
+
+# Upper bounds (seconds) of the duration histogram buckets
+DURATION_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, float("inf"))
+
+# Name -> (type, help) of every metric recorded by this module
+METRICS = {
+    "ideaweaver_stage_duration_seconds": ("histogram", "Wall time of each agent stage."),
+    "ideaweaver_stage_runs_total": ("counter", "Agent stage runs by outcome."),
+    "ideaweaver_llm_call_duration_seconds": ("histogram", "Time spent in LLM provider calls, by stage."),
+    "ideaweaver_llm_calls_total": ("counter", "LLM provider calls by stage and outcome."),
+    "ideaweaver_llm_tokens_total": ("counter", "Tokens reported by the LLM provider, by stage and kind."),
+    "ideaweaver_llm_retries_total": ("counter", "LLM calls made after an earlier call of the same stage run failed."),
+    "ideaweaver_parse_failures_total": ("counter", "Agent outputs that could not be parsed into the expected format."),
+    "ideaweaver_context_tokens_saved_total": ("counter", "Estimated prompt tokens saved by passing digests of earlier outputs."),
+    "ideaweaver_speculative_nodes_total": ("counter", "Story stages started during the conversation, by outcome."),
+    "ideaweaver_llm_backend_calls_total": ("counter", "Calls to each routed LLM backend, by outcome."),
+    "ideaweaver_llm_failovers_total": ("counter", "Routed LLM calls retried on another backend, by stage and backend."),
+    "ideaweaver_llm_hedges_total": ("counter", "Routed LLM calls hedged on a second backend, by hedge backend and winner."),
+    "ideaweaver_coalesced_requests_total": ("counter", "Requests that joined an identical request already in flight, by scope."),
+    "ideaweaver_llm_calls_saved_total": ("counter", "LLM provider calls avoided by coalescing identical requests, by scope."),
+    "ideaweaver_ollama_warm_requests_total": ("counter", "Ollama preload and keep-alive requests, by model, kind and outcome."),
+    "ideaweaver_ollama_load_seconds": ("histogram", "Time Ollama spent loading a model for a preload or keep-alive request."),
+}
+
+# Keys providers use for token counts in their usage data (OpenAI/LiteLLM, Gemini, Anthropic)
+TOKEN_KEYS = {
+    "prompt": ("prompt_tokens", "prompt_token_count", "input_tokens"),
+    "completion": ("completion_tokens", "candidates_token_count", "output_tokens"),
+}
+
+# Stage label used for LLM calls made outside any stage
+UNATTRIBUTED = "other"
+
+
+class _StageRun:
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.failed_calls = 0
+
+
+_current_stage: contextvars.ContextVar = contextvars.ContextVar("metrics_stage", default=None)
+# time.monotonic() of the last provider call, for components that act on idleness
+_last_llm_call_at: Optional[float] = None
+# The call lists of the enclosing count_llm_calls blocks, innermost last
+_call_counters: contextvars.ContextVar = contextvars.ContextVar("metrics_call_counters", default=())
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms keyed by metric name and labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, tuple], float] = {}
+        self._histograms: Dict[Tuple[str, tuple], List[float]] = {}
+
+    def inc(self, name: str, labels: Dict[str, str], value: float = 1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, labels: Dict[str, str], value: float):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            # Per-bucket counts, followed by the sum and the count
+            histogram = self._histograms.setdefault(key, [0] * len(DURATION_BUCKETS) + [0.0, 0])
+            histogram[next(i for i, bound in enumerate(DURATION_BUCKETS) if value <= bound)] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def counter_values(self, name: str) -> Dict[tuple, float]:
+        """Returns the current values of a counter, keyed by their sorted label pairs."""
+        with self._lock:
+            return {labels: value for (counter, labels), value in self._counters.items() if counter == name}
+
+    def render(self, extra: Iterable[Tuple[str, str, str, Dict[str, Any], float]] = ()) -> str:
+        """Renders all metrics in the Prometheus text exposition format.
+
+        Args:
+            extra (Iterable[tuple]): Additional samples as (name, type, help, labels, value),
+                e.g. gauges read from other components at scrape time.
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(value) for key, value in self._histograms.items()}
+
+        samples: Dict[str, List[str]] = {}
+        types: Dict[str, Tuple[str, str]] = dict(METRICS)
+        for (name, labels), value in sorted(counters.items()):
+            samples.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for (name, labels), histogram in sorted(histograms.items()):
+            lines = samples.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, histogram):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram[-2])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram[-1]}")
+        for name, kind, help_text, labels, value in extra:
+            types.setdefault(name, (kind, help_text))
+            samples.setdefault(name, []).append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {_format_value(value)}")
+
+        output = []
+        for name, lines in samples.items():
+            kind, help_text = types[name]
+            output.append(f"# HELP {name} {help_text}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(lines)
+        return "\n".join(output) + "\n"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Returns the process-wide metrics registry."""
+    return _registry
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Attributes the LLM calls and parse failures inside the block to an agent stage and
+    records the stage's wall time and outcome (and a trace span, if tracing is on).
+
+    Args:
+        stage (str): The stage name, e.g. "world_builder".
+    """
+    token = _current_stage.set(_StageRun(stage))
+    start = time.perf_counter()
+    status = "error"
+    try:
+        with span(stage):
+            yield
+        status = "ok"
+    finally:
+        _current_stage.reset(token)
+        _registry.observe("ideaweaver_stage_duration_seconds", {"stage": stage}, time.perf_counter() - start)
+        _registry.inc("ideaweaver_stage_runs_total", {"stage": stage, "status": status})
+
+
+def current_stage() -> str:
+    run = _current_stage.get()
+    return run.stage if run else UNATTRIBUTED
+
+
+@contextmanager
+def count_llm_calls():
+    """Counts the provider calls made inside the block, including those made in threads
+    started from it with a copy of its context.
+
+    Yields:
+        list: One entry per provider call; read its length once the block has finished.
+    """
+    calls: List[int] = []
+    token = _call_counters.set(_call_counters.get() + (calls,))
+    try:
+        yield calls
+    finally:
+        _call_counters.reset(token)
+
+
+def last_llm_call_at() -> Optional[float]:
+    """Returns the time.monotonic() of the last provider call, or None if there was none."""
+    return _last_llm_call_at
+
+
+def record_parse_failure(stage: Optional[str] = None):
+    """Counts an agent output that could not be parsed, for the given or the current stage."""
+    _registry.inc("ideaweaver_parse_failures_total", {"stage": stage or current_stage()})
+
+
+def install_llm_metrics(llm):
+    """Wraps an LLM so each provider call records its duration, outcome, retries and tokens
+    under the current stage.
+
+    Install it before the response cache, so cache hits are not counted as provider calls.
+
+    Args:
+        llm: The CrewAI LLM instance returned by `load_llm`.
+
+    Returns:
+        The same LLM instance.
+    """
+    call = llm.call
+    track_token_usage = getattr(llm, "_track_token_usage_internal", None)
+
+    def measured_call(*args, **kwargs):
+        global _last_llm_call_at
+        _last_llm_call_at = time.monotonic()
+        run = _current_stage.get()
+        stage = run.stage if run else UNATTRIBUTED
+        if run and run.failed_calls:
+            _registry.inc("ideaweaver_llm_retries_total", {"stage": stage})
+        start = time.perf_counter()
+        try:
+            response = call(*args, **kwargs)
+        except Exception:
+            if run:
+                run.failed_calls += 1
+            _registry.inc("ideaweaver_llm_calls_total", {"stage": stage, "outcome": "error"})
+            raise
+        finally:
+            _registry.observe("ideaweaver_llm_call_duration_seconds", {"stage": stage}, time.perf_counter() - start)
+            for calls in _call_counters.get():
+                calls.append(1)
+        _registry.inc("ideaweaver_llm_calls_total", {"stage": stage, "outcome": "ok"})
+        return response
+
+    def measured_token_usage(usage_data: Dict[str, Any]):
+        # Providers report usage per call, in the thread (and context) that made the call
+        stage = current_stage()
+        for kind, keys in TOKEN_KEYS.items():
+            tokens = next((usage_data[key] for key in keys if usage_data.get(key)), 0)
+            if tokens:
+                _registry.inc("ideaweaver_llm_tokens_total", {"stage": stage, "kind": kind}, int(tokens))
+        return track_token_usage(usage_data)
+
+    # Set on the instance so the wrappers survive CrewAI's pydantic field handling
+    object.__setattr__(llm, "call", measured_call)
+    if track_token_usage is not None:
+        object.__setattr__(llm, "_track_token_usage_internal", measured_token_usage)
+    else:
+        logging.warning("This LLM does not report token usage; token metrics will stay empty.")
+    return llm
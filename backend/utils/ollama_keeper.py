@@ -0,0 +1,158 @@
+# utils/ollama_keeper.py
+# This module keeps the configured Ollama models loaded. Ollama unloads a model once it
+# has been idle for its keep-alive time, and the next request then waits for the model to
+# load again (tens of seconds for gemma3n). The keeper preloads the models at startup and,
+# while the backend has been used within a configurable window, re-sends a keep-alive
+# request before the models would be unloaded.
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from backend.utils.health import configured_backends, ollama_model_name
+from backend.utils.metrics import get_metrics_registry, last_llm_call_at
+
+
+class OllamaWarmKeeper:
+    """Preloads Ollama models and keeps them loaded while the backend is in use.
+
+    Args:
+        base_url (str): The Ollama server URL.
+        models (list[str]): The models to keep loaded, as configured (e.g. "ollama/gemma3n:latest").
+        keep_alive (str): How long Ollama keeps a model loaded after each request, e.g. "10m".
+        interval (float): Seconds between keep-alive requests. Keep it below `keep_alive`.
+        window (float): Keep models loaded only while the last LLM call (or startup) was at most
+            this many seconds ago. 0 keeps them loaded for as long as the backend runs.
+        timeout (float): Seconds a preload or keep-alive request may take, including loading the model.
+    """
+
+    def __init__(self, base_url: str, models: List[str], keep_alive: str = "10m", interval: float = 120,
+                 window: float = 3600, timeout: float = 300):
+        self.base_url = base_url.rstrip("/")
+        self.models = list(dict.fromkeys(ollama_model_name(model) for model in models))
+        self.keep_alive = keep_alive
+        self.interval = interval
+        self.window = window
+        self.timeout = timeout
+        self._started_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, Any]] = {model: {"warm_requests": 0, "failures": 0} for model in self.models}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Preloads the models and starts the keep-alive requests, in a background thread."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="ollama-keeper", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        kind = "preload"
+        while not self._stop.is_set():
+            if kind == "preload" or self.in_window():
+                for model in self.models:
+                    self.warm(model, kind)
+            kind = "keep_alive"
+            self._stop.wait(self.interval)
+
+    def in_window(self) -> bool:
+        """Returns whether the backend was used recently enough to keep the models loaded."""
+        if self.window <= 0:
+            return True
+        last_used = max(last_llm_call_at() or 0.0, self._started_at)
+        return time.monotonic() - last_used <= self.window
+
+    def warm(self, model: str, kind: str = "keep_alive") -> bool:
+        """Loads a model (if it is not loaded) and resets its keep-alive time.
+
+        Sends a generate request without a prompt, which Ollama answers once the model is loaded.
+
+        Returns:
+            bool: True if Ollama answered.
+        """
+        start = time.perf_counter()
+        try:
+            response = requests.post(
+                f"{self.base_url}/api/generate",
+                json={"model": model, "keep_alive": self.keep_alive, "stream": False},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            load_seconds = response.json().get("load_duration", 0) / 1e9
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logging.warning(f"Ollama {kind} request for '{model}' failed: {e}")
+            get_metrics_registry().inc("ideaweaver_ollama_warm_requests_total", {"model": model, "kind": kind, "outcome": "error"})
+            with self._lock:
+                self._state[model]["failures"] += 1
+                self._state[model]["last_error"] = str(e)
+            return False
+
+        elapsed = time.perf_counter() - start
+        registry = get_metrics_registry()
+        registry.inc("ideaweaver_ollama_warm_requests_total", {"model": model, "kind": kind, "outcome": "ok"})
+        registry.observe("ideaweaver_ollama_load_seconds", {"model": model}, load_seconds)
+        # A load of more than a fraction of a second means the model had been unloaded
+        if load_seconds > 0.5:
+            logging.info(f"Loaded Ollama model '{model}' in {load_seconds:.1f}s ({kind}).")
+        with self._lock:
+            state = self._state[model]
+            state["warm_requests"] += 1
+            state.update(last_kind=kind, last_warmed_at=time.time(), last_request_s=round(elapsed, 3),
+                         last_load_s=round(load_seconds, 3), last_error=None)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the keeper settings and the warm-up history of each model."""
+        with self._lock:
+            models = {model: dict(state) for model, state in self._state.items()}
+        return {
+            "base_url": self.base_url,
+            "keep_alive": self.keep_alive,
+            "interval_s": self.interval,
+            "window_s": self.window,
+            "in_window": self.in_window(),
+            "models": models,
+        }
+
+
+def configured_ollama_models() -> List[str]:
+    """Returns the Ollama models the backend is configured to use (directly or as router backends)."""
+    return [model or os.getenv("OLLAMA_MODEL", "ollama/gemma3n:latest")
+            for _, provider, model in configured_backends() if provider == "OLLAMA"]
+
+
+_keeper: Optional[OllamaWarmKeeper] = None
+_keeper_lock = threading.Lock()
+
+
+def get_ollama_keeper() -> Optional[OllamaWarmKeeper]:
+    """Returns the shared warm-keeper, starting it on first use.
+
+    Returns None if no Ollama model is configured or OLLAMA_KEEP_WARM is false.
+    """
+    global _keeper
+    if os.getenv("OLLAMA_KEEP_WARM", "true").lower() != "true":
+        return None
+    with _keeper_lock:
+        if _keeper is None:
+            models = configured_ollama_models()
+            if not models:
+                return None
+            _keeper = OllamaWarmKeeper(
+                base_url=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
+                models=models,
+                keep_alive=os.getenv("OLLAMA_KEEP_ALIVE", "10m"),
+                interval=float(os.getenv("OLLAMA_KEEP_WARM_INTERVAL", "120")),
+                window=float(os.getenv("OLLAMA_KEEP_WARM_WINDOW", "3600")),
+            )
+            _keeper.start()
+            logging.info(f"Keeping Ollama models warm: {', '.join(_keeper.models)} (keep_alive {_keeper.keep_alive}).")
+        return _keeper
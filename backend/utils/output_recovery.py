@@ -0,0 +1,120 @@
+# utils/output_recovery.py
+# This module recovers JSON values from raw LLM output. Instead of retrying a chain of
+# cleanups, a single tolerant scan finds the first balanced object or list and repairs
+# the usual LLM mistakes on the way: surrounding prose and code fences, raw newlines in
+# strings, single-quoted (Python-style) strings, unescaped inner quotes, Python literals,
+# trailing commas and doubled braces. A value that is already valid JSON is decoded in
+# place by the json module, from the first opener, without the scan.
+
+import json
+import re
+from typing import Any, Optional
+
+# One token per match, so the text is scanned once by the regex engine rather than by a
+# Python loop. A quote only closes a string when it is followed by `,` `:` `}` `]` or the
+# end of the text; any other quote is treated as part of the string. Runs of plain string
+# characters are matched whole (`(?=(...))\1` keeps the engine from splitting them again),
+# so a long string costs one step rather than one per character.
+_TOKEN = re.compile(
+    r'"(?:(?=([^"\\]+))\1|\\.|"(?!\s*(?:[,:}\]]|$)))*"'
+    r"|'(?:(?=([^'\\]+))\2|\\.|'(?!\s*(?:[,:}\]]|$)))*'"
+    r"|[{}\[\]]"
+    r"|[A-Za-z_]+"
+    r"|[^\"'{}\[\]A-Za-z_]+"
+    r"|[\"']",
+    re.DOTALL,
+)
+_UNESCAPED_DOUBLE_QUOTE = re.compile(r'(?<!\\)"')
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_OPENERS = {"{": "}", "[": "]"}
+# strict=False accepts raw newlines and tabs inside strings
+_DECODER = json.JSONDecoder(strict=False)
+
+
+def _repair_string(token: str) -> str:
+    """Returns a string token as a double-quoted JSON string."""
+    body = token[1:-1]
+    if token[0] == "'":
+        body = body.replace("\\'", "'")
+    if '"' in body:
+        body = _UNESCAPED_DOUBLE_QUOTE.sub(r'\\"', body)
+    return f'"{body}"'
+
+
+def scan_balanced(text: str, start: int) -> Optional[str]:
+    """Scans one balanced object or list starting at `text[start]` and returns it as JSON text.
+
+    Args:
+        text (str): The raw output.
+        start (int): The index of the opening `{` or `[`.
+
+    Returns:
+        str | None: The repaired JSON text, or None if the value is never closed.
+    """
+    out = []
+    depth = 0
+    for match in _TOKEN.finditer(text, start):
+        token = match.group()
+        first = token[0]
+        if first in "{[":
+            depth += 1
+            out.append(token)
+        elif first in "}]":
+            # Drop a trailing comma before the closing bracket
+            if out and out[-1].rstrip().endswith(","):
+                out[-1] = out[-1].rstrip()[:-1]
+            depth -= 1
+            out.append(token)
+            if depth == 0:
+                return "".join(out)
+        elif first in "\"'":
+            if len(token) == 1:
+                return None  # A quote that is never closed
+            out.append(_repair_string(token))
+        elif first.isalpha() or first == "_":
+            out.append(_PYTHON_LITERALS.get(token, token))
+        else:
+            out.append(token)
+    return None
+
+
+def recover_json(text: str, opener: str = "{") -> Any:
+    """Parses the first JSON object (or list) in raw LLM output, repairing it if needed.
+
+    A well-formed value at the first `opener` in the text is decoded directly, whatever
+    surrounds it. Otherwise that value is scanned and repaired. A value nested inside it is never
+    returned in its place: if the outer value cannot be recovered, nothing is.
+
+    Args:
+        text (str): The raw output.
+        opener (str, optional): "{" to recover an object, "[" to recover a list.
+
+    Returns:
+        dict | list: The recovered value.
+
+    Raises:
+        json.JSONDecodeError: If the text holds no value of the expected kind that can be recovered.
+    """
+    text = text or ""
+    expected = dict if opener == "{" else list
+    start = text.find(opener)
+    if start == -1:
+        raise json.JSONDecodeError(f"No '{opener}' found in the output", text, 0)
+    # Valid JSON at the first opener, wrapped in prose or fences or not, is decoded as is
+    try:
+        value, _ = _DECODER.raw_decode(text, start)
+        if isinstance(value, expected):
+            return value
+    except ValueError:
+        pass
+
+    candidate = scan_balanced(text, start)
+    if candidate is None:
+        raise json.JSONDecodeError(f"The value starting with '{opener}' is never closed", text, start)
+    # `{{ ... }}`, as produced by models copying an escaped prompt template
+    if candidate.startswith(opener * 2) and candidate.endswith(_OPENERS[opener] * 2):
+        candidate = candidate[1:-1]
+    value = _DECODER.decode(candidate)
+    if not isinstance(value, expected):
+        raise json.JSONDecodeError(f"The recovered value is a {type(value).__name__}, not a {expected.__name__}", text, start)
+    return value
@@ -0,0 +1,87 @@
+# utils/rate_limiter.py
+# This module limits how many LLM calls per minute are sent to a provider, using a
+# token bucket shared by every thread that calls the LLM.
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from backend.utils.llm_loader import get_llm_provider
+
+
+class RateLimiter:
+    """A thread-safe token bucket.
+
+    Args:
+        rate_per_minute (float): The sustained number of calls allowed per minute.
+        burst (int, optional): The number of calls that may be made back to back. Defaults to 1.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a call is allowed."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate_per_second
+            time.sleep(wait)
+
+
+_limiters: Dict[str, Optional[RateLimiter]] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str = None) -> Optional[RateLimiter]:
+    """Returns the shared rate limiter for a provider, or None if it is not rate limited.
+
+    The limit is read from `<PROVIDER>_REQUESTS_PER_MINUTE` (e.g. `GEMINI_REQUESTS_PER_MINUTE=60`)
+    and the burst size from `<PROVIDER>_REQUESTS_BURST`.
+
+    Args:
+        provider (str, optional): The provider name. Defaults to the configured LLM_PROVIDER.
+    """
+    provider = provider or get_llm_provider()
+    with _limiters_lock:
+        if provider not in _limiters:
+            rate = float(os.getenv(f"{provider}_REQUESTS_PER_MINUTE", "0"))
+            burst = int(os.getenv(f"{provider}_REQUESTS_BURST", "1"))
+            _limiters[provider] = RateLimiter(rate, burst) if rate > 0 else None
+        return _limiters[provider]
+
+
+def install_rate_limit(llm, limiter: Optional[RateLimiter]):
+    """Wraps `llm.call` so that every call first waits for the rate limiter.
+
+    Args:
+        llm: The CrewAI LLM instance.
+        limiter (RateLimiter | None): The limiter to use. None leaves the LLM unchanged.
+
+    Returns:
+        The same LLM instance.
+    """
+    if limiter is None:
+        return llm
+
+    call = llm.call
+
+    def rate_limited_call(*args, **kwargs):
+        limiter.acquire()
+        return call(*args, **kwargs)
+
+    # Set on the instance so the wrapper survives CrewAI's pydantic field handling
+    object.__setattr__(llm, "call", rate_limited_call)
+    logging.info(f"LLM calls limited to {limiter.rate_per_second * 60:g} per minute.")
+    return llm
@@ -0,0 +1,95 @@
+# utils/runtime_profile.py
+# This module holds the runtime profile (IDEA_WEAVER_PROFILE=dev or prod) and what it
+# controls: whether CrewAI agents and crews print their step-by-step output, how logging
+# is written, and how much of a request payload ends up in the logs. "dev" keeps the
+# verbose behaviour for local work; "prod" keeps formatting and stdout I/O off the
+# request path.
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+from typing import Any, Optional
+
+PROFILES = ("dev", "prod")
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+# Keys whose values are never logged
+_SECRET_KEY = re.compile(r"api_?key|token|secret|password|authorization", re.IGNORECASE)
+
+
+def get_runtime_profile() -> str:
+    """Returns the configured runtime profile, "dev" (the default) or "prod"."""
+    profile = os.getenv("IDEA_WEAVER_PROFILE", "dev").lower()
+    if profile not in PROFILES:
+        logging.warning(f"Unknown IDEA_WEAVER_PROFILE '{profile}'; using 'dev'.")
+        return "dev"
+    return profile
+
+
+def agent_verbose() -> bool:
+    """Returns whether CrewAI agents and crews print their steps (AGENT_VERBOSE, else on in the dev profile)."""
+    return os.getenv("AGENT_VERBOSE", str(get_runtime_profile() == "dev")).lower() == "true"
+
+
+def _max_payload_chars() -> int:
+    return int(os.getenv("LOG_MAX_PAYLOAD_CHARS", "2000" if get_runtime_profile() == "dev" else "300"))
+
+
+def _redact(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: "[redacted]" if _SECRET_KEY.search(str(key)) else _redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_redact(item) for item in value]
+    return value
+
+
+def redact_payload(value: Any, max_chars: Optional[int] = None) -> str:
+    """Formats a request payload for a log line: secrets redacted, compact, and truncated.
+
+    Args:
+        value (Any): The payload, e.g. the collected inputs or an LLM response.
+        max_chars (int, optional): The longest text logged. Defaults to LOG_MAX_PAYLOAD_CHARS
+            (2000 in the dev profile, 300 in prod).
+
+    Returns:
+        str: The text to log.
+    """
+    max_chars = max_chars or _max_payload_chars()
+    text = value if isinstance(value, str) else json.dumps(_redact(value), ensure_ascii=False, default=str)
+    if len(text) > max_chars:
+        return f"{text[:max_chars]}... [{len(text) - max_chars} more chars]"
+    return text
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging():
+    """Moves the root logger's handlers behind a queue, so logging calls only enqueue the record.
+
+    A background thread writes the records through the original handlers (a stream handler
+    if there were none). The level comes from LOG_LEVEL (default INFO). Calling it again
+    does nothing.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    root = logging.getLogger()
+    handlers = root.handlers[:] or [logging.StreamHandler()]
+    for handler in handlers:
+        if handler.formatter is None:
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    records: "queue.Queue[logging.LogRecord]" = queue.Queue()
+    root.handlers = [logging.handlers.QueueHandler(records)]
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    # Write out what is still queued when the process exits
+    atexit.register(_listener.stop)
+    logging.info(f"Runtime profile '{get_runtime_profile()}': agent output {'on' if agent_verbose() else 'off'}, "
+                 f"logging through a background queue.")
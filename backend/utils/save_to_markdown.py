@@ -7,16 +7,22 @@ import logging
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def save_to_markdown(title: str, content: str, output_dir: str = "outputs"):
+def save_to_markdown(title: str, content: str, output_dir: str = None):
     """Saves the generated story content to a markdown file.
 
     The filename is derived from the story title, with special characters sanitized.
+    Stories that share a title get a numbered filename instead of overwriting each other.
 
     Args:
         title (str): The title of the story, used to create the filename.
         content (str): The markdown content of the story to be saved.
-        output_dir (str, optional): The directory where the markdown file will be saved. Defaults to "outputs".
+        output_dir (str, optional): The directory where the markdown file will be saved.
+            Defaults to MARKDOWN_OUTPUT_DIR ("outputs").
+
+    Returns:
+        str: The path of the saved file.
     """
+    output_dir = output_dir or os.getenv("MARKDOWN_OUTPUT_DIR", "outputs")
     os.makedirs(output_dir, exist_ok=True)
 
     # Sanitize title to use as filename
@@ -24,8 +30,16 @@ def save_to_markdown(title: str, content: str, output_dir: str = "outputs"):
     safe_title = safe_title.strip().replace(" ", "_")
 
     filename = os.path.join(output_dir, f"{safe_title}.md")
-
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write(content)
+    counter = 2
+    while True:
+        # "x" fails if the file exists, so two stories saved at once never claim the same name
+        try:
+            with open(filename, "x", encoding="utf-8") as f:
+                f.write(content)
+            break
+        except FileExistsError:
+            filename = os.path.join(output_dir, f"{safe_title}_{counter}.md")
+            counter += 1
 
     print(f"\n Saved output to: {filename}")
+    return filename
@@ -0,0 +1,181 @@
+# utils/session_store.py
+# This module keeps /converse conversations on the server, so clients only send a session
+# id and the new user input each turn. Sessions live in an in-memory LRU, optionally backed
+# by a SQLite file so they survive restarts, and expire after a period of inactivity.
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+class ConversationSession:
+    """The server-side state of one conversation.
+
+    Args:
+        session_id (str): The session id.
+        history (list[str], optional): The most recent "User: ..." / "Assistant: ..." lines.
+        collected_inputs (dict, optional): The inputs collected so far.
+        last_question (str, optional): The step the next user input answers.
+        updated_at (float, optional): When the session was last used (epoch seconds).
+    """
+
+    def __init__(self, session_id: str, history: Optional[List[str]] = None,
+                 collected_inputs: Optional[Dict[str, Any]] = None, last_question: Optional[str] = None,
+                 updated_at: Optional[float] = None):
+        self.session_id = session_id
+        self.history = history or []
+        self.collected_inputs = collected_inputs or {}
+        self.last_question = last_question
+        self.updated_at = updated_at or time.time()
+
+    def prompt_history(self) -> str:
+        """Returns the retained history in the format /converse used to receive it."""
+        return "\n".join(self.history)
+
+    def record_turn(self, user_input: str, response: Dict[str, Any], max_history_lines: int):
+        """Applies a /converse response to the session.
+
+        Only the last `max_history_lines` lines are kept. Older turns add nothing the prompt
+        needs, as everything they established is already in `collected_inputs`, so the cost
+        of a turn stays flat however long the conversation runs.
+        """
+        if user_input:
+            self.history.append(f"User: {user_input}")
+        self.history.append(f"Assistant: {response.get('message', '')}")
+        del self.history[:-max_history_lines]
+        # Responses without data (e.g. errors) leave the collected inputs unchanged
+        if response.get("data"):
+            self.collected_inputs = response["data"]
+        self.last_question = response.get("last_question")
+        self.updated_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "history": self.history,
+            "collected_inputs": self.collected_inputs,
+            "last_question": self.last_question,
+        }
+
+
+class SessionStore:
+    """Conversation sessions in an in-memory LRU, optionally backed by a SQLite file.
+
+    Args:
+        max_sessions (int): The maximum number of sessions kept in memory.
+        idle_ttl_seconds (float): How long a session may go unused before it expires.
+        db_path (str, optional): The SQLite file for the persistent tier. None keeps sessions in memory only.
+        max_history_lines (int): The number of history lines kept per session.
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl_seconds: float = 3600, db_path: Optional[str] = None,
+                 max_history_lines: int = 20):
+        self.max_sessions = max_sessions
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_history_lines = max_history_lines
+        self._memory: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"created": 0, "resumed": 0, "not_found": 0, "expired": 0, "evictions": 0}
+        self._db = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+            self._db.commit()
+
+    def create(self) -> ConversationSession:
+        """Starts a new, empty session."""
+        session = ConversationSession(uuid.uuid4().hex)
+        with self._lock:
+            self._remember(session)
+            self._stats["created"] += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[ConversationSession]:
+        """Returns a session, or None if it does not exist or has expired."""
+        now = time.time()
+        with self._lock:
+            session = self._memory.get(session_id)
+            if session is None and self._db is not None:
+                row = self._db.execute("SELECT state, updated_at FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+                if row is not None:
+                    session = ConversationSession(session_id, updated_at=row[1], **json.loads(row[0]))
+
+            if session is not None and now - session.updated_at > self.idle_ttl_seconds:
+                self._forget(session_id)
+                self._stats["expired"] += 1
+                session = None
+
+            if session is None:
+                self._stats["not_found"] += 1
+                return None
+            self._remember(session)
+            self._stats["resumed"] += 1
+            return session
+
+    def save(self, session: ConversationSession):
+        """Stores the session after a turn, dropping expired sessions from the persistent tier."""
+        with self._lock:
+            self._remember(session)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO sessions (session_id, state, updated_at) VALUES (?, ?, ?)",
+                    (session.session_id, json.dumps(session.to_dict()), session.updated_at),
+                )
+                self._db.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.idle_ttl_seconds,))
+                self._db.commit()
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._forget(session_id)
+
+    def _remember(self, session: ConversationSession):
+        self._memory[session.session_id] = session
+        self._memory.move_to_end(session.session_id)
+        while len(self._memory) > self.max_sessions:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _forget(self, session_id: str):
+        self._memory.pop(session_id, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns session counters and the current size of each tier."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_sessions"] = len(self._memory)
+            if self._db is not None:
+                stats["disk_sessions"] = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return stats
+
+
+_store: Optional[SessionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Returns the shared session store configured from the environment."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            db_path = os.getenv("SESSION_STORE_PATH") or None
+            _store = SessionStore(
+                max_sessions=int(os.getenv("SESSION_MAX_ENTRIES", "1000")),
+                idle_ttl_seconds=float(os.getenv("SESSION_IDLE_TTL_SECONDS", "3600")),
+                db_path=db_path,
+                max_history_lines=int(os.getenv("SESSION_HISTORY_MAX_LINES", "20")),
+            )
+            logging.info(f"Conversation sessions are kept {f'in {db_path}' if db_path else 'in memory only'}.")
+        return _store
@@ -0,0 +1,119 @@
+# utils/single_flight.py
+# This module deduplicates identical work that is in flight at the same time. The first
+# caller for a key runs it; callers that arrive with the same key before it finishes
+# wait for its result (and can follow its events) instead of repeating its LLM calls.
+
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+from backend.utils.metrics import count_llm_calls, get_metrics_registry
+
+
+class EventBroadcast:
+    """Fans the events of one execution out to every subscriber.
+
+    `section` events are kept, so a subscriber that joins late first receives the sections
+    it missed. Other events (e.g. streamed tokens) are only passed on live.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sections: List[Dict[str, Any]] = []
+        self._subscribers: List[Callable[[Dict[str, Any]], None]] = []
+
+    def emit(self, event: Dict[str, Any]):
+        with self._lock:
+            if event.get("event") == "section":
+                self._sections.append(event)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber(event)
+
+    def subscribe(self, subscriber: Callable[[Dict[str, Any]], None]):
+        with self._lock:
+            for event in self._sections:
+                subscriber(event)
+            self._subscribers.append(subscriber)
+
+
+class Flight:
+    """One execution shared by every caller with the same key.
+
+    `future` is marked running from the start, so it cannot be cancelled: a caller that
+    stops waiting (e.g. an `asyncio.wrap_future` wrapper being cancelled) leaves the
+    result to the others, and setting it never fails.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.future: Future = Future()
+        self.future.set_running_or_notify_cancel()
+        self.followers = 0
+        self.events = EventBroadcast()
+
+
+class SingleFlight:
+    """Shares one execution between concurrent callers with the same key.
+
+    Args:
+        scope (str): The label the coalescing metrics are recorded under, e.g. "story".
+    """
+
+    def __init__(self, scope: str):
+        self.scope = scope
+        self._lock = threading.Lock()
+        self._flights: Dict[str, Flight] = {}
+
+    def join(self, key: str) -> Tuple[Flight, bool]:
+        """Returns the flight for a key and whether the caller leads it.
+
+        The leader must then call `run` (or `fail`); followers wait on `flight.future`.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = Flight(key)
+                return flight, True
+            flight.followers += 1
+        get_metrics_registry().inc("ideaweaver_coalesced_requests_total", {"scope": self.scope})
+        logging.info(f"Attached to an identical {self.scope} request already in flight.")
+        return flight, False
+
+    def run(self, flight: Flight, fn: Callable[..., Any], *args, **kwargs):
+        """Runs the leader's work and hands its result (or error) to every caller of the flight.
+
+        Errors are set on `flight.future` rather than raised.
+        """
+        error = None
+        with count_llm_calls() as calls:
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                error = e
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            followers = flight.followers
+        if followers and calls:
+            # Every follower would have made the same provider calls
+            get_metrics_registry().inc("ideaweaver_llm_calls_saved_total", {"scope": self.scope}, len(calls) * followers)
+        if error is not None:
+            flight.future.set_exception(error)
+        else:
+            flight.future.set_result(result)
+
+    def fail(self, flight: Flight, error: Exception):
+        """Ends a flight whose work could not be started, passing the error to its followers."""
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+        flight.future.set_exception(error)
+
+    def do(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Runs `fn` unless an identical call is in flight, and returns the shared result."""
+        flight, leader = self.join(key)
+        if leader:
+            self.run(flight, fn, *args, **kwargs)
+        return flight.future.result()
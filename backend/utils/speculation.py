@@ -0,0 +1,164 @@
+# utils/speculation.py
+# This module starts story stages while the conversation is still going. World building
+# only needs the premise and age group, and the title only needs those plus the title
+# choice, so both can run in the background as soon as the user has given them. Results
+# are kept per conversation session and are reused by /generate_story if the inputs they
+# were generated from are still the same. Their LLM calls are background calls: they count
+# against the provider's call limit and give way to the calls of requests.
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from backend.utils.llm_executor import background_calls, get_llm_executor
+from backend.utils.metrics import get_metrics_registry
+
+
+def _world_inputs(inputs: Dict[str, Any]) -> Optional[Tuple]:
+    if inputs.get("premise") and inputs.get("age_group"):
+        return (inputs["premise"], inputs["age_group"])
+    return None
+
+
+def _title_inputs(inputs: Dict[str, Any]) -> Optional[Tuple]:
+    if inputs.get("title_choice") == "Generate for me":
+        return _world_inputs(inputs)
+    return None
+
+
+# Pipeline node -> the inputs it is generated from, or None while they are not all known
+SPECULATIVE_NODES: Dict[str, Callable[[Dict[str, Any]], Optional[Tuple]]] = {
+    "world_description": _world_inputs,
+    "title": _title_inputs,
+}
+
+
+def _run_node(name: str, inputs: Dict[str, Any]) -> Any:
+    """Runs a single story pipeline node with the shared LLM."""
+    from backend.utils.llm_loader import get_llm
+    from backend.utils.story_pipeline import build_story_nodes, _timed_run
+
+    # Only the requested node is run, so the inputs that are not known yet are never read
+    placeholders = {"num_characters": 0, "title_choice": "", "name_choice": "", "character_names_input": None}
+    node = next(node for node in build_story_nodes(get_llm(), {**placeholders, **inputs}) if node.name == name)
+    with background_calls():
+        output, elapsed = _timed_run(node, {})
+    logging.info(f"Speculative node '{name}' finished in {elapsed:.2f}s.")
+    return output
+
+
+class Speculator:
+    """Speculative story stages, keyed by conversation session.
+
+    A stage is only started while the LLM executor has an idle worker. Its LLM calls
+    take the executor's call slots like any other, but only when no request's call is
+    waiting for one; a call that has already started is not interrupted.
+
+    Args:
+        max_workers (int): The number of speculative stages that may run at once.
+        max_sessions (int): The number of sessions whose results are kept.
+    """
+
+    def __init__(self, max_workers: int = 2, max_sessions: int = 100):
+        self.max_sessions = max_sessions
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculation")
+        self._lock = threading.Lock()
+        # session id -> node name -> (the inputs it was generated from, its future)
+        self._runs: "OrderedDict[str, Dict[str, Tuple[Tuple, Future]]]" = OrderedDict()
+
+    def update(self, session_id: str, inputs: Dict[str, Any]):
+        """Starts the stages the collected inputs allow, discarding those whose inputs changed.
+
+        Args:
+            session_id (str): The conversation session.
+            inputs (dict): The inputs collected so far.
+        """
+        executor_stats = get_llm_executor().stats()
+        idle_workers = executor_stats["max_concurrency"] - executor_stats["in_flight"]
+        with self._lock:
+            runs = self._runs.setdefault(session_id, {})
+            self._runs.move_to_end(session_id)
+            for name, key_for in SPECULATIVE_NODES.items():
+                key = key_for(inputs)
+                if name in runs and runs[name][0] != key:
+                    self._discard(name, runs.pop(name)[1])
+                if key is None or name in runs:
+                    continue
+                if idle_workers <= 0:
+                    logging.info(f"Not starting speculative node '{name}': the LLM executor is busy.")
+                    continue
+                idle_workers -= 1
+                runs[name] = (key, self._pool.submit(_run_node, name, dict(inputs)))
+                get_metrics_registry().inc("ideaweaver_speculative_nodes_total", {"node": name, "outcome": "started"})
+                logging.info(f"Started speculative node '{name}' for session {session_id}.")
+            while len(self._runs) > self.max_sessions:
+                self._discard_session(self._runs.popitem(last=False)[1])
+
+    def claim(self, session_id: Optional[str], inputs: Dict[str, Any]) -> Dict[str, Future]:
+        """Hands the session's speculative stages over to story generation.
+
+        Stages that were generated from different inputs, or that failed, are discarded.
+        The session's speculation ends either way.
+
+        Args:
+            session_id (str, optional): The conversation session.
+            inputs (dict): The final story inputs.
+
+        Returns:
+            dict: The future of each reusable node, keyed by node name.
+        """
+        if not session_id:
+            return {}
+        with self._lock:
+            runs = self._runs.pop(session_id, {})
+        claimed = {}
+        for name, (key, future) in runs.items():
+            failed = future.done() and not future.cancelled() and future.exception() is not None
+            if key == SPECULATIVE_NODES[name](inputs) and not future.cancelled() and not failed:
+                claimed[name] = future
+                get_metrics_registry().inc("ideaweaver_speculative_nodes_total", {"node": name, "outcome": "used"})
+            else:
+                self._discard(name, future)
+        if claimed:
+            logging.info(f"Reusing speculative nodes for session {session_id}: {', '.join(claimed)}.")
+        return claimed
+
+    def discard(self, session_id: str):
+        """Cancels or discards all speculative stages of a session."""
+        with self._lock:
+            runs = self._runs.pop(session_id, {})
+        self._discard_session(runs)
+
+    def _discard_session(self, runs: Dict[str, Tuple[Tuple, Future]]):
+        for name, (_, future) in runs.items():
+            self._discard(name, future)
+
+    def _discard(self, name: str, future: Future):
+        # A stage that has already started cannot be interrupted; its result is dropped
+        outcome = "cancelled" if future.cancel() else "discarded"
+        get_metrics_registry().inc("ideaweaver_speculative_nodes_total", {"node": name, "outcome": outcome})
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"sessions": len(self._runs), "nodes": sum(len(runs) for runs in self._runs.values())}
+
+
+_speculator: Optional[Speculator] = None
+_speculator_lock = threading.Lock()
+
+
+def get_speculator() -> Optional[Speculator]:
+    """Returns the shared speculator, or None if SPECULATION_ENABLED is false."""
+    global _speculator
+    if os.getenv("SPECULATION_ENABLED", "true").lower() != "true":
+        return None
+    with _speculator_lock:
+        if _speculator is None:
+            _speculator = Speculator(
+                max_workers=int(os.getenv("SPECULATION_MAX_WORKERS", "2")),
+                max_sessions=int(os.getenv("SPECULATION_MAX_SESSIONS", "100")),
+            )
+        return _speculator
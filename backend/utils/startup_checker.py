@@ -3,9 +3,9 @@
 
 import os
 import sys
-import requests
 import logging
 from dotenv import load_dotenv
+from backend.utils.tracing import get_trace_exporter_name
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -21,7 +21,10 @@ def check_env_vars():
         logging.error("Please create a .env file in the root directory.")
         return False
 
-    required_keys = ["LANGSMITH_API_KEY", "LANGSMITH_PROJECT", "LANGSMITH_ENDPOINT", "LLM_PROVIDER"]
+    required_keys = ["LLM_PROVIDER"]
+    # The LangSmith settings are only needed when traces are sent there (see utils/tracing.py)
+    if get_trace_exporter_name() == "langsmith":
+        required_keys += ["LANGSMITH_API_KEY", "LANGSMITH_PROJECT", "LANGSMITH_ENDPOINT"]
     missing_keys = [key for key in required_keys if not os.getenv(key)]
 
     if missing_keys:
@@ -34,8 +37,15 @@ def check_env_vars():
         llm_required_keys = ["OLLAMA_BASE_URL", "OLLAMA_MODEL"]
     elif llm_provider == "GEMINI":
         llm_required_keys = ["GEMINI_API_KEY", "GEMINI_MODEL"]
+    elif llm_provider == "FAKE":
+        llm_required_keys = []
+    elif llm_provider == "ROUTER":
+        # The model of each backend is part of LLM_BACKENDS; Gemini backends still need the key
+        llm_required_keys = ["LLM_BACKENDS"]
+        if "=GEMINI" in os.getenv("LLM_BACKENDS", "").upper():
+            llm_required_keys.append("GEMINI_API_KEY")
     else:
-        logging.error(f"Error: Unsupported LLM_PROVIDER: {llm_provider}. Must be 'OLLAMA' or 'GEMINI'.")
+        logging.error(f"Error: Unsupported LLM_PROVIDER: {llm_provider}. Must be 'OLLAMA', 'GEMINI', 'FAKE' or 'ROUTER'.")
         return False
 
     missing_llm_keys = [key for key in llm_required_keys if not os.getenv(key)]
@@ -44,51 +54,33 @@ def check_env_vars():
         logging.error("Please ensure your .env file contains all necessary keys for the chosen LLM_PROVIDER.")
         return False
 
-    os.environ["LANGSMITH_TRACING_V2"] = os.getenv("LANGSMITH_TRACING_V2", "true")
-    os.environ["LANGSMITH_ENDPOINT"] = os.getenv("LANGSMITH_ENDPOINT")
     logging.info("Environment variables are configured correctly.")
     return True
 
-def check_ollama_server():
-    """Checks if the Ollama server is running and accessible.
-
-    The Ollama base URL is retrieved from environment variables.
-
-    Returns:
-        bool: True if the server is running, False otherwise.
-    """
-    base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-    try:
-        response = requests.get(base_url, timeout=5)
-        response.raise_for_status()
-        logging.info(f"Ollama server is running and accessible at {base_url}.")
-        return True
-    except (requests.exceptions.ConnectionError, requests.exceptions.RequestException) as e:
-        logging.error(f"Error: Could not connect to Ollama server at {base_url}.")
-        logging.error("Please ensure the Ollama server is running.")
-        logging.error("You can start it by running `ollama serve` in your terminal.")
-        return False
+_frontend_checks_passed = False
 
 def run_frontend_startup_checks():
     """Runs all necessary startup checks for the frontend application.
 
+    Streamlit calls this on every rerun, so once the checks have passed they are not run
+    again. The LLM backends are not probed here: the frontend reads the backend's cached
+    /readyz result instead (see `get_backend_health_api` in frontend/api_client.py).
+
     Returns:
         bool: True if all checks pass, False otherwise.
     """
+    global _frontend_checks_passed
+    if _frontend_checks_passed:
+        return True
+
     logging.info("--- Running Frontend Startup Checks ---")
     env_vars_ok = check_env_vars()
     if not env_vars_ok:
         logging.error("Frontend startup checks failed.")
         return False
 
-    llm_provider = os.getenv("LLM_PROVIDER")
-    if llm_provider == "OLLAMA":
-        ollama_ok = check_ollama_server()
-        if not ollama_ok:
-            logging.error("Frontend startup checks failed.")
-            return False
-
     logging.info("--- Frontend Startup Checks Passed ---")
+    _frontend_checks_passed = True
     return True
 
 def run_backend_startup_checks():
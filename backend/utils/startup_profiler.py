@@ -0,0 +1,62 @@
+# utils/startup_profiler.py
+# This module reports where backend startup time goes: an import-time breakdown by
+# top-level package (from `python -X importtime`) and the cost of each startup phase.
+
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+
+def profile_imports(module: str = "backend.api") -> List[Tuple[str, float]]:
+    """Imports a module in a fresh interpreter and sums import time per top-level package.
+
+    Args:
+        module (str, optional): The module whose import is profiled. Defaults to "backend.api".
+
+    Returns:
+        list[tuple[str, float]]: (package, milliseconds) pairs, slowest first.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    totals: Dict[str, float] = defaultdict(float)
+    for line in result.stderr.splitlines():
+        # Format: "import time:       self [us] |   cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, _, name = line[len("import time:"):].split("|")
+            totals[name.strip().split(".")[0]] += int(self_us) / 1000
+        except ValueError:
+            continue
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def time_phase(phase: Callable[[], object]) -> float:
+    """Runs a startup phase and returns how long it took in milliseconds."""
+    start = time.perf_counter()
+    phase()
+    return (time.perf_counter() - start) * 1000
+
+
+def print_startup_profile(phases: List[Tuple[str, Callable[[], object]]], module: str = "backend.api", top: int = 15):
+    """Prints the import-time breakdown of a module followed by the timing of each startup phase.
+
+    Args:
+        phases (list[tuple[str, Callable]]): Named startup phases to run in order in this process.
+        module (str, optional): The module whose cold import is profiled.
+        top (int, optional): The number of packages to list.
+    """
+    imports = profile_imports(module)
+    total_ms = sum(ms for _, ms in imports)
+    print(f"Cold import of {module}: {total_ms:.1f} ms")
+    for package, ms in imports[:top]:
+        print(f"  {package:<30} {ms:>9.1f} ms  {ms / total_ms:>6.1%}" if total_ms else f"  {package:<30} {ms:>9.1f} ms")
+
+    print("Startup phases:")
+    for name, phase in phases:
+        print(f"  {name:<30} {time_phase(phase):>9.1f} ms")
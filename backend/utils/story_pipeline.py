@@ -0,0 +1,345 @@
+# utils/story_pipeline.py
+# This module runs the story generation tasks as a dependency graph, executing
+# independent tasks in parallel on a bounded worker pool.
+
+import contextvars
+import functools
+import logging
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Any, List, Optional, Sequence, Tuple
+
+from crewai import Crew, Process, Task
+from backend.agents.character_name_generator import parse_character_names
+from backend.agents.compact_story_writer import compact_story_task, parse_compact_story
+from backend.agents.name_generator_agent import generate_character_names_task
+from backend.agents.title_generator_agent import generate_story_title_task
+from backend.prompts.registry import render_prompt
+from backend.utils.agent_registry import get_agent_registry
+from backend.utils.context_budget import fit_context
+from backend.utils.metrics import stage_timer
+from backend.utils.token_stream import stream_task_tokens
+from backend.utils.tracing import traced
+
+
+class PipelineNode:
+    """A single step of the story pipeline.
+
+    Args:
+        name (str): The node name, also used as the key of its output.
+        run (Callable): Called with a dict of upstream outputs keyed by dependency name.
+        deps (Sequence[str], optional): The names of the nodes this node needs.
+        stage (str, optional): The agent stage the node's metrics are recorded under.
+    """
+
+    def __init__(self, name: str, run: Callable[[Dict[str, Any]], Any], deps: Sequence[str] = (), stage: Optional[str] = None):
+        self.name = name
+        self.run = run
+        self.deps = tuple(deps)
+        self.stage = stage
+
+
+def _timed_run(node: PipelineNode, upstream: Dict[str, Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    if node.stage:
+        with stage_timer(node.stage):
+            output = node.run(upstream)
+    else:
+        output = node.run(upstream)
+    return output, time.perf_counter() - start
+
+
+def run_pipeline(nodes: List[PipelineNode], max_workers: Optional[int] = None,
+                 on_node_complete: Optional[Callable[[str, Any, float], None]] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """Runs pipeline nodes as soon as their dependencies are available.
+
+    Args:
+        nodes (list[PipelineNode]): The nodes to run.
+        max_workers (int, optional): The maximum number of nodes running at once.
+        on_node_complete (Callable, optional): Called with the node name, output and wall time
+            as soon as each node finishes.
+
+    Returns:
+        tuple[dict, dict]: The output of each node and its wall time in seconds.
+
+    Raises:
+        ValueError: If a node depends on a node that is not part of the pipeline.
+    """
+    known = {node.name for node in nodes}
+    for node in nodes:
+        missing = [dep for dep in node.deps if dep not in known]
+        if missing:
+            raise ValueError(f"Pipeline node '{node.name}' depends on unknown nodes: {', '.join(missing)}")
+
+    pending = {node.name: node for node in nodes}
+    running = {}
+    outputs: Dict[str, Any] = {}
+    timings: Dict[str, float] = {}
+
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="story-pipeline")
+    try:
+        while pending or running:
+            for name, node in list(pending.items()):
+                if all(dep in outputs for dep in node.deps):
+                    upstream = {dep: outputs[dep] for dep in node.deps}
+                    # Each node gets a copy of the caller's context (e.g. the cache bypass flag)
+                    running[pool.submit(contextvars.copy_context().run, _timed_run, node, upstream)] = name
+                    del pending[name]
+
+            if not running:
+                raise ValueError(f"Pipeline has a dependency cycle between: {', '.join(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                outputs[name], elapsed = future.result()
+                timings[name] = round(elapsed, 3)
+                logging.info(f"Pipeline node '{name}' finished in {elapsed:.2f}s.")
+                if on_node_complete:
+                    on_node_complete(name, outputs[name], timings[name])
+    finally:
+        # On failure, drop the nodes that have not started yet (cancel_futures needs Python 3.9)
+        for future in running:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+    return outputs, timings
+
+
+def _kickoff_task(task: Task, on_token: Optional[Callable[[str], None]] = None) -> str:
+    """Runs a single task in its own crew and returns the raw output."""
+    crew = Crew(agents=[task.agent], tasks=[task], process=Process.sequential, verbose=False)
+    if on_token:
+        with stream_task_tokens(task, on_token):
+            result = crew.kickoff()
+    else:
+        result = crew.kickoff()
+    return result.raw.strip() if result and result.raw else ""
+
+
+def _reuse_or_run(node: PipelineNode, future: Future) -> PipelineNode:
+    """Returns a node that waits for the node's speculative run, or runs it again if that run failed.
+
+    The speculative run records its own stage metrics, so waiting for it is not timed as a stage run.
+    """
+    def run(upstream: Dict[str, Any]) -> Any:
+        try:
+            return future.result()
+        except Exception as e:
+            logging.warning(f"Speculative run of '{node.name}' failed ({e}); running it again.")
+            return _timed_run(node, upstream)[0]
+    return PipelineNode(node.name, run, deps=node.deps)
+
+
+def build_story_nodes(llm, inputs: Dict[str, Any], on_token: Optional[Callable[[str, str], None]] = None,
+                      precomputed: Optional[Dict[str, Future]] = None) -> List[PipelineNode]:
+    """Declares the story generation tasks and the outputs each of them needs.
+
+    Args:
+        llm: The language model to use.
+        inputs (dict): The validated story inputs (a StoryGenerationRequest as a dict).
+        on_token (Callable, optional): Called with the node name and each streamed LLM chunk.
+        precomputed (dict, optional): Futures of nodes already started during the conversation
+            (see utils/speculation.py), keyed by node name. These nodes wait for them instead.
+
+    Returns:
+        list[PipelineNode]: The pipeline nodes for this story.
+    """
+    premise = inputs["premise"]
+    age_group = inputs["age_group"]
+    num_characters = inputs["num_characters"]
+    generate_names = inputs["name_choice"] == "Generate for me" and not inputs.get("character_names_input")
+    agents = get_agent_registry(llm)
+
+    def names_for(upstream: Dict[str, Any]) -> List[str]:
+        return upstream.get("character_names") or inputs.get("character_names_input") or []
+
+    def kickoff(name: str, task: Task) -> str:
+        return _kickoff_task(task, functools.partial(on_token, name) if on_token else None)
+
+    nodes = []
+
+    if inputs["title_choice"] == "Generate for me":
+        nodes.append(PipelineNode(
+            "title",
+            lambda upstream: kickoff("title", generate_story_title_task(
+                llm, premise, age_group, agent=agents.acquire("title_generator_agent"))),
+            stage="title_generator",
+        ))
+
+    if generate_names:
+        nodes.append(PipelineNode(
+            "character_names",
+            lambda upstream: parse_character_names(
+                kickoff("character_names", generate_character_names_task(
+                    llm, premise, age_group, num_characters, agent=agents.acquire("name_generator_agent"))),
+                num_characters,
+            ),
+            stage="name_generator",
+        ))
+
+    nodes.append(PipelineNode(
+        "world_description",
+        lambda upstream: kickoff("world_description", Task(
+            description=render_prompt("world_description_task", premise=premise, age_group=age_group),
+            agent=agents.acquire("world_builder"),
+            expected_output="A detailed, engaging world description for the story."
+        )),
+        stage="world_builder",
+    ))
+
+    character_deps = ["world_description"] + (["character_names"] if generate_names else [])
+
+    # Later stages get digests of the earlier outputs, sized to each stage's token budget
+    def character_profiles_task(upstream: Dict[str, Any]) -> Task:
+        context = fit_context("character_creator", upstream)
+        return Task(
+            description=render_prompt("character_profiles_task", num_characters=num_characters, premise=premise,
+                                      world_description=context["world_description"],
+                                      character_names=", ".join(names_for(upstream))),
+            agent=agents.acquire("character_creator"),
+            expected_output="A list of detailed character profiles, including names, for the story."
+        )
+
+    def narrative_twist_task(upstream: Dict[str, Any]) -> Task:
+        context = fit_context("narrative_nudger", upstream)
+        return Task(
+            description=render_prompt("narrative_twist_task", premise=premise,
+                                      world_description=context["world_description"],
+                                      character_profiles=context["character_profiles"]),
+            agent=agents.acquire("narrative_nudger"),
+            expected_output="A concise and engaging narrative twist or plot point."
+        )
+
+    def story_summary_task(upstream: Dict[str, Any]) -> Task:
+        context = fit_context("summary_writer", upstream)
+        return Task(
+            description=render_prompt("story_summary_task", premise=premise,
+                                      world_description=context["world_description"],
+                                      character_profiles=context["character_profiles"],
+                                      narrative_twist=context["narrative_twist"]),
+            agent=agents.acquire("summary_writer"),
+            expected_output="A short, engaging story summary."
+        )
+
+    nodes.append(PipelineNode(
+        "character_profiles",
+        lambda upstream: kickoff("character_profiles", character_profiles_task(upstream)),
+        deps=character_deps,
+        stage="character_creator",
+    ))
+
+    nodes.append(PipelineNode(
+        "narrative_twist",
+        lambda upstream: kickoff("narrative_twist", narrative_twist_task(upstream)),
+        deps=["world_description", "character_profiles"],
+        stage="narrative_nudger",
+    ))
+
+    nodes.append(PipelineNode(
+        "story_summary",
+        lambda upstream: kickoff("story_summary", story_summary_task(upstream)),
+        deps=["world_description", "character_profiles", "narrative_twist"],
+        stage="summary_writer",
+    ))
+
+    if precomputed:
+        nodes = [_reuse_or_run(node, precomputed[node.name]) if node.name in precomputed else node for node in nodes]
+    return nodes
+
+
+def build_compact_story_nodes(llm, inputs: Dict[str, Any]) -> List[PipelineNode]:
+    """Declares the single node of the compact generation mode.
+
+    The whole story concept comes from one schema-constrained LLM call, so its output is a
+    dict with the same keys the full pipeline produces one node at a time. A title or names
+    the user provided always win over what the model returned.
+
+    Args:
+        llm: The language model to use.
+        inputs (dict): The validated story inputs (a StoryGenerationRequest as a dict).
+
+    Returns:
+        list[PipelineNode]: A single "compact_story" node.
+    """
+    def run(upstream: Dict[str, Any]) -> Dict[str, Any]:
+        task = compact_story_task(llm, inputs, agent=get_agent_registry(llm).acquire("compact_story_writer"))
+        crew = Crew(agents=[task.agent], tasks=[task], process=Process.sequential, verbose=False)
+        story = parse_compact_story(crew.kickoff())
+
+        output = story.model_dump()
+        if inputs["title_choice"] != "Generate for me":
+            del output["title"]
+        if inputs.get("character_names_input"):
+            del output["character_names"]
+        else:
+            names = [name.strip() for name in story.character_names if name.strip()][:inputs["num_characters"]]
+            # Same placeholder names as parse_character_names if the model returned too few
+            names += [f"Character {i + 1}" for i in range(len(names), inputs["num_characters"])]
+            output["character_names"] = names
+        return output
+
+    return [PipelineNode("compact_story", run, stage="compact_story_writer")]
+
+
+@traced(name="Story Pipeline")
+def generate_story_concept(llm, inputs: Dict[str, Any],
+                           on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                           precomputed: Optional[Dict[str, Future]] = None) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """Runs the story pipeline and assembles the final output consumed by build_markdown.
+
+    With `generation_mode` set to "compact", the six agent runs are replaced by a single
+    structured call (see build_compact_story_nodes); the final output has the same shape.
+
+    Args:
+        llm: The language model to use.
+        inputs (dict): The validated story inputs (a StoryGenerationRequest as a dict).
+        on_event (Callable, optional): Receives a `section` event as soon as each part of the story
+            is known, and `token` events for streamed LLM chunks.
+        precomputed (dict, optional): Futures of nodes started during the conversation, keyed by
+            node name. Ignored in compact mode.
+
+    Returns:
+        tuple[dict, dict]: The final story output and the wall time of each node, plus the total.
+    """
+    max_workers = int(os.getenv("STORY_PIPELINE_MAX_WORKERS", "3"))
+    start = time.perf_counter()
+
+    on_node_complete = on_token = None
+    if on_event:
+        # Parts the user provided are known before any LLM call
+        if inputs["title_choice"] != "Generate for me":
+            on_event({"event": "section", "section": "title", "content": inputs.get("title_input"), "elapsed": 0.0})
+        if inputs.get("character_names_input"):
+            on_event({"event": "section", "section": "character_names", "content": inputs["character_names_input"], "elapsed": 0.0})
+
+        def on_node_complete(name, output, elapsed):
+            sections = output if name == "compact_story" else {name: output}
+            for section, content in sections.items():
+                on_event({"event": "section", "section": section, "content": content, "elapsed": elapsed})
+
+        def on_token(name, chunk):
+            on_event({"event": "token", "section": name, "delta": chunk})
+
+    compact = inputs.get("generation_mode") == "compact"
+    nodes = build_compact_story_nodes(llm, inputs) if compact else build_story_nodes(llm, inputs, on_token=on_token, precomputed=precomputed)
+    outputs, timings = run_pipeline(nodes, max_workers=max_workers, on_node_complete=on_node_complete)
+    if compact:
+        outputs = outputs["compact_story"]
+    timings["total"] = round(time.perf_counter() - start, 3)
+
+    final_output = {
+        "premise": inputs["premise"],
+        "age_group": inputs["age_group"],
+        "title_choice": inputs["title_choice"],
+        "title": outputs.get("title", inputs.get("title_input")),
+        "num_characters": inputs["num_characters"],
+        "name_choice": inputs["name_choice"],
+        "character_names": outputs.get("character_names", inputs.get("character_names_input")),
+        "world_description": outputs.get("world_description", "N/A"),
+        "character_profiles": outputs.get("character_profiles", "N/A"),
+        "narrative_twist": outputs.get("narrative_twist", "N/A"),
+        "story_summary": outputs.get("story_summary", "N/A")
+    }
+    return final_output, timings
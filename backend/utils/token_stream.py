@@ -0,0 +1,59 @@
+# utils/token_stream.py
+# This module forwards streamed LLM chunks to per-task listeners, so a streaming
+# endpoint can pass tokens through while a task is still running.
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict
+
+_listeners: Dict[str, Callable[[str], None]] = {}
+_listeners_lock = threading.Lock()
+_installed = None
+
+
+def _install() -> bool:
+    """Registers the chunk handler on the CrewAI event bus once. Returns False if unsupported."""
+    global _installed
+    if _installed is not None:
+        return _installed
+    try:
+        from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+    except ImportError:
+        logging.info("This CrewAI version does not emit stream chunk events; token streaming is disabled.")
+        _installed = False
+        return _installed
+
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def _forward_chunk(source, event):
+        with _listeners_lock:
+            listener = _listeners.get(str(event.task_id))
+        if listener and event.chunk:
+            listener(event.chunk)
+
+    _installed = True
+    return _installed
+
+
+@contextmanager
+def stream_task_tokens(task, listener: Callable[[str], None]):
+    """Sends every chunk the LLM streams for `task` to `listener` while the block runs.
+
+    Chunks only arrive when the LLM was created with streaming enabled (LLM_STREAM=true)
+    and the provider supports it; otherwise the block runs unchanged.
+
+    Args:
+        task: The CrewAI task whose output should be streamed.
+        listener (Callable[[str], None]): Called with each text chunk.
+    """
+    if not _install():
+        yield
+        return
+    task_id = str(task.id)
+    with _listeners_lock:
+        _listeners[task_id] = listener
+    try:
+        yield
+    finally:
+        with _listeners_lock:
+            _listeners.pop(task_id, None)
@@ -0,0 +1,303 @@
+# utils/tracing.py
+# This module records trace spans for the agent stages and tasks without slowing requests
+# down. Whether a trace is recorded is decided once, when its root span starts (head-based
+# sampling), so unsampled requests only pay for a context variable lookup. Finished spans
+# go to a bounded queue that a background thread exports in batches to LangSmith, a
+# JSON-lines file or stdout; when the queue is full, spans are dropped instead of waiting.
+
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+# Set as the current span inside a trace that was not sampled, so its spans are skipped too
+_NOT_SAMPLED = object()
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("trace_span", default=None)
+
+# Longest string kept in span inputs and outputs
+MAX_VALUE_CHARS = 2000
+
+
+def _summarize(value: Any, depth: int = 0) -> Any:
+    """Returns a small JSON-friendly copy of a span input or output."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return value if len(value) <= MAX_VALUE_CHARS else value[:MAX_VALUE_CHARS] + "..."
+    if depth < 2 and isinstance(value, (list, tuple)):
+        return [_summarize(item, depth + 1) for item in value[:20]]
+    if depth < 2 and isinstance(value, dict):
+        return {str(key): _summarize(item, depth + 1) for key, item in list(value.items())[:50]}
+    return f"<{type(value).__name__}>"
+
+
+class Span:
+    """One timed operation of a trace."""
+
+    def __init__(self, name: str, parent: Optional["Span"], inputs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.span_id = str(uuid.uuid4())
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.parent_id = parent.span_id if parent else None
+        self.start_time = datetime.now(timezone.utc)
+        # LangSmith orders the runs of a trace by this path of start times and ids
+        own_order = f"{self.start_time:%Y%m%dT%H%M%S%fZ}{self.span_id}"
+        self.dotted_order = f"{parent.dotted_order}.{own_order}" if parent else own_order
+        self.end_time: Optional[datetime] = None
+        self.inputs = inputs or {}
+        self.outputs: Any = None
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "span_id": self.span_id,
+            "trace_id": self.trace_id,
+            "parent_id": self.parent_id,
+            "dotted_order": self.dotted_order,
+            "start_time": self.start_time.isoformat(),
+            "end_time": self.end_time.isoformat() if self.end_time else None,
+            "duration_ms": round((self.end_time - self.start_time).total_seconds() * 1000, 1) if self.end_time else None,
+            "inputs": self.inputs,
+            "outputs": self.outputs,
+            "error": self.error,
+        }
+
+
+class JsonLinesExporter:
+    """Writes spans as JSON lines to a file, or to stdout if `path` is "-"."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != "-":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def export(self, spans: List[Span]):
+        lines = "".join(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n" for span in spans)
+        if self.path == "-":
+            sys.stdout.write(lines)
+            sys.stdout.flush()
+        else:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+
+
+class LangSmithExporter:
+    """Sends spans to LangSmith as runs, one request per batch."""
+
+    def __init__(self, project: Optional[str] = None):
+        from langsmith import Client
+
+        self.client = Client()
+        self.project = project or os.getenv("LANGSMITH_PROJECT")
+
+    def export(self, spans: List[Span]):
+        self.client.batch_ingest_runs(create=[
+            {
+                "id": span.span_id,
+                "trace_id": span.trace_id,
+                "parent_run_id": span.parent_id,
+                "dotted_order": span.dotted_order,
+                "name": span.name,
+                "run_type": "chain",
+                "start_time": span.start_time,
+                "end_time": span.end_time,
+                "inputs": span.inputs,
+                "outputs": {"output": span.outputs},
+                "error": span.error,
+                "session_name": self.project,
+            }
+            for span in spans
+        ])
+
+
+class Tracer:
+    """Samples traces and exports their finished spans from a background thread.
+
+    Args:
+        exporter: An object with an `export(spans)` method, called from the background thread.
+        sample_rate (float): The share of traces recorded, from 0 to 1.
+        max_queue (int): The number of finished spans that may wait for export; more are dropped.
+        batch_size (int): The largest number of spans exported at once.
+        flush_interval (float): Seconds the background thread waits to fill a batch.
+    """
+
+    def __init__(self, exporter, sample_rate: float = 1.0, max_queue: int = 1000, batch_size: int = 100,
+                 flush_interval: float = 2.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._stats = {"sampled_traces": 0, "unsampled_traces": 0, "exported": 0, "dropped": 0, "export_errors": 0}
+        threading.Thread(target=self._loop, name="trace-exporter", daemon=True).start()
+
+    def sample(self) -> bool:
+        """Decides whether a new trace is recorded."""
+        sampled = random.random() < self.sample_rate
+        with self._lock:
+            self._stats["sampled_traces" if sampled else "unsampled_traces"] += 1
+        return sampled
+
+    def submit(self, span: Span):
+        """Queues a finished span for export without blocking; drops it if the queue is full."""
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self.exporter.export(batch)
+                with self._lock:
+                    self._stats["exported"] += len(batch)
+            except Exception as e:
+                logging.warning(f"Could not export {len(batch)} trace spans: {e}")
+                with self._lock:
+                    self._stats["export_errors"] += 1
+                    self._stats["dropped"] += len(batch)
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0):
+        """Waits (up to `timeout` seconds) until the queued spans are exported."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "queued": self._queue.qsize(), "sample_rate": self.sample_rate}
+
+
+def get_trace_exporter_name() -> str:
+    """Returns the configured exporter: TRACE_EXPORTER, or "langsmith" if LANGSMITH_TRACING_V2 is true, else "none"."""
+    default = "langsmith" if os.getenv("LANGSMITH_TRACING_V2", "false").lower() == "true" else "none"
+    return os.getenv("TRACE_EXPORTER", default).lower()
+
+
+_tracer: Optional[Tracer] = None
+_tracer_loaded = False
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Optional[Tracer]:
+    """Returns the shared tracer configured from the environment, or None if tracing is off."""
+    global _tracer, _tracer_loaded
+    if _tracer_loaded:
+        return _tracer
+    with _tracer_lock:
+        if not _tracer_loaded:
+            exporter_name = get_trace_exporter_name()
+            exporter = None
+            if exporter_name == "langsmith":
+                exporter = LangSmithExporter()
+            elif exporter_name == "file":
+                exporter = JsonLinesExporter(os.getenv("TRACE_FILE", os.path.join(".cache", "traces.jsonl")))
+            elif exporter_name == "stdout":
+                exporter = JsonLinesExporter("-")
+            elif exporter_name != "none":
+                logging.warning(f"Unknown TRACE_EXPORTER '{exporter_name}'; tracing is off.")
+            if exporter is not None:
+                _tracer = Tracer(
+                    exporter,
+                    sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1.0")),
+                    max_queue=int(os.getenv("TRACE_QUEUE_SIZE", "1000")),
+                    batch_size=int(os.getenv("TRACE_BATCH_SIZE", "100")),
+                    flush_interval=float(os.getenv("TRACE_FLUSH_INTERVAL", "2")),
+                )
+                atexit.register(_tracer.flush)
+                logging.info(f"Tracing to {exporter_name} (sample rate {_tracer.sample_rate:g}).")
+            _tracer_loaded = True
+    return _tracer
+
+
+@contextmanager
+def span(name: str, inputs: Optional[Callable[[], Dict[str, Any]]] = None):
+    """Records the block as a span of the current trace, starting a trace if there is none.
+
+    Args:
+        name (str): The span name, e.g. "World Builder".
+        inputs (Callable, optional): Returns the span inputs; only called if the span is recorded.
+
+    Yields:
+        Span | None: The span, or None if it is not recorded.
+    """
+    tracer = get_tracer()
+    parent = _current_span.get()
+    if tracer is None or parent is _NOT_SAMPLED:
+        yield None
+        return
+    if parent is None and not tracer.sample():
+        token = _current_span.set(_NOT_SAMPLED)
+        try:
+            yield None
+        finally:
+            _current_span.reset(token)
+        return
+
+    current = Span(name, parent, inputs() if inputs else None)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_time = datetime.now(timezone.utc)
+        tracer.submit(current)
+
+
+def traced(name: Optional[str] = None):
+    """Decorates a function so each call is recorded as a span, with its arguments and result.
+
+    Args:
+        name (str, optional): The span name. Defaults to the function name.
+    """
+    def decorate(fn):
+        span_name = name or fn.__name__
+        signature = inspect.signature(fn)
+
+        def inputs(args, kwargs):
+            try:
+                bound = signature.bind_partial(*args, **kwargs)
+            except TypeError:
+                return {}
+            return {key: _summarize(value) for key, value in bound.arguments.items() if key != "llm"}
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if get_tracer() is None:
+                return fn(*args, **kwargs)
+            with span(span_name, lambda: inputs(args, kwargs)) as current:
+                result = fn(*args, **kwargs)
+                if current is not None:
+                    current.outputs = _summarize(result)
+                return result
+
+        return wrapper
+    return decorate
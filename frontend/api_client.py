@@ -1,23 +1,185 @@
 import os
+import random
+import threading
+import time
 import requests
 import logging
 import json
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
 
 API_BASE_URL = os.getenv("API_BASE_URL", "http://127.0.0.1:8000")
 
-def call_master_agent_api(conversation_history, user_input, collected_inputs, last_question):
-    try:
-        response = requests.post(
-            f"{API_BASE_URL}/converse",
-            json={
-                "conversation_history": conversation_history,
-                "user_input": user_input,
-                "collected_inputs": collected_inputs,
-                "last_question": last_question
+# Seconds to wait for a connection, and for the response of a chat turn or a story.
+# For streams, the read timeout is the longest allowed gap between two events.
+CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "3.05"))
+CONVERSE_READ_TIMEOUT = float(os.getenv("API_CONVERSE_TIMEOUT", "120"))
+STORY_READ_TIMEOUT = float(os.getenv("API_STORY_TIMEOUT", "600"))
+MAX_RETRIES = int(os.getenv("API_MAX_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("API_RETRY_BACKOFF", "0.5"))
+JOB_POLL_INTERVAL = float(os.getenv("API_JOB_POLL_INTERVAL", "1"))
+# Seconds a backend health answer is reused across Streamlit reruns
+HEALTH_TTL = float(os.getenv("API_HEALTH_TTL", "10"))
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {502, 503, 504}
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, float("inf"))
+
+_session = None
+_session_lock = threading.Lock()
+_latency = {}
+_latency_lock = threading.Lock()
+_health = None
+_health_checked_at = 0.0
+_health_lock = threading.Lock()
+
+def _get_session():
+    """Returns the HTTP session shared by all API calls, so connections to the backend are kept alive and reused."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                pool_size = int(os.getenv("API_POOL_SIZE", "10"))
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+def _record_latency(endpoint, seconds, error=False):
+    with _latency_lock:
+        histogram = _latency.setdefault(endpoint, {"count": 0, "errors": 0, "sum": 0.0, "buckets": [0] * len(LATENCY_BUCKETS)})
+        histogram["count"] += 1
+        histogram["errors"] += int(error)
+        histogram["sum"] += seconds
+        histogram["buckets"][next(i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound)] += 1
+
+def get_latency_histograms():
+    """Returns the latency histogram of each endpoint called so far.
+
+    For streaming endpoints, the latency is the time until the response headers arrive.
+    """
+    with _latency_lock:
+        return {
+            endpoint: {
+                "count": histogram["count"],
+                "errors": histogram["errors"],
+                "mean_s": round(histogram["sum"] / histogram["count"], 3) if histogram["count"] else 0.0,
+                "buckets": {
+                    f"<={bound:g}s" if bound != float("inf") else f">{LATENCY_BUCKETS[-2]:g}s": n
+                    for bound, n in zip(LATENCY_BUCKETS, histogram["buckets"])
+                },
             }
-        )
+            for endpoint, histogram in _latency.items()
+        }
+
+def _is_retryable(method, error):
+    """Connection failures are safe to retry for any request, as nothing reached the backend.
+    Other failures (e.g. a read timeout) are only retried for idempotent requests."""
+    if method in IDEMPOTENT_METHODS:
+        return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.exceptions.ConnectionError) and isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+def _request(method, endpoint, read_timeout, label=None, retries=None, **kwargs):
+    """Sends a request to the backend over the shared session, retrying with jittered backoff.
+
+    Args:
+        method (str): The HTTP method.
+        endpoint (str): The path, e.g. "/converse".
+        read_timeout (float): Seconds to wait for the response once connected.
+        label (str, optional): The name latencies are recorded under, e.g. "/jobs/{job_id}". Defaults to the path.
+        retries (int, optional): The number of retries. Defaults to API_MAX_RETRIES.
+        **kwargs: Passed on to `requests.Session.request`.
+
+    Returns:
+        requests.Response: The response.
+
+    Raises:
+        requests.exceptions.RequestException: If the last attempt failed.
+    """
+    label = label or endpoint
+    retries = MAX_RETRIES if retries is None else retries
+    for attempt in range(retries + 1):
+        start = time.perf_counter()
+        try:
+            response = _get_session().request(method, f"{API_BASE_URL}{endpoint}", timeout=(CONNECT_TIMEOUT, read_timeout), **kwargs)
+        except requests.exceptions.RequestException as e:
+            _record_latency(label, time.perf_counter() - start, error=True)
+            if attempt == retries or not _is_retryable(method, e):
+                raise
+            logging.warning(f"{method} {endpoint} failed ({e}); retrying.")
+        else:
+            _record_latency(label, time.perf_counter() - start)
+            if attempt == retries or method not in IDEMPOTENT_METHODS or response.status_code not in RETRY_STATUSES:
+                return response
+            response.close()
+            logging.warning(f"{method} {endpoint} returned {response.status_code}; retrying.")
+        # Full jitter, so clients that failed together do not retry together
+        time.sleep(random.uniform(0, RETRY_BACKOFF * 2 ** attempt))
+
+def _busy_response(response):
+    """Builds the error returned to the UI when the backend rejects a request because it is at capacity."""
+    retry_after = response.headers.get("Retry-After", "a few")
+    return {"status": "error", "message": f"The server is busy right now. Please try again in {retry_after} seconds."}
+
+def get_backend_health_api():
+    """Returns whether the backend and its LLM can serve requests.
+
+    The backend answers /readyz from its own background probes, and the answer is reused
+    here for API_HEALTH_TTL seconds, so Streamlit reruns do not each wait on a request.
+
+    Returns:
+        dict: "ready" and, when not ready, a "message" for the UI.
+    """
+    global _health, _health_checked_at
+    with _health_lock:
+        if _health is not None and time.monotonic() - _health_checked_at < HEALTH_TTL:
+            return _health
+    try:
+        # Not retried: a not-ready backend answers 503, which is an answer, not a failure to retry
+        response = _request("GET", "/readyz", CONNECT_TIMEOUT, retries=0)
+        health = response.json()
+        if not health.get("ready"):
+            problems = [f"{name}: {probe['error']}" for name, probe in health.get("backends", {}).items() if probe.get("error")]
+            if health.get("stale"):
+                problems.append("the backend has not checked its LLM recently")
+            health["message"] = "The LLM backend is not ready" + (f" ({'; '.join(problems)})." if problems else ".")
+    except requests.exceptions.RequestException as e:
+        logging.error(f"API health check failed: {e}")
+        health = {"ready": False, "message": f"The API server at {API_BASE_URL} is not reachable."}
+    except json.JSONDecodeError:
+        logging.error(f"API health check returned invalid JSON.", exc_info=True)
+        health = {"ready": False, "message": "The API server returned an unreadable health response."}
+    with _health_lock:
+        _health, _health_checked_at = health, time.monotonic()
+    return health
+
+def call_master_agent_api(conversation_history, user_input, collected_inputs, last_question, session_id=None):
+    if session_id:
+        # The backend keeps the history and collected inputs of the session
+        payload = {"session_id": session_id, "user_input": user_input}
+    else:
+        payload = {
+            "conversation_history": conversation_history,
+            "user_input": user_input,
+            "collected_inputs": collected_inputs,
+            "last_question": last_question
+        }
+    try:
+        response = _request("POST", "/converse", CONVERSE_READ_TIMEOUT, json=payload)
+        if response.status_code == 429:
+            return _busy_response(response)
         response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
         return response.json()
+    except requests.exceptions.ReadTimeout:
+        logging.error(f"API call to master agent timed out after {CONVERSE_READ_TIMEOUT}s.")
+        return {"status": "error", "message": "The Master Agent took too long to respond. Please try again."}
     except requests.exceptions.RequestException as e:
         logging.error(f"API call to master agent failed: {e}", exc_info=True)
         return {"status": "error", "message": "Failed to connect to the Master Agent. Please ensure the API server is running."}
@@ -27,15 +189,100 @@ def call_master_agent_api(conversation_history, user_input, collected_inputs, la
 
 def call_generate_story_api(collected_inputs):
     try:
-        response = requests.post(
-            f"{API_BASE_URL}/generate_story",
-            json=collected_inputs
-        )
+        response = _request("POST", "/generate_story", STORY_READ_TIMEOUT, json=collected_inputs)
+        if response.status_code == 429:
+            return _busy_response(response)
         response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
         return response.json()
+    except requests.exceptions.ReadTimeout:
+        logging.error(f"API call to story generation timed out after {STORY_READ_TIMEOUT}s.")
+        return {"status": "error", "message": "Story generation took too long. Please try again."}
     except requests.exceptions.RequestException as e:
         logging.error(f"API call to story generation failed: {e}", exc_info=True)
         return {"status": "error", "message": "Failed to connect to the Story Generation API. Please ensure the API server is running."}
     except json.JSONDecodeError:
         logging.error(f"Story Generation API returned invalid JSON.", exc_info=True)
         return {"status": "error", "message": "Story Generation API returned an unreadable response."}
+
+def stream_generate_story_api(collected_inputs):
+    """Calls the streaming story generation endpoint and yields each event as it arrives.
+
+    Yields `section` and `token` events while the story is generated, followed by a final
+    `complete` or `error` event that has the same shape as the `call_generate_story_api` response.
+    """
+    try:
+        with _request("POST", "/generate_story/stream", STORY_READ_TIMEOUT, json=collected_inputs, stream=True) as response:
+            if response.status_code == 429:
+                yield {"event": "error", **_busy_response(response)}
+                return
+            response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+            for line in response.iter_lines(decode_unicode=True):
+                if line:
+                    yield json.loads(line)
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Streaming API call to story generation failed: {e}", exc_info=True)
+        yield {"event": "error", "status": "error", "message": "Failed to connect to the Story Generation API. Please ensure the API server is running."}
+    except json.JSONDecodeError:
+        logging.error(f"Story Generation API streamed invalid JSON.", exc_info=True)
+        yield {"event": "error", "status": "error", "message": "Story Generation API returned an unreadable response."}
+
+def submit_story_job_api(collected_inputs):
+    """Queues a story generation on the backend.
+
+    Returns:
+        dict: `{"status": "accepted", "job_id": ...}`, or an error response.
+    """
+    try:
+        response = _request("POST", "/jobs/generate_story", CONVERSE_READ_TIMEOUT, json=collected_inputs)
+        if response.status_code == 429:
+            return _busy_response(response)
+        response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+        return response.json()
+    except requests.exceptions.RequestException as e:
+        logging.error(f"API call to submit a story job failed: {e}", exc_info=True)
+        return {"status": "error", "message": "Failed to connect to the Story Generation API. Please ensure the API server is running."}
+    except json.JSONDecodeError:
+        logging.error(f"Story job API returned invalid JSON.", exc_info=True)
+        return {"status": "error", "message": "Story Generation API returned an unreadable response."}
+
+def follow_story_job_api(job_id):
+    """Polls a story job until it finishes, yielding events like `stream_generate_story_api`.
+
+    Yields `token` events with the text streamed since the last poll for the sections still
+    being written (when the LLM streams), a `section` event for each story section as soon as
+    the job reports it, and a final `complete` or `error` event that has the same shape as the
+    `call_generate_story_api` response. The job keeps running on the backend if polling stops,
+    so it can be followed again later.
+    """
+    seen = set()
+    streamed = {}
+    try:
+        while True:
+            response = _request("GET", f"/jobs/{job_id}", CONVERSE_READ_TIMEOUT, label="/jobs/{job_id}")
+            if response.status_code == 404:
+                yield {"event": "error", "status": "error", "message": "The story job was not found. Please start a new story."}
+                return
+            response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+            job = response.json()
+            for section in job.get("completed_sections", []):
+                if section not in seen:
+                    seen.add(section)
+                    yield {"event": "section", "section": section, "content": job["sections"][section]}
+            for section, text in job.get("partial_sections", {}).items():
+                if section not in seen and len(text) > streamed.get(section, 0):
+                    yield {"event": "token", "section": section, "delta": text[streamed.get(section, 0):]}
+                    streamed[section] = len(text)
+            if job.get("status") in ("complete", "error"):
+                break
+            time.sleep(JOB_POLL_INTERVAL)
+
+        response = _request("GET", f"/jobs/{job_id}/result", CONVERSE_READ_TIMEOUT, label="/jobs/{job_id}/result")
+        response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
+        result = response.json()
+        yield {"event": "complete" if result.get("status") == "complete" else "error", **result}
+    except requests.exceptions.RequestException as e:
+        logging.error(f"API call to follow story job {job_id} failed: {e}", exc_info=True)
+        yield {"event": "error", "status": "error", "message": "Lost the connection to the Story Generation API. Please ensure the API server is running."}
+    except json.JSONDecodeError:
+        logging.error(f"Story job API returned invalid JSON.", exc_info=True)
+        yield {"event": "error", "status": "error", "message": "Story Generation API returned an unreadable response."}
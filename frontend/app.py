@@ -7,6 +7,7 @@ import logging
 
 import api_client
 import ui
+from backend.utils.runtime_profile import configure_logging
 from backend.utils.startup_checker import run_frontend_startup_checks
 
 
@@ -16,6 +17,13 @@ def main():
     if not run_frontend_startup_checks():
         st.error("A required backend service is not running. Please ensure it is started and refresh the page.")
         st.stop()
+    configure_logging()
+
+    # Cached by the API client and answered from the backend's background probes, so reruns stay cheap
+    health = api_client.get_backend_health_api()
+    if not health["ready"]:
+        st.error(f"{health['message']} Please ensure it is started and refresh the page.")
+        st.stop()
 
     ui.render_ui(api_client)
 
@@ -1,9 +1,53 @@
 import streamlit as st
 import logging
-import json
+from backend.utils.runtime_profile import redact_payload
+
+# Headings for the story sections streamed by the backend, in display order
+SECTION_LABELS = {
+    "title": "Title",
+    "character_names": "Characters",
+    "world_description": "World",
+    "character_profiles": "Character Profiles",
+    "narrative_twist": "Narrative Twist",
+    "story_summary": "Summary",
+}
+
+def _show_story_events(events):
+    """Shows each story section as soon as the backend reports it and returns the final response."""
+    placeholders = {section: st.empty() for section in SECTION_LABELS}
+    partial_text = {}
+    response_data = {"status": "error", "message": "The story stream ended unexpectedly."}
+
+    for event in events:
+        kind = event.get("event")
+        section = event.get("section")
+        if kind == "token" and section in placeholders:
+            partial_text[section] = partial_text.get(section, "") + event.get("delta", "")
+            placeholders[section].markdown(f"**{SECTION_LABELS[section]}**\n\n{partial_text[section]}")
+        elif kind == "section" and section in placeholders:
+            content = event.get("content") or ""
+            if isinstance(content, list):
+                content = ", ".join(content)
+            placeholders[section].markdown(f"**{SECTION_LABELS[section]}**\n\n{content}")
+        elif kind in ("complete", "error"):
+            response_data = event
+
+    return response_data
+
+def _render_latency_sidebar(api_client):
+    """Shows how long each backend endpoint has taken so far in this frontend process."""
+    histograms = api_client.get_latency_histograms()
+    if not histograms:
+        return
+    with st.sidebar.expander("Backend latency"):
+        for endpoint, histogram in histograms.items():
+            st.markdown(f"**{endpoint}**: {histogram['count']} calls, mean {histogram['mean_s']}s, {histogram['errors']} errors")
+            buckets = {bucket: count for bucket, count in histogram["buckets"].items() if count}
+            st.table({"latency": list(buckets), "calls": list(buckets.values())})
 
 def render_ui(api_client):
     st.title("🤖 Idea Weaver")
+    _render_latency_sidebar(api_client)
 
     # Initialize session state variables if they don't exist
     if "messages" not in st.session_state:
@@ -12,6 +56,7 @@ def render_ui(api_client):
         st.session_state.collected_inputs = {}
         st.session_state.master_agent_finished = False
         st.session_state.last_question = None
+        st.session_state.session_id = None
 
     # Display chat messages from history on app rerun
     for message in st.session_state.messages:
@@ -36,6 +81,7 @@ def render_ui(api_client):
                     f"Assistant: {initial_response_data.get('message', '')}"
                 )
                 st.session_state.last_question = initial_response_data.get("last_question")
+                st.session_state.session_id = initial_response_data.get("session_id")
                 st.rerun()  # Rerun to display the initial message
             else:
                 st.error("An unexpected error occurred during initialization. Please try again.")
@@ -55,18 +101,34 @@ def render_ui(api_client):
             # Get assistant response
             with st.spinner("Thinking..."):
                 collected_inputs = st.session_state.collected_inputs
-                logging.info(f"Sending collected_inputs to backend: {json.dumps(collected_inputs, indent=2)}")
+                logging.info(f"Sending collected_inputs to backend: {redact_payload(collected_inputs)}")
 
+                conversation_history = "\n".join(st.session_state.conversation_history)
                 assistant_response_data = api_client.call_master_agent_api(
-                    conversation_history="\n".join(st.session_state.conversation_history),
+                    conversation_history=conversation_history,
                     user_input=user_input,
                     collected_inputs=collected_inputs,
-                    last_question=st.session_state.last_question
+                    last_question=st.session_state.last_question,
+                    session_id=st.session_state.session_id
                 )
+                if assistant_response_data.get("status") == "expired":
+                    # The server lost the session, so the same turn is resent with the whole conversation,
+                    # which is sent from here on
+                    st.session_state.session_id = None
+                    assistant_response_data = api_client.call_master_agent_api(
+                        conversation_history=conversation_history,
+                        user_input=user_input,
+                        collected_inputs=collected_inputs,
+                        last_question=st.session_state.last_question
+                    )
                 status = assistant_response_data.get("status")
                 message = assistant_response_data.get("message")
                 data = assistant_response_data.get("data", {})
-                st.session_state.last_question = assistant_response_data.get("last_question")
+                if status != "error":
+                    # An error answers nothing, so the inputs and the question still waiting for an answer are kept
+                    st.session_state.last_question = assistant_response_data.get("last_question")
+                    st.session_state.session_id = assistant_response_data.get("session_id")
+                    st.session_state.collected_inputs = data or {}
 
                 # Display assistant response in chat message container
                 with st.chat_message("assistant"):
@@ -75,7 +137,6 @@ def render_ui(api_client):
                 # Add assistant response to chat history
                 st.session_state.messages.append({"role": "assistant", "content": message})
                 st.session_state.conversation_history.append(f"Assistant: {message}")
-                st.session_state.collected_inputs = data or {}
                 if status == "complete":
                     st.session_state.master_agent_finished = True
                 
@@ -85,22 +146,28 @@ def render_ui(api_client):
     if st.session_state.master_agent_finished:
         with st.chat_message("assistant"):
             st.markdown("I have all the information I need. I will now start weaving your story concept. This might take a moment...")
-        with st.spinner("Weaving your story idea... Please wait."):
-            response_data = api_client.call_generate_story_api(
-                collected_inputs=st.session_state.collected_inputs
-            )
-            if response_data.get("status") == "complete":
-                story_summary = response_data.get("data", {}).get("story_summary", "")
-                st.session_state.messages.append({"role": "assistant", "content": response_data.get("message", "")})
-                st.session_state.messages.append({"role": "assistant", "content": story_summary})
-                with st.chat_message("assistant"):
-                    st.markdown(response_data.get("message", ""))
-                    st.markdown(story_summary)
-            else:
-                error_message = response_data.get("message", "An unexpected error occurred during story generation.")
-                st.session_state.messages.append({"role": "assistant", "content": error_message})
-                with st.chat_message("assistant"):
-                    st.markdown(error_message)
+        with st.chat_message("assistant"):
+            # The story runs as a backend job, so a rerun follows the same job instead of starting over
+            if not st.session_state.get("story_job_id"):
+                # The session id lets the backend reuse the stages it started during the conversation
+                story_request = {**st.session_state.collected_inputs, "session_id": st.session_state.session_id}
+                response_data = api_client.submit_story_job_api(story_request)
+                st.session_state.story_job_id = response_data.get("job_id")
+            if st.session_state.story_job_id:
+                response_data = _show_story_events(api_client.follow_story_job_api(st.session_state.story_job_id))
+                st.session_state.story_job_id = None
+        if response_data.get("status") == "complete":
+            story_summary = response_data.get("data", {}).get("story_summary", "")
+            st.session_state.messages.append({"role": "assistant", "content": response_data.get("message", "")})
+            st.session_state.messages.append({"role": "assistant", "content": story_summary})
+            with st.chat_message("assistant"):
+                st.markdown(response_data.get("message", ""))
+                st.markdown(story_summary)
+        else:
+            error_message = response_data.get("message", "An unexpected error occurred during story generation.")
+            st.session_state.messages.append({"role": "assistant", "content": error_message})
+            with st.chat_message("assistant"):
+                st.markdown(error_message)
 
         st.session_state.master_agent_finished = False  # Reset to prevent re-running immediately
         st.session_state.messages.append({"role": "assistant", "content": "Story concept generated! Would you like to start a new story?"})
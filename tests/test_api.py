@@ -0,0 +1,73 @@
+import asyncio
+import gzip
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import backend.api as api
+from backend.api import StoryGenerationRequest, UserRequest, converse
+from backend.utils.llm_executor import ExecutorOverloadedError, LLMExecutor
+
+
+def test_unknown_session_is_reported_as_expired():
+    response = asyncio.run(converse(UserRequest(user_input="a dragon who fears heights", session_id="no-such-session")))
+
+    # The client tells this apart from an error and resends its full conversation
+    assert response.status == "expired"
+    assert response.session_id is None
+
+
+class _RecordingSpeculator:
+    def __init__(self):
+        self.claimed = []
+        self.discarded = []
+
+    def claim(self, session_id, inputs):
+        self.claimed.append(session_id)
+        return {}
+
+    def discard(self, session_id):
+        self.discarded.append(session_id)
+
+
+def test_rejected_story_keeps_the_speculative_stages(monkeypatch):
+    executor = LLMExecutor("TEST", max_concurrency=1, max_queue_depth=0, retry_after=1)
+    speculator = _RecordingSpeculator()
+    monkeypatch.setattr(api, "get_llm_executor", lambda: executor)
+    monkeypatch.setattr(api, "get_speculator", lambda: speculator)
+    request = StoryGenerationRequest(premise="A wizard in a modern city", age_group="Kids", title_choice="Generate for me",
+                                     num_characters=2, name_choice="Generate for me", session_id="session-1")
+    release = threading.Event()
+
+    async def scenario():
+        busy = executor.submit(release.wait, 5)
+        with pytest.raises(ExecutorOverloadedError):
+            api._start_story(request)
+        release.set()
+        await busy
+
+    asyncio.run(scenario())
+    # The stages are still there for the client's retry
+    assert speculator.claimed == []
+    assert speculator.discarded == []
+
+
+class _GzippedStore:
+    def __init__(self, path):
+        self.path = path
+
+    def locate(self, story_id, kind):
+        return self.path, True
+
+
+@pytest.mark.parametrize("accept_encoding", ["gzip, deflate", ""])
+def test_gzipped_story_responses_vary_on_accept_encoding(monkeypatch, tmp_path, accept_encoding):
+    path = tmp_path / "output.json.gz"
+    path.write_bytes(gzip.compress(b'{"title": "The Amber Lantern"}'))
+    monkeypatch.setattr(api, "get_artifact_store", lambda: _GzippedStore(str(path)))
+    http_request = SimpleNamespace(headers={"accept-encoding": accept_encoding})
+
+    response = api._story_file_response("story-1", "output", "application/json", http_request)
+
+    assert response.headers["vary"] == "Accept-Encoding"
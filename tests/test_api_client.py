@@ -0,0 +1,79 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from frontend import api_client
+
+
+class _NotReadyHandler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append(self.path)
+        body = json.dumps({"ready": False, "backends": {"ollama": {"error": "model not pulled"}}}).encode()
+        self.send_response(503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def not_ready_backend(monkeypatch):
+    _NotReadyHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _NotReadyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(api_client, "API_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setattr(api_client, "_health", None)
+    yield _NotReadyHandler.requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_not_ready_answer_is_not_retried(not_ready_backend):
+    health = api_client.get_backend_health_api()
+
+    assert not_ready_backend == ["/readyz"]
+    assert health["ready"] is False
+    assert "model not pulled" in health["message"]
+
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    events = [
+        {"event": "token", "section": "title", "delta": "The Quiet"},
+        {"event": "section", "section": "title", "content": "The Quiet Lighthouse"},
+        {"event": "complete", "status": "complete", "story": {"title": "The Quiet Lighthouse"}},
+    ]
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = "".join(json.dumps(event) + "\n" for event in self.events).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def streaming_backend(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StreamHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(api_client, "API_BASE_URL", f"http://127.0.0.1:{server.server_port}")
+    yield
+    server.shutdown()
+    server.server_close()
+
+
+def test_stream_yields_each_event(streaming_backend):
+    events = list(api_client.stream_generate_story_api({"premise": "A lighthouse keeper"}))
+
+    assert events == _StreamHandler.events
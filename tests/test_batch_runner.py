@@ -0,0 +1,39 @@
+import pytest
+
+from backend.utils import batch_runner
+from backend.utils.artifact_store import ArtifactStore
+from backend.utils.batch_runner import BatchJob
+from backend.utils.fake_llm import FakeLLM
+from backend.utils.llm_cache import LLMResponseCache, install_llm_cache
+
+ROW = {
+    "premise": "A lighthouse keeper who can hear the thoughts of ships",
+    "age_group": "Teens",
+    "title_choice": "Generate for me",
+    "title_input": None,
+    "num_characters": 2,
+    "name_choice": "Generate for me",
+    "character_names_input": None,
+}
+
+
+@pytest.fixture
+def job(tmp_path, monkeypatch):
+    store = ArtifactStore(str(tmp_path / "stories"))
+    monkeypatch.setattr(batch_runner, "get_artifact_store", lambda: store)
+    return BatchJob.create([ROW, {**ROW, "fresh": True}], root=str(tmp_path / "batches"))
+
+
+def test_fresh_rows_skip_cached_responses(job):
+    cache = LLMResponseCache()
+    llm = install_llm_cache(FakeLLM(model="fake/idea-weaver", latency_ms=0), cache=cache)
+
+    job._run_row(llm, 0, ROW)
+    job._run_row(llm, 0, ROW)
+    hits = cache.stats()["memory_hits"]
+    assert hits > 0
+
+    job._run_row(llm, 1, {**ROW, "fresh": True})
+    assert cache.stats()["memory_hits"] == hits
+    assert cache.stats()["bypassed"] > 0
+    assert all(result["status"] == "complete" for result in job.load_results().values())
@@ -0,0 +1,11 @@
+from backend.agents.character_name_generator import generate_character_names
+from backend.utils.agent_registry import get_agent_registry
+from backend.utils.fake_llm import FakeLLM
+
+
+def test_names_come_from_the_shared_agent():
+    llm = FakeLLM(model="fake/idea-weaver", latency_ms=0)
+
+    assert len(generate_character_names(llm, "A lighthouse keeper", "Teens", 3)) == 3
+    assert len(generate_character_names(llm, "A baker on Mars", "Kids", 2)) == 2
+    assert list(get_agent_registry(llm)._agents) == ["name_generator_agent"]
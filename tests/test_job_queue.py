@@ -0,0 +1,45 @@
+import threading
+import time
+
+from backend.utils.job_queue import JobQueue
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_progress_includes_the_text_streamed_so_far():
+    release = threading.Event()
+
+    def runner(request, on_event):
+        on_event({"event": "token", "section": "title", "delta": "The Amber "})
+        on_event({"event": "token", "section": "title", "delta": "Lantern"})
+        release.wait(5)
+        on_event({"event": "section", "section": "title", "content": "The Amber Lantern"})
+        return {"status": "complete"}
+
+    job_queue = JobQueue(runner, max_workers=1)
+    job = job_queue.submit({"premise": "A lighthouse keeper"})
+    _wait_for(lambda: job.progress()["partial_sections"].get("title") == "The Amber Lantern")
+    release.set()
+    _wait_for(lambda: job.status == "complete")
+    assert job.progress()["partial_sections"] == {}
+    assert job.sections == {"title": "The Amber Lantern"}
+
+
+def test_resumes_only_as_many_jobs_as_the_queue_holds(tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    release = threading.Event()
+    first_run = JobQueue(lambda request, on_event: release.wait(5), max_workers=1, max_queued=2, db_path=db_path)
+    jobs = [first_run.submit({"premise": f"Story {index}"}) for index in range(3)]
+
+    # A restart with room for one running and one queued job
+    resumed = JobQueue(lambda request, on_event: {"status": "complete"}, max_workers=1, max_queued=1, db_path=db_path)
+    release.set()
+    _wait_for(lambda: all(resumed.get(job.job_id).status in ("complete", "error") for job in jobs))
+
+    assert sorted(resumed.get(job.job_id).status for job in jobs) == ["complete", "complete", "error"]
+    assert resumed.stats()["resumed"] == 2
@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from backend.utils.llm_executor import ExecutorOverloadedError, LLMExecutor, background_calls, install_call_limit
+
+
+def _executor(max_concurrency=1, max_queue_depth=0):
+    return LLMExecutor("TEST", max_concurrency=max_concurrency, max_queue_depth=max_queue_depth, retry_after=1)
+
+
+def test_rejects_work_beyond_the_queue_depth():
+    executor = _executor(max_concurrency=1, max_queue_depth=1)
+    release = threading.Event()
+
+    async def scenario():
+        first = executor.submit(release.wait, 5)
+        second = executor.submit(release.wait, 5)
+        with pytest.raises(ExecutorOverloadedError):
+            executor.submit(release.wait, 5)
+        release.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(scenario())
+    assert executor.stats()["rejected"] == 1
+    assert executor.stats()["in_flight"] == 0
+
+
+def test_cancelled_request_keeps_its_slot_until_the_worker_finishes():
+    executor = _executor()
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+
+    async def scenario():
+        future = executor.submit(work)
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        future.cancel()
+        await asyncio.sleep(0.05)
+        # The worker is still running, so the slot is still taken
+        assert executor.stats()["in_flight"] == 1
+        with pytest.raises(ExecutorOverloadedError):
+            executor.submit(work)
+        release.set()
+        for _ in range(100):
+            if executor.stats()["in_flight"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert executor.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+class _SlowLLM:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+
+    def call(self, messages, **kwargs):
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(0.05)
+        with self.lock:
+            self.running -= 1
+        return messages
+
+
+def test_call_limit_caps_concurrent_llm_calls_across_threads():
+    executor = _executor(max_concurrency=2)
+    llm = install_call_limit(_SlowLLM(), executor)
+    threads = [threading.Thread(target=llm.call, args=(str(i),)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert llm.peak == 2
+    assert executor.stats()["calls_running"] == 0
+
+
+def _wait_for_waiting_calls(executor, count):
+    for _ in range(500):
+        if executor.stats()["calls_waiting"] == count:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"expected {count} waiting calls")
+
+
+def test_background_calls_give_way_to_waiting_requests():
+    executor = _executor(max_concurrency=1)
+    order = []
+    release = threading.Event()
+
+    def hold_slot():
+        with executor.call_slot():
+            release.wait(5)
+
+    def request_call():
+        with executor.call_slot():
+            order.append("request")
+
+    def background_call():
+        with background_calls():
+            limited = install_call_limit(_SlowLLM(), executor)
+            limited.call("speculative")
+            order.append("background")
+
+    holder = threading.Thread(target=hold_slot)
+    holder.start()
+    for _ in range(500):
+        if executor.stats()["calls_running"] == 1:
+            break
+        time.sleep(0.01)
+    # The background call starts waiting first, but the request's call still goes first
+    background = threading.Thread(target=background_call)
+    background.start()
+    _wait_for_waiting_calls(executor, 1)
+    request = threading.Thread(target=request_call)
+    request.start()
+    _wait_for_waiting_calls(executor, 2)
+    release.set()
+    for thread in (holder, background, request):
+        thread.join(5)
+
+    assert order == ["request", "background"]
+    assert executor.stats()["calls_running"] == 0
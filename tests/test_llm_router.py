@@ -0,0 +1,88 @@
+import pytest
+from crewai.llms.base_llm import BaseLLM, call_stop_override
+
+from backend.utils import llm_router
+from backend.utils.llm_router import RoutedLLM, get_backend_health
+from backend.utils.metrics import stage_timer
+
+
+class _Backend(BaseLLM):
+    """A router backend that records its calls and the stop words it saw."""
+
+    fail: bool = False
+
+    def model_post_init(self, __context):
+        super().model_post_init(__context)
+        object.__setattr__(self, "seen_stop", [])
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        self.seen_stop.append(list(self.stop_sequences))
+        if self.fail:
+            raise RuntimeError(f"{self.model} is down")
+        return f"answer from {self.model}"
+
+    def supports_stop_words(self) -> bool:
+        return True
+
+
+@pytest.fixture(autouse=True)
+def _fresh_health(monkeypatch):
+    # Backend health is shared by name across routers; each test starts from a clean record
+    monkeypatch.setattr(llm_router, "_health", {})
+
+
+def _router(fail_large=False):
+    backends = {"fast": _Backend(model="fast-model"), "large": _Backend(model="large-model", fail=fail_large)}
+    return RoutedLLM.create(backends, {"master_agent": "fast", "world_builder": "large", "default": "fast"}), backends
+
+
+def test_routes_each_stage_to_its_backend():
+    router, backends = _router()
+    with stage_timer("master_agent"):
+        assert router.call("hello") == "answer from fast-model"
+    with stage_timer("world_builder"):
+        assert router.call("hello") == "answer from large-model"
+    with stage_timer("summary_writer"):
+        assert router.call("hello") == "answer from fast-model"
+    assert len(backends["fast"].seen_stop) == 2
+    assert len(backends["large"].seen_stop) == 1
+
+
+def test_fails_over_to_the_next_backend():
+    router, _ = _router(fail_large=True)
+    with stage_timer("world_builder"):
+        assert router.call("hello") == "answer from fast-model"
+    assert get_backend_health("large").failures == 1
+    assert get_backend_health("fast").failures == 0
+
+
+def test_failing_backend_is_skipped_while_cooling_down():
+    router, backends = _router(fail_large=True)
+    for _ in range(3):
+        with stage_timer("world_builder"):
+            router.call("hello")
+    # Two failures in a row open the circuit, so the third call goes straight to "fast"
+    assert len(backends["large"].seen_stop) == 2
+    assert router.candidates("world_builder") == ["fast"]
+
+
+def test_raises_the_last_error_when_every_backend_fails():
+    backends = {"only": _Backend(model="only-model", fail=True)}
+    router = RoutedLLM.create(backends, {"default": "only"})
+    with pytest.raises(RuntimeError, match="only-model is down"):
+        router.call("hello")
+
+
+def test_stop_words_set_on_the_router_reach_the_backend():
+    router, backends = _router()
+    with call_stop_override(router, ["\nObservation:"]), stage_timer("master_agent"):
+        router.call("hello")
+    router.call("hello")
+    assert backends["fast"].seen_stop == [["\nObservation:"], []]
+
+
+def test_refuses_to_route_without_per_call_stop_words(monkeypatch):
+    monkeypatch.setattr(llm_router, "call_stop_override", None)
+    with pytest.raises(RuntimeError, match="call_stop_override"):
+        _router()
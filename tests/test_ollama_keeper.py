@@ -0,0 +1,93 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from backend.utils import ollama_keeper
+from backend.utils.ollama_keeper import OllamaWarmKeeper
+
+
+class _OllamaStub(BaseHTTPRequestHandler):
+    """Answers /api/generate like Ollama does for a request without a prompt, recording each body."""
+
+    bodies = []
+    status = 200
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).bodies.append((self.path, body))
+        answer = json.dumps({"model": body["model"], "response": "", "done": True, "load_duration": 1_500_000_000}).encode()
+        self.send_response(type(self).status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(answer)))
+        self.end_headers()
+        self.wfile.write(answer)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ollama():
+    _OllamaStub.bodies, _OllamaStub.status = [], 200
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OllamaStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def _keeper(server, **kwargs):
+    return OllamaWarmKeeper(f"http://127.0.0.1:{server.server_port}", ["ollama/gemma3n:latest"], keep_alive="10m", timeout=5, **kwargs)
+
+
+def test_preloads_the_model_then_sends_keep_alive_requests(ollama):
+    keeper = _keeper(ollama, interval=0.05, window=0)
+    keeper.start()
+    try:
+        _wait_for(lambda: len(_OllamaStub.bodies) >= 3)
+    finally:
+        keeper.stop()
+
+    expected = ("/api/generate", {"model": "gemma3n:latest", "keep_alive": "10m", "stream": False})
+    assert _OllamaStub.bodies[:3] == [expected] * 3
+    state = keeper.stats()["models"]["gemma3n:latest"]
+    assert state["warm_requests"] >= 3
+    assert state["last_kind"] == "keep_alive"
+    assert state["last_load_s"] == 1.5
+    assert state["failures"] == 0
+
+
+def test_stops_keeping_models_loaded_outside_the_window(ollama, monkeypatch):
+    # No LLM call since startup
+    monkeypatch.setattr(ollama_keeper, "last_llm_call_at", lambda: None)
+    keeper = _keeper(ollama, interval=0.05, window=0.01)
+    keeper.start()
+    try:
+        _wait_for(lambda: keeper.stats()["models"]["gemma3n:latest"]["warm_requests"] == 1)
+        time.sleep(0.2)
+    finally:
+        keeper.stop()
+
+    # Only the preload
+    assert len(_OllamaStub.bodies) == 1
+    assert keeper.stats()["in_window"] is False
+
+
+def test_records_failed_requests(ollama):
+    _OllamaStub.status = 500
+    keeper = _keeper(ollama)
+
+    assert keeper.warm("gemma3n:latest", "preload") is False
+    state = keeper.stats()["models"]["gemma3n:latest"]
+    assert state["failures"] == 1
+    assert "500" in state["last_error"]
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from backend.utils.output_recovery import recover_json
+
+_RESPONSE = {"status": "continue", "message": "Who is the story for?", "data": {"premise": "A wizard in a modern city"}}
+
+
+def test_parses_well_formed_output_directly():
+    assert recover_json(json.dumps(_RESPONSE)) == _RESPONSE
+
+
+def test_strips_code_fences():
+    assert recover_json(f"```json\n{json.dumps(_RESPONSE)}\n```") == _RESPONSE
+
+
+def test_strips_surrounding_prose():
+    assert recover_json(f"Sure! Here is the response:\n{json.dumps(_RESPONSE)}\nLet me know.") == _RESPONSE
+
+
+def test_drops_trailing_commas():
+    raw = '{"status": "continue", "message": "Who is the story for?", "data": {"premise": "A wizard in a modern city",},}'
+    assert recover_json(raw) == _RESPONSE
+
+
+def test_keeps_nested_values_of_the_outer_object():
+    raw = "Answer: {'status': 'continue', 'data': {'names': ['Elara', 'Mira'], 'ok': True}}"
+    assert recover_json(raw) == {"status": "continue", "data": {"names": ["Elara", "Mira"], "ok": True}}
+
+
+def test_recovers_a_list():
+    assert recover_json("The names are ['Elara Vance', \"Kaelen O'Neil\"].", opener="[") == ["Elara Vance", "Kaelen O'Neil"]
+
+
+@pytest.mark.parametrize("raw, opener", [
+    # The outer object cannot be repaired; its nested "data" object must not be returned instead
+    ('{"status": "continue", "message": "Pick: "Kids", or Teens", "data": {}}', "{"),
+    ('Names: [["Elara", "Mira"], Kaelen]', "["),
+    ('{"status": "continue", "message": "never closed"', "{"),
+    ("I could not come up with an answer.", "{"),
+    ("", "{"),
+])
+def test_unrecoverable_output_raises(raw, opener):
+    with pytest.raises(json.JSONDecodeError):
+        recover_json(raw, opener=opener)
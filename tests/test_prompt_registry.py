@@ -0,0 +1,37 @@
+import pytest
+
+from backend.prompts.registry import PROMPT_TEMPLATES, PromptRegistry, PromptTemplate
+
+
+@pytest.fixture(scope="module")
+def registry():
+    return PromptRegistry()
+
+
+def test_renders_like_str_format():
+    template = PromptTemplate("test", "Title for '{premise}' ({count:02d}) {{literal}}")
+    assert template.render(premise="A wizard", count=3) == "Title for 'A wizard' (03) {literal}"
+
+
+def test_missing_values_are_named():
+    with pytest.raises(KeyError, match="premise"):
+        PromptTemplate("test", "Premise: {premise}").render()
+
+
+@pytest.mark.parametrize("name", sorted(PROMPT_TEMPLATES))
+def test_identifies_every_rendered_template(registry, name):
+    template = registry.get(name)
+    rendered = template.render(**{field: f"some {field}" for field in template.fields})
+    assert registry.identify(rendered) is template
+
+
+def test_does_not_identify_text_that_only_shares_a_prefix(registry):
+    assert registry.identify("Create a short poem about the sea.") is None
+    prefix = registry.get("character_profiles_task").static_prefix
+    assert registry.identify(prefix + "3.") is None
+
+
+def test_story_task_prompts_start_with_their_instructions(registry):
+    # Prefix caching reuses the text before the first placeholder
+    for name in ("world_description_task", "character_profiles_task", "narrative_twist_task", "story_summary_task"):
+        assert len(registry.get(name).static_prefix) >= 60
@@ -0,0 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.utils.save_to_markdown import save_to_markdown
+
+
+def test_stories_with_the_same_title_get_their_own_files(tmp_path):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        paths = list(pool.map(lambda n: save_to_markdown("The Amber Lantern", f"story {n}", output_dir=str(tmp_path)), range(8)))
+
+    assert len(set(paths)) == 8
+    assert sorted(open(path, encoding="utf-8").read() for path in paths) == [f"story {n}" for n in range(8)]
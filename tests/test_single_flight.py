@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+from backend.utils.single_flight import SingleFlight
+
+
+def test_cancelled_waiter_leaves_the_result_to_the_others():
+    flights = SingleFlight("test")
+    release = threading.Event()
+
+    async def scenario():
+        flight, leader = flights.join("key")
+        assert leader
+        _, follower_leads = flights.join("key")
+        assert not follower_leads
+        worker = threading.Thread(target=flights.run, args=(flight, lambda: release.wait(5) and "story"))
+        worker.start()
+
+        cancelled = asyncio.wrap_future(flight.future)
+        waiting = asyncio.wrap_future(flight.future)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        result = await waiting
+        await asyncio.get_running_loop().run_in_executor(None, worker.join, 5)
+        return flight, result
+
+    flight, result = asyncio.run(scenario())
+    # The leader could still set the result, and a blocking follower gets it too
+    assert result == "story"
+    assert flight.future.result() == "story"
+
+
+def test_errors_reach_every_caller():
+    flights = SingleFlight("test")
+    flight, _ = flights.join("key")
+
+    def fail():
+        raise ValueError("no story")
+
+    flights.run(flight, fail)
+    assert isinstance(flight.future.exception(), ValueError)
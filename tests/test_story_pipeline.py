@@ -0,0 +1,36 @@
+import pytest
+
+from backend.utils.story_pipeline import PipelineNode, run_pipeline
+
+
+def test_runs_nodes_after_their_dependencies():
+    order = []
+    nodes = [
+        PipelineNode("b", lambda upstream: order.append("b") or upstream["a"] + 1, deps=["a"]),
+        PipelineNode("a", lambda upstream: order.append("a") or 1),
+    ]
+    outputs, timings = run_pipeline(nodes, max_workers=2)
+    assert outputs == {"a": 1, "b": 2}
+    assert order == ["a", "b"]
+    assert set(timings) == {"a", "b"}
+
+
+def test_failure_is_raised_and_dependents_never_run():
+    started = []
+
+    def fail(upstream):
+        started.append("fail")
+        raise RuntimeError("boom")
+
+    nodes = [
+        PipelineNode("fail", fail),
+        PipelineNode("after", lambda upstream: started.append("after"), deps=["fail"]),
+    ]
+    with pytest.raises(RuntimeError, match="boom"):
+        run_pipeline(nodes, max_workers=1)
+    assert started == ["fail"]
+
+
+def test_unknown_dependency_is_rejected():
+    with pytest.raises(ValueError, match="unknown nodes"):
+        run_pipeline([PipelineNode("a", lambda upstream: 1, deps=["missing"])])